@@ -3,13 +3,19 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from datetime import date, datetime
 from typing import Optional
-from crewai import Crew, LLM
-from trip_agents import TripAgents
-from trip_tasks import TripTasks
+from trip_engine import get_engine
 import os
 from dotenv import load_dotenv
 from functools import lru_cache
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse
+from tools.http_client import aclose_async_client
+from tools.progress import ProgressEmitter, set_emitter, reset_emitter, format_sse
+from tools.search_cache import get_search_cache
+from tools.tracing import render_metrics
+from jobs import JobManager, QueueFullError
+from itinerary_cache import get_itinerary_cache
+import asyncio
+import threading
 
 # Load environment variables
 load_dotenv()
@@ -51,6 +57,18 @@ class TripResponse(BaseModel):
     message: str
     itinerary: Optional[str] = None
     error: Optional[str] = None
+    # Per-task start offset and duration in seconds, plus the total
+    timings: Optional[dict] = None
+    # Token budget and estimated tokens per agent and per tool
+    tokens: Optional[dict] = None
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
 
 # Setting class is not an user input and hence does not require Pydantic validation
 class Settings:
@@ -94,53 +112,28 @@ def validate_api_keys(settings: Settings = Depends(get_settings)):
     return settings
 
 class TripCrew:
-    def __init__(self, origin, destination, date_range, interests):
+    def __init__(self, origin, destination, date_range, interests, emitter=None):
         self.destination = destination
         self.origin = origin
         self.interests = interests
         self.date_range = date_range
-        self.llm = LLM(model="gemini/gemini-2.0-flash")
+        # LLM client, tools and agent templates come from the process-wide pool
+        self.engine = get_engine()
+        # Optional ProgressEmitter that receives every task output as it completes
+        self.emitter = emitter
+        self.timings = {}
+        self.tokens = {}
 
     def run(self):
         try:
-            agents = TripAgents(llm=self.llm)
-            tasks = TripTasks()
-
-            city_selector_agent = agents.city_selection_agent()
-            local_expert_agent = agents.local_expert()
-            travel_concierge_agent = agents.travel_concierge()
-
-            identify_task = tasks.identify_task(
-                city_selector_agent,
+            # Returns the result, the per-task wall-clock breakdown and the token accounting
+            result, self.timings, self.tokens = self.engine.run(
                 self.origin,
                 self.destination,
                 self.interests,
-                self.date_range
+                self.date_range,
+                task_callback=self.emitter.task_callback if self.emitter else None
             )
-
-            gather_task = tasks.gather_task(
-                local_expert_agent,
-                self.origin,
-                self.interests,
-                self.date_range
-            )
-
-            plan_task = tasks.plan_task(
-                travel_concierge_agent,
-                self.origin,
-                self.interests,
-                self.date_range
-            )
-
-            crew = Crew(
-                agents=[
-                    city_selector_agent, local_expert_agent, travel_concierge_agent
-                ],
-                tasks=[identify_task, gather_task, plan_task],
-                verbose=True
-            )
-
-            result = crew.kickoff()
             # Convert CrewOutput to string and ensure it's properly formatted
             return result.raw if hasattr(result, 'raw') else str(result)
         except Exception as e:
@@ -149,61 +142,251 @@ class TripCrew:
                 detail=str(e)
             )
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    with open("index.html", "r") as f:
-        html_content = f.read()
-    return html_content
+# Crews run on this bounded pool so the event loop stays free to answer other requests
+job_manager = JobManager()
+# Progress emitters of the plans being generated, by itinerary cache key: streaming
+# requests coalesced onto a plan receive its progress events from the time they join
+_plan_emitters = {}
+_plan_emitters_lock = threading.Lock()
 
-@app.post("/api/v1/plan-trip", response_model=TripResponse)
-async def plan_trip(
-    trip_request: TripRequest,
-    settings: Settings = Depends(validate_api_keys)
-):
-    # Validate dates
+@app.on_event("startup")
+async def startup():
+    # Build the LLM client, tools and agent templates before the first request arrives
+    await asyncio.to_thread(get_engine().warm_up)
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Close the pooled connections used by the tools' async HTTP client
+    await aclose_async_client()
+    job_manager.shutdown()
+
+def validate_trip_request(trip_request: TripRequest) -> str:
+    """Validate the dates and return the date range used in the task prompts."""
     if trip_request.end_date <= trip_request.start_date:
         raise HTTPException(
             status_code=400,
             detail="End date must be after start date"
         )
+    return f"{trip_request.start_date} to {trip_request.end_date}"
 
-    # Format date range
-    date_range = f"{trip_request.start_date} to {trip_request.end_date}"
+def run_trip_crew(trip_request: TripRequest, date_range: str, emitter: ProgressEmitter = None,
+                  reservation: tuple = None) -> dict:
+    """Blocking crew run, executed on a job worker thread.
 
+    Returns the itinerary, the per-task timing breakdown and the token accounting.
+    reservation is the itinerary cache's (key, future) this run completes, if any.
+    """
     try:
-        trip_crew = TripCrew(
+        # The emitter is installed in the worker thread, where the tools will run
+        token = set_emitter(emitter)
+        try:
+            trip_crew = TripCrew(
+                trip_request.origin,
+                trip_request.destination,
+                date_range,
+                trip_request.interests,
+                emitter=emitter
+            )
+            itinerary = trip_crew.run()
+        finally:
+            reset_emitter(token)
+        # Ensure itinerary is a string
+        if not isinstance(itinerary, str):
+            itinerary = str(itinerary)
+        result = {"itinerary": itinerary, "timings": trip_crew.timings, "tokens": trip_crew.tokens}
+    except BaseException as e:
+        if reservation is not None:
+            get_itinerary_cache().complete(*reservation, error=e)
+        raise
+    if reservation is not None:
+        get_itinerary_cache().complete(*reservation, result)
+    return result
+
+def submit_trip_job(trip_request: TripRequest, date_range: str, emitter: ProgressEmitter = None):
+    """Queue a trip plan, or follow the matching plan that is cached or being generated.
+
+    Requests are coalesced here, before the job queue: only the request that leads a plan
+    occupies a worker, the others wait on its future without holding a thread.
+    """
+    reservation = None
+    cache = get_itinerary_cache()
+    if cache is not None:
+        key, future, leader = cache.reserve(
             trip_request.origin,
             trip_request.destination,
-            date_range,
+            trip_request.start_date,
+            trip_request.end_date,
             trip_request.interests
         )
-        
-        itinerary = trip_crew.run()
-        
-        # Ensure itinerary is a string
-        if not isinstance(itinerary, str):
-            itinerary = str(itinerary)
-            
+        if not leader:
+            if emitter is not None:
+                with _plan_emitters_lock:
+                    source = _plan_emitters.get(key)
+                if source is not None:
+                    source.add_follower(emitter)
+            return job_manager.follow(future)
+        reservation = (key, future)
+        # Forward-only when this request does not stream, for the followers that do
+        emitter = emitter or ProgressEmitter(buffer=False)
+        with _plan_emitters_lock:
+            _plan_emitters[key] = emitter
+        future.add_done_callback(lambda _: _forget_plan_emitter(key))
+    try:
+        return job_manager.submit(run_trip_crew, trip_request, date_range, emitter, reservation)
+    except QueueFullError as e:
+        if reservation is not None:
+            # Requests that joined meanwhile fail too; the next lookup starts afresh
+            cache.complete(*reservation, error=HTTPException(status_code=429, detail=str(e)))
+        raise HTTPException(status_code=429, detail=str(e))
+
+def _forget_plan_emitter(key):
+    with _plan_emitters_lock:
+        _plan_emitters.pop(key, None)
+
+@app.get("/", response_class=HTMLResponse)
+async def root():
+    with open("index.html", "r") as f:
+        html_content = f.read()
+    return html_content
+
+@app.post("/api/v1/plan-trip", response_model=TripResponse)
+async def plan_trip(
+    trip_request: TripRequest,
+    settings: Settings = Depends(validate_api_keys)
+):
+    date_range = validate_trip_request(trip_request)
+    job = submit_trip_job(trip_request, date_range)
+
+    try:
+        # Wait for the worker thread without blocking the event loop
+        result = await asyncio.wrap_future(job.future)
+
         return TripResponse(
             status="success",
             message="Trip plan generated successfully",
-            itinerary=itinerary
+            itinerary=result["itinerary"],
+            timings=result["timings"],
+            tokens=result.get("tokens")
         )
     
     except Exception as e:
         return TripResponse(
             status="error",
             message="Failed to generate trip plan",
-            error=str(e)
+            error=job.error or str(e)
+        )
+
+# Seconds between keep-alive comments, so proxies do not drop a quiet stream
+STREAM_KEEPALIVE = 15
+
+@app.post("/api/v1/plan-trip/stream")
+async def plan_trip_stream(
+    trip_request: TripRequest,
+    settings: Settings = Depends(validate_api_keys)
+):
+    """Plan a trip and stream progress as Server-Sent Events.
+
+    Events: queued, tool_started, tool_finished, task_completed, then final or error.
+    A request coalesced onto a plan being generated gets its events from the time it joined.
+    """
+    date_range = validate_trip_request(trip_request)
+    emitter = ProgressEmitter()
+    job = submit_trip_job(trip_request, date_range, emitter)
+
+    async def event_stream():
+        yield format_sse("queued", {"job_id": job.id})
+        last_sent = asyncio.get_running_loop().time()
+        while True:
+            finished = job.future.done()
+            # Drain what the worker thread queued since the last pass
+            while not emitter.events.empty():
+                event, data = emitter.events.get_nowait()
+                yield format_sse(event, data)
+                last_sent = asyncio.get_running_loop().time()
+            if finished:
+                break
+            if asyncio.get_running_loop().time() - last_sent > STREAM_KEEPALIVE:
+                yield ": keep-alive\n\n"
+                last_sent = asyncio.get_running_loop().time()
+            await asyncio.sleep(0.2)
+
+        if job.status == "completed":
+            yield format_sse("final", job.result)
+        else:
+            yield format_sse("error", {"error": job.error})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/v1/plan-trip/jobs", response_model=JobResponse, status_code=202)
+async def submit_trip_plan(
+    trip_request: TripRequest,
+    settings: Settings = Depends(validate_api_keys)
+):
+    """Queue a trip plan and return its job id right away."""
+    date_range = validate_trip_request(trip_request)
+    job = submit_trip_job(trip_request, date_range)
+    return JobResponse(**job.to_dict())
+
+@app.get("/api/v1/plan-trip/jobs/{job_id}", response_model=JobResponse)
+async def get_trip_plan_status(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse(**job.to_dict())
+
+@app.get("/api/v1/plan-trip/jobs/{job_id}/result", response_model=TripResponse)
+async def get_trip_plan_result(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job.done:
+        # Not ready yet: answer 202 with the job status so clients keep polling
+        return JSONResponse(status_code=202, content=JobResponse(**job.to_dict()).model_dump())
+    if job.status == "failed":
+        return TripResponse(
+            status="error",
+            message="Failed to generate trip plan",
+            error=job.error
         )
+    return TripResponse(
+        status="success",
+        message="Trip plan generated successfully",
+        itinerary=job.result["itinerary"],
+        timings=job.result["timings"],
+        tokens=job.result.get("tokens")
+    )
 
 @app.get("/api/v1/health")
 async def health_check():
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "jobs": job_manager.stats(),
+        "engine": get_engine().stats(),
+        "itinerary_cache": get_itinerary_cache().stats() if get_itinerary_cache() else None,
+        "search_cache": get_search_cache().stats() if get_search_cache() else None
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Span metrics (durations, errors, payload sizes, tokens) in the Prometheus text format.
+
+    Span metrics are empty unless TRACING_ENABLED is set; job queue gauges and search
+    cache counters are always reported.
+    """
+    lines = [render_metrics()]
+    # Job queue gauges are always available
+    for key, value in job_manager.stats().items():
+        if isinstance(value, (int, float)):
+            lines.append(f"# TYPE trip_jobs_{key} gauge\ntrip_jobs_{key} {value}\n")
+    if get_search_cache() is not None:
+        lines.append(get_search_cache().render_prometheus())
+    return PlainTextResponse("".join(lines), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("__main__:app",host="127.0.0.1",port=8000, reload=True)
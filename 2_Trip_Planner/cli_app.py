@@ -1,10 +1,6 @@
-from crewai import Crew, LLM
-from trip_agents import TripAgents
-from trip_tasks import TripTasks
+from trip_engine import get_engine
 from datetime import datetime, timedelta
 import argparse
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
 import os
 from dotenv import load_dotenv
 
@@ -15,51 +11,20 @@ class TripCrew:
         self.origin = origin
         self.interests = interests
         self.date_range = date_range
-        # self.llm = LLM(model="groq/llama3-8b-8192")
-        self.llm = LLM(model="gemini/gemini-2.0-flash")
-        # self.llm = LLM(model="openai/gpt-4o-mini")
+        # The model is set by TRIP_MODEL, e.g. groq/llama3-8b-8192 or openai/gpt-4o-mini
+        self.engine = get_engine()
+        self.timings = {}
+        self.tokens = {}
 
 
     def run(self):
         try:
-            agents = TripAgents(llm=self.llm)
-            tasks = TripTasks()
-
-            city_selector_agent = agents.city_selection_agent()
-            local_expert_agent = agents.local_expert()
-            travel_concierge_agent = agents.travel_concierge()
-
-            identify_task = tasks.identify_task(
-                city_selector_agent,
+            result, self.timings, self.tokens = self.engine.run(
                 self.origin,
                 self.cities,
                 self.interests,
                 self.date_range
             )
-
-            gather_task = tasks.gather_task(
-                local_expert_agent,
-                self.origin,
-                self.interests,
-                self.date_range
-            )
-
-            plan_task = tasks.plan_task(
-                travel_concierge_agent,
-                self.origin,
-                self.interests,
-                self.date_range
-            )
-
-            crew = Crew(
-                agents=[
-                    city_selector_agent, local_expert_agent, travel_concierge_agent
-                ],
-                tasks=[identify_task, gather_task, plan_task],
-                verbose=True
-            )
-
-            result = crew.kickoff()
             return result
         except Exception as e:
             print(f"An error occurred: {str(e)}")
@@ -136,6 +101,12 @@ def main():
         print("\n✨ Your Trip Plan ✨")
         print("===================\n")
         print(result)
+        print("\n⏱️ Timing (seconds)")
+        for task, timing in trip_crew.timings.items():
+            print(f"{task}: {timing}")
+        print(f"\n🔢 Tokens: {trip_crew.tokens['used']} of {trip_crew.tokens['budget']} ({trip_crew.tokens['counter']})")
+        for name, stats in {**trip_crew.tokens['agents'], **trip_crew.tokens['tools']}.items():
+            print(f"{name}: {stats}")
     else:
         print("\n❌ Failed to generate trip plan. Please try again.")
 
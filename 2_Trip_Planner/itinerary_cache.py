@@ -0,0 +1,181 @@
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date
+
+# Result cache in front of TripCrew.run.
+# Two trip requests share an itinerary when they have the same origin, destination and
+# dates, and their interests are at least ITINERARY_CACHE_LEXICAL_SIMILARITY similar.
+# The similarity is lexical (words and character trigrams), not semantic: "museums" and
+# "art galleries" do not match. Dates must be equal, since the itinerary is day by day,
+# with the weather and events of those days.
+# Requests that match a plan still being generated wait for it instead of starting a crew:
+# reserve() tells the caller whether it leads (and must complete() the plan) or follows.
+CACHE_ENABLED = os.getenv("ITINERARY_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+CACHE_TTL = int(os.getenv("ITINERARY_CACHE_TTL", str(24 * 60 * 60)))
+CACHE_SIZE = int(os.getenv("ITINERARY_CACHE_SIZE", "256"))
+CACHE_SIMILARITY = float(os.getenv("ITINERARY_CACHE_LEXICAL_SIMILARITY", "0.9"))
+
+STOPWORDS = {
+    "a", "an", "and", "are", "at", "but", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "our", "the", "to", "very", "we", "who", "with", "like", "love", "loves", "enjoy",
+}
+FEATURE_DIM = 1024
+
+
+def normalize_place(place: str) -> str:
+    """'  Krabi ,Thailand ' -> 'krabi thailand'"""
+    return " ".join(re.findall(r"\w+", place.lower()))
+
+
+def interest_features(interests: str) -> dict:
+    """Free-text interests as a sparse, L2-normalized vector of hashed lexical features.
+
+    Features are the words (minus stopwords) and their character trigrams, so
+    'swimming, hiking' and 'hiking and swim' still land close to each other, while
+    synonyms without shared spelling do not.
+    """
+    words = [word for word in re.findall(r"\w+", interests.lower()) if word not in STOPWORDS]
+    features = list(words)
+    for word in words:
+        padded = f"#{word}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    vector = {}
+    for feature in features:
+        index = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest(), "big") % FEATURE_DIM
+        vector[index] = vector.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+    return {index: weight / norm for index, weight in vector.items()}
+
+
+def cosine(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(index, 0.0) for index, weight in a.items())
+
+
+class _Entry:
+    def __init__(self, vector: dict, future: Future):
+        self.vector = vector
+        self.future = future
+        self.created_at = time.time()
+
+
+class ItineraryCache:
+    def __init__(self, ttl: int = CACHE_TTL, max_size: int = CACHE_SIZE,
+                 similarity: float = CACHE_SIMILARITY):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.similarity = similarity
+        # ((origin, destination, start date, end date), id) -> _Entry, least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _bucket(self, origin: str, destination: str, start_date: date, end_date: date):
+        return normalize_place(origin), normalize_place(destination), start_date, end_date
+
+    def _find(self, bucket, vector: dict):
+        """Return the best fresh or in-flight entry matching the request, if any."""
+        now = time.time()
+        best, best_score = None, self.similarity
+        for key in list(self._entries):
+            entry_bucket, _ = key
+            entry = self._entries[key]
+            if entry.future.done() and (entry.future.exception() is not None or now - entry.created_at > self.ttl):
+                del self._entries[key]
+                continue
+            if entry_bucket != bucket:
+                continue
+            score = cosine(vector, entry.vector)
+            if score >= best_score:
+                best, best_score = key, score
+        return best
+
+    def reserve(self, origin: str, destination: str, start_date: date, end_date: date, interests: str):
+        """Look a request up; returns (key, future, leader).
+
+        The future resolves to the matching itinerary. When leader is True no plan matched:
+        the caller must compute it and pass it to complete(key, future, ...). Otherwise the
+        future belongs to a cached or in-flight plan.
+        """
+        bucket = self._bucket(origin, destination, start_date, end_date)
+        vector = interest_features(interests)
+        with self._lock:
+            key = self._find(bucket, vector)
+            owner = key is None
+            if owner:
+                self.misses += 1
+                future = Future()
+                key = (bucket, id(future))
+                self._entries[key] = _Entry(vector, future)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+                future = self._entries[key].future
+                if future.done():
+                    self.hits += 1
+                else:
+                    self.coalesced += 1
+        return key, future, owner
+
+    def complete(self, key, future: Future, result=None, error: BaseException = None):
+        """Resolve a reserved plan, for the requests waiting on it and later lookups."""
+        if error is not None:
+            # Failed runs are dropped from the cache on the next lookup
+            future.set_exception(error)
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # The TTL counts from when the itinerary was ready
+                entry.created_at = time.time()
+        future.set_result(result)
+
+    def get_or_run(self, origin: str, destination: str, start_date: date, end_date: date, interests: str, fn) -> str:
+        """Return a cached itinerary for a matching request, or compute it with fn() in this thread."""
+        key, future, leader = self.reserve(origin, destination, start_date, end_date, interests)
+        if not leader:
+            # Another request produced, or is producing, a matching itinerary
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.complete(key, future, error=e)
+            raise
+        self.complete(key, future, result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_itinerary_cache():
+    """Return the process-wide itinerary cache, or None when it is disabled."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ItineraryCache()
+        return _cache
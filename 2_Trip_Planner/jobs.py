@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Crews block for minutes, so they run on a bounded pool of worker threads instead of
+# on the event loop. Jobs beyond the running ones wait in the queue, and submissions
+# are refused once JOB_MAX_QUEUE jobs are already waiting. A job following the result of
+# another computation (follow()) takes no worker and no queue slot.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "16"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", str(60 * 60)))  # seconds finished jobs are kept
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its depth limit."""
+
+
+class Job:
+    def __init__(self, fn, args, kwargs):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.future = None
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+
+    def run(self):
+        self.status = "running"
+        self.started_at = time.time()
+        try:
+            self.result = self._fn(*self._args, **self._kwargs)
+            self.status = "completed"
+            return self.result
+        except Exception as e:
+            self.error = getattr(e, "detail", None) or str(e)
+            self.status = "failed"
+            raise
+        finally:
+            self.finished_at = time.time()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    def __init__(self, max_workers: int = JOB_WORKERS, max_queue: int = JOB_MAX_QUEUE, result_ttl: int = JOB_RESULT_TTL):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="trip-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs) -> Job:
+        """Queue fn(*args, **kwargs) and return its Job right away."""
+        with self._lock:
+            self._purge()
+            if self._count("queued") >= self.max_queue:
+                raise QueueFullError(f"Too many trip plans waiting ({self.max_queue}), try again later")
+            job = Job(fn, args, kwargs)
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(job.run)
+        return job
+
+    def follow(self, source: Future) -> Job:
+        """Register a job that completes with source, computed elsewhere; it takes no worker."""
+        job = Job(None, (), {})
+        job.status = "waiting"
+        job.future = Future()
+
+        def finish(done: Future):
+            # The job's state is set before its future resolves, like a job run by a worker
+            job.finished_at = time.time()
+            error = done.exception()
+            if error is not None:
+                job.error = getattr(error, "detail", None) or str(error)
+                job.status = "failed"
+                job.future.set_exception(error)
+            else:
+                job.result = done.result()
+                job.status = "completed"
+                job.future.set_result(job.result)
+
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = job
+        source.add_done_callback(finish)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _count(self, status: str) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == status)
+
+    def _purge(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.done and now - job.finished_at > self.result_ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self._count("queued"),
+                "running": self._count("running"),
+                "waiting": self._count("waiting"),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,56 @@
+import re
+
+# Country names and common short forms, lower case. A destination only counts as one
+# city when it ends with one of them, e.g. 'Krabi, Thailand' or 'Portland, Oregon, USA'.
+COUNTRIES = frozenset({
+    "afghanistan", "albania", "algeria", "andorra", "angola", "antigua and barbuda", "argentina",
+    "armenia", "australia", "austria", "azerbaijan", "bahamas", "bahrain", "bangladesh", "barbados",
+    "belarus", "belgium", "belize", "benin", "bhutan", "bolivia", "bosnia and herzegovina", "botswana",
+    "brazil", "brunei", "bulgaria", "burkina faso", "burundi", "cabo verde", "cape verde", "cambodia",
+    "cameroon", "canada", "central african republic", "chad", "chile", "china", "colombia", "comoros",
+    "congo", "costa rica", "cote d'ivoire", "ivory coast", "croatia", "cuba", "cyprus", "czechia",
+    "czech republic", "denmark", "djibouti", "dominica", "dominican republic", "ecuador", "egypt",
+    "el salvador", "equatorial guinea", "eritrea", "estonia", "eswatini", "ethiopia", "fiji", "finland",
+    "france", "gabon", "gambia", "georgia", "germany", "ghana", "greece", "grenada", "guatemala",
+    "guinea", "guinea-bissau", "guyana", "haiti", "honduras", "hong kong", "hungary", "iceland", "india",
+    "indonesia", "iran", "iraq", "ireland", "israel", "italy", "jamaica", "japan", "jordan",
+    "kazakhstan", "kenya", "kiribati", "kosovo", "kuwait", "kyrgyzstan", "laos", "latvia", "lebanon",
+    "lesotho", "liberia", "libya", "liechtenstein", "lithuania", "luxembourg", "macau", "madagascar",
+    "malawi", "malaysia", "maldives", "mali", "malta", "marshall islands", "mauritania", "mauritius",
+    "mexico", "micronesia", "moldova", "monaco", "mongolia", "montenegro", "morocco", "mozambique",
+    "myanmar", "namibia", "nauru", "nepal", "netherlands", "the netherlands", "new zealand", "nicaragua",
+    "niger", "nigeria", "north korea", "north macedonia", "norway", "oman", "pakistan", "palau",
+    "palestine", "panama", "papua new guinea", "paraguay", "peru", "philippines", "poland", "portugal",
+    "puerto rico", "qatar", "romania", "russia", "rwanda", "saint kitts and nevis", "saint lucia",
+    "saint vincent and the grenadines", "samoa", "san marino", "sao tome and principe", "saudi arabia",
+    "senegal", "serbia", "seychelles", "sierra leone", "singapore", "slovakia", "slovenia",
+    "solomon islands", "somalia", "south africa", "south korea", "korea", "south sudan", "spain",
+    "sri lanka", "sudan", "suriname", "sweden", "switzerland", "syria", "taiwan", "tajikistan",
+    "tanzania", "thailand", "timor-leste", "togo", "tonga", "trinidad and tobago", "tunisia", "turkey",
+    "turkiye", "turkmenistan", "tuvalu", "uganda", "ukraine", "united arab emirates", "uae",
+    "united kingdom", "uk", "england", "scotland", "wales", "united states", "united states of america",
+    "usa", "us", "uruguay", "uzbekistan", "vanuatu", "vatican city", "venezuela", "vietnam",
+    "viet nam", "yemen", "zambia", "zimbabwe",
+})
+
+
+def _place(part: str) -> str:
+    """' U.S.A. ' -> 'usa', ' Cote d’Ivoire' -> "cote d'ivoire" """
+    part = part.strip().lower().replace("’", "'")
+    return re.sub(r"\s+", " ", part.replace(".", ""))
+
+
+def is_single_city(destination: str) -> bool:
+    """True when the destination unambiguously names one city.
+
+    That is 'City, Country' or 'City, Region, Country' with a known country, e.g.
+    'Krabi, Thailand' or 'Portland, Oregon, USA'. 'Krabi or Phuket', 'Paris, Rome', a
+    bare country like 'Thailand', and a bare city all count as ambiguous, which keeps
+    the full city selection.
+    """
+    parts = [_place(part) for part in destination.split(",") if part.strip()]
+    if not 2 <= len(parts) <= 3 or parts[-1] not in COUNTRIES:
+        return False
+    # 'Krabi or Phuket, Thailand' names several cities, 'Thailand, Vietnam' two countries
+    return not any(re.search(r";|/|\||\n|\bor\b|\band\b|&", part) or part in COUNTRIES
+                   for part in parts[:-1])
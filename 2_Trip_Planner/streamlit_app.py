@@ -1,10 +1,8 @@
-from crewai import Crew, LLM
-from trip_agents import TripAgents, StreamToExpander
-from trip_tasks import TripTasks
+from trip_agents import StreamToExpander
+from trip_engine import get_engine
 import streamlit as st
 import datetime
 import sys
-from langchain_openai import OpenAI
 
 
 st.set_page_config(page_icon="✈️", layout="wide")
@@ -27,7 +25,10 @@ class TripCrew:
         # Convert date_range to string format for better handling
         self.date_range = f"{date_range[0].strftime('%Y-%m-%d')} to {date_range[1].strftime('%Y-%m-%d')}"
         self.output_placeholder = st.empty()
-        self.llm = LLM(model="gemini/gemini-2.0-flash")
+        # Shared by every session and rerun of this Streamlit process
+        self.engine = get_engine()
+        self.timings = {}
+        self.tokens = {}
         # self.llm = OpenAI(
         #     temperature=0.7,
         #     model_name="gpt-4",
@@ -35,44 +36,12 @@ class TripCrew:
 
     def run(self):
         try:
-            agents = TripAgents(llm=self.llm)
-            tasks = TripTasks()
-
-            city_selector_agent = agents.city_selection_agent()
-            local_expert_agent = agents.local_expert()
-            travel_concierge_agent = agents.travel_concierge()
-
-            identify_task = tasks.identify_task(
-                city_selector_agent,
+            result, self.timings, self.tokens = self.engine.run(
                 self.origin,
                 self.cities,
                 self.interests,
                 self.date_range
             )
-
-            gather_task = tasks.gather_task(
-                local_expert_agent,
-                self.origin,
-                self.interests,
-                self.date_range
-            )
-
-            plan_task = tasks.plan_task(
-                travel_concierge_agent,
-                self.origin,
-                self.interests,
-                self.date_range
-            )
-
-            crew = Crew(
-                agents=[
-                    city_selector_agent, local_expert_agent, travel_concierge_agent
-                ],
-                tasks=[identify_task, gather_task, plan_task],
-                verbose=True
-            )
-
-            result = crew.kickoff()
             self.output_placeholder.markdown(result)
             return result
         except Exception as e:
@@ -144,6 +113,12 @@ if submitted:
     st.subheader("Here is your Trip Plan", anchor=False, divider="rainbow")
     st.markdown(result)
 
+    with st.expander("⏱️ Timing breakdown (seconds)"):
+        st.json(trip_crew.timings)
+
+    with st.expander("🔢 Token usage (estimated)"):
+        st.json(trip_crew.tokens)
+
 
 # Here is an example of simpler way to capture real-time console output in Streamlit:
 # import sys
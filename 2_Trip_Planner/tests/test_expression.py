@@ -0,0 +1,32 @@
+import time
+
+import pytest
+
+from tools.expression import ExpressionError, evaluate, normalize
+
+
+def test_nested_powers_are_refused_quickly():
+    start = time.perf_counter()
+    with pytest.raises(ExpressionError):
+        evaluate("abs(abs(abs(9**100)**100)**100)**100")
+    with pytest.raises(ExpressionError):
+        evaluate("9**9**9")
+    assert time.perf_counter() - start < 1
+
+
+def test_small_powers():
+    assert evaluate("2^10") == 1024
+    assert evaluate("(2**3)**2") == 64
+    assert evaluate("2**-2") == 0.25
+
+
+def test_commas_between_call_arguments_are_kept():
+    assert normalize("min(100,250)") == "min(100,250)"
+    assert evaluate("min(100,250)") == 100
+    assert evaluate("max(1,200, 300)") == 300
+
+
+def test_thousands_separators():
+    assert evaluate("$1,200.50 + 3 x 40") == 1320.5
+    assert evaluate("1,200,000 / 2") == 600000
+    assert evaluate("15% of 1,200") == 180
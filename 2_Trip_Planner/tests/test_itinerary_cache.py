@@ -0,0 +1,36 @@
+from datetime import date
+
+from itinerary_cache import ItineraryCache
+from tools.progress import ProgressEmitter
+
+
+def plan(cache, start, end, interests="hiking and swimming"):
+    key, future, leader = cache.reserve("Bangalore, India", "Krabi, Thailand", start, end, interests)
+    if leader:
+        cache.complete(key, future, f"itinerary from {start}")
+    return future.result(), leader
+
+
+def test_itineraries_are_only_reused_for_the_same_dates():
+    cache = ItineraryCache()
+    assert plan(cache, date(2025, 6, 1), date(2025, 6, 10)) == ("itinerary from 2025-06-01", True)
+    assert plan(cache, date(2025, 6, 1), date(2025, 6, 10), "Swimming, hiking") == ("itinerary from 2025-06-01", False)
+    # Same trip length, other days: the weather and events of the plan would be wrong
+    assert plan(cache, date(2025, 6, 2), date(2025, 6, 11)) == ("itinerary from 2025-06-02", True)
+
+
+def test_interest_similarity_is_lexical():
+    cache = ItineraryCache()
+    plan(cache, date(2025, 6, 1), date(2025, 6, 10), "museums")
+    assert plan(cache, date(2025, 6, 1), date(2025, 6, 10), "art galleries")[1]
+
+
+def test_progress_events_are_forwarded_to_followers():
+    leader, follower = ProgressEmitter(buffer=False), ProgressEmitter()
+    leader.emit("tool_started", tool="search")
+    leader.add_follower(follower)
+    leader.emit("tool_finished", tool="search")
+    assert leader.events.empty()
+    event, data = follower.events.get_nowait()
+    assert event == "tool_finished" and data["tool"] == "search"
+    assert follower.events.empty()
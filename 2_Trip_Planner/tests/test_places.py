@@ -0,0 +1,27 @@
+import pytest
+
+from places import is_single_city
+
+
+@pytest.mark.parametrize("destination", [
+    "Krabi, Thailand",
+    "Portland, Oregon, USA",
+    "Port of Spain, Trinidad and Tobago",
+    " kyoto ,Japan ",
+])
+def test_single_city(destination):
+    assert is_single_city(destination)
+
+
+@pytest.mark.parametrize("destination", [
+    "Paris, Rome",
+    "Thailand",
+    "Japan",
+    "Krabi",
+    "Krabi or Phuket, Thailand",
+    "Thailand, Vietnam",
+    "Paris, Rome, Berlin",
+    "Paris; Rome",
+])
+def test_ambiguous_destinations_keep_city_selection(destination):
+    assert not is_single_city(destination)
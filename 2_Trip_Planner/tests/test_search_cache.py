@@ -0,0 +1,15 @@
+from tools.search_cache import SearchCache, normalize_query
+
+
+def test_reverse_routes_do_not_share_a_key():
+    outbound = normalize_query("Flights from Krabi to Bangalore")
+    inbound = normalize_query("flights to Krabi from Bangalore")
+    assert outbound == "flights from krabi to bangalore"
+    assert outbound != inbound
+
+
+def test_reverse_route_is_not_served_from_the_cache():
+    cache = SearchCache(path="")
+    cache.put("Flights from Krabi to Bangalore", {"organic": [{"title": "KBV -> BLR"}]})
+    assert cache.get("flights to Krabi from Bangalore") is None
+    assert cache.get("flights from Krabi to Bangalore") == {"organic": [{"title": "KBV -> BLR"}]}
@@ -0,0 +1,16 @@
+from tools.token_budget import TOKEN_BUDGET, TOOL_OUTPUT_MAX_TOKENS, TokenBudget, truncate
+
+
+def test_budget_defaults_come_from_the_project_settings():
+    budget = TokenBudget()
+    assert budget.max_tokens == TOKEN_BUDGET
+    assert budget.tool_max_tokens == TOOL_OUTPUT_MAX_TOKENS
+    assert TokenBudget(max_tokens=100).max_tokens == 100
+
+
+def test_truncate_keeps_whole_sections_best_first():
+    text = "\n\n".join(f"section {i} " + "word " * 40 for i in range(10))
+    trimmed = truncate(text, 120)
+    assert trimmed.startswith("section 0 ")
+    assert "section 9" not in trimmed
+    assert "tokens omitted to fit the token budget" in trimmed
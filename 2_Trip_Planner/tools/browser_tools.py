@@ -1,14 +1,18 @@
+import asyncio
 import json
-import requests
-import streamlit as st
+import queue
+from typing import Any, Optional
 from crewai.tools import BaseTool
-from pydantic import BaseModel, Field
-from unstructured.partition.html import partition_html
-from crewai import Agent, Task
-#from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
+from pydantic import BaseModel, Field, PrivateAttr
 from crewai import LLM
-from crewai import Crew
+from tools.summarizer import ChunkSummarizer, MAX_CONCURRENCY
+from tools.chunk_ranking import select_chunks, FOCUS_TOP_K, FOCUS_MIN_SCORE
+from tools.html_text import HtmlChunker, iter_chunks, split_text, charset, READ_SIZE
+from tools.page_cache import get_page_cache
+from tools.http_client import get_session, get_async_client, TIMEOUT
+from tools.progress import reports_progress
+from tools.token_budget import fits_budget
+from tools.tracing import traced_tool
 
 import os
 from dotenv import load_dotenv
@@ -16,56 +20,132 @@ load_dotenv()
 
 class WebsiteInput(BaseModel):
     website: str = Field(..., description="The website URL to scrape")
+    focus: Optional[str] = Field(
+        None, description="Optional: what you are looking for on the page, e.g. 'opening hours and ticket prices'. "
+                          "Only the parts of the page about it are summarized, which is much faster on long pages."
+    )
 
 class BrowserTools(BaseTool):
     name: str = "Scrape website content"
     description: str = "Useful to scrape and summarize a website content. Input should be a valid URL in a string format. Example: 'https://docs.crewai.com/en/concepts/tools'. "
     args_schema: type[BaseModel] = WebsiteInput
+    # Max chunks of one page summarized in parallel, and whether to merge the chunk summaries
+    max_concurrency: int = MAX_CONCURRENCY
+    reduce_summaries: bool = False
+    # LLM client of the summarizer; TripEngine passes the agents' pooled client
+    llm: Any = None
+    # With a focus query, at most this many chunks are summarized, and only those scoring
+    # at least focus_min_score times the best chunk's BM25 score
+    focus_top_k: int = FOCUS_TOP_K
+    focus_min_score: float = FOCUS_MIN_SCORE
+    _summarizer: ChunkSummarizer = PrivateAttr(default=None)
 
-    def _run(self, website: str) -> str:
-        try:
-            url = f"https://production-sfo.browserless.io/content?token={os.getenv('BROWSERLESS_API_KEY')}"
-            headers = {"Cache-Control": "no-cache","Content-Type": "application/json"}
-            data = {"url": website, "rejectResourceTypes": ["image"],"rejectRequestPattern": ["/^.*\\.(css)"]}
-            response = requests.post(url, headers=headers, json=data)
-            
-            if response.status_code != 200:
-                return f"Error: Failed to fetch website content. Status code: {response.status_code}"
-            
-            elements = partition_html(text=response.text)
-            content = "\n\n".join([str(el) for el in elements])
-            # print(content)
-            content = [content[i:i + 8000] for i in range(0, len(content), 8000)]
-            summaries = []
-            
+    def _get_summarizer(self) -> ChunkSummarizer:
+        # One summarizer (and so one summarizer agent) per tool instance, built on first use
+        if self._summarizer is None:
             #llm = LLM(model="groq/deepseek-r1-distill-llama-70b")
-            llm = LLM(model="gemini/gemini-2.0-flash")
-            
-            for chunk in content:
-                agent = Agent(
-                    role='Principal Researcher',
-                    goal='Do amazing researches and summaries based on the content you are working with',
-                    backstory="You're a Principal Researcher at a big company and you need to do a research about a given topic.",
-                    allow_delegation=False,
-                    llm=llm
-                )
-                task = Task(
-                    description=f"""Analyze and summarize the content below, 
-                    make sure to include the most relevant information in the summary, 
-                    return only the summary nothing else.\n\nCONTENT\n----------\n{chunk}""",
-                    expected_output="A concise summary of the content provided",
-                    agent=agent
-                )
-                # crew = Crew(agents=[agent], tasks=[task], verbose=True)
-                # summary = crew.kickoff()
-                summary = agent.execute_task(task = task)
-                summaries.append(summary)
-            return "\n\n".join(summaries)
+            llm = self.llm or LLM(model="gemini/gemini-2.0-flash")
+            self._summarizer = ChunkSummarizer(llm=llm, max_concurrency=self.max_concurrency,
+                                               reduce=self.reduce_summaries, cache=get_page_cache())
+        return self._summarizer
+
+    def _request(self, website: str):
+        url = f"https://production-sfo.browserless.io/content?token={os.getenv('BROWSERLESS_API_KEY')}"
+        headers = {"Cache-Control": "no-cache","Content-Type": "application/json"}
+        data = {"url": website, "rejectResourceTypes": ["image"],"rejectRequestPattern": ["/^.*\\.(css)"]}
+        return url, headers, data
+
+    def _select(self, chunks, focus: Optional[str]):
+        """Without a focus every chunk is summarized as it arrives; with one, only the relevant ones.
+
+        Ranking needs the whole page (it is the BM25 corpus), so focused pages are
+        extracted in full first. That is only text, and far fewer LLM calls follow.
+        """
+        if not focus or not focus.strip():
+            return chunks
+        return select_chunks(list(chunks), focus, self.focus_top_k, self.focus_min_score)
+
+    def _summarize_html(self, html: str, focus: Optional[str] = None) -> str:
+        # Parsed in pieces, so the first chunks are summarized while the rest is still parsed
+        return self._get_summarizer().summarize(self._select(iter_chunks(split_text(html)), focus))
+
+    def _capture(self, pieces, cache_pieces: list):
+        """Pass the body through, keeping a copy of it for the page cache."""
+        for piece in pieces:
+            cache_pieces.append(piece)
+            yield piece
+
+    @reports_progress
+    @traced_tool
+    @fits_budget
+    def _run(self, website: str, focus: Optional[str] = None) -> str:
+        try:
+            cache = get_page_cache()
+            html = cache.get_html(website) if cache is not None else None
+            if html is not None:
+                return self._summarize_html(html, focus)
+
+            url, headers, data = self._request(website)
+            # Streamed: the page is parsed and its chunks summarized while it downloads
+            with get_session().post(url, headers=headers, json=data, timeout=TIMEOUT, stream=True) as response:
+                if response.status_code != 200:
+                    return f"Error: Failed to fetch website content. Status code: {response.status_code}"
+
+                cache_pieces = []
+                pieces = response.iter_content(chunk_size=READ_SIZE)
+                if cache is not None:
+                    pieces = self._capture(pieces, cache_pieces)
+                encoding = charset(response.headers.get("Content-Type"))
+                chunks = self._select(iter_chunks(pieces, encoding=encoding), focus)
+                summary = self._get_summarizer().summarize(chunks)
+            if cache is not None:
+                cache.put_html(website, b"".join(cache_pieces).decode(encoding, errors="replace"))
+            return summary
         except Exception as e:
             return f"Error while processing website: {str(e)}"
 
-    async def _arun(self, website: str) -> str:
-        raise NotImplementedError("Async not implemented")
+    @reports_progress
+    @traced_tool
+    @fits_budget
+    async def _arun(self, website: str, focus: Optional[str] = None) -> str:
+        try:
+            cache = get_page_cache()
+            html = await asyncio.to_thread(cache.get_html, website) if cache is not None else None
+            if html is not None:
+                # Parsing and summarization block, so keep them off the event loop
+                return await asyncio.to_thread(self._summarize_html, html, focus)
+
+            url, headers, data = self._request(website)
+            async with get_async_client().stream("POST", url, headers=headers, json=data) as response:
+                if response.status_code != 200:
+                    return f"Error: Failed to fetch website content. Status code: {response.status_code}"
+
+                # The body is parsed on the event loop as it arrives; the summarizer
+                # thread picks up every chunk as soon as it is complete
+                encoding = charset(response.headers.get("Content-Type"))
+                chunker = HtmlChunker(encoding=encoding)
+                chunks = queue.Queue()
+                summary = asyncio.ensure_future(asyncio.to_thread(
+                    lambda: self._get_summarizer().summarize(self._select(iter(chunks.get, None), focus))))
+                cache_pieces = []
+                try:
+                    async for piece in response.aiter_bytes(READ_SIZE):
+                        if cache is not None:
+                            cache_pieces.append(piece)
+                        for chunk in chunker.feed(piece):
+                            chunks.put(chunk)
+                        if chunker.truncated:
+                            break
+                    for chunk in chunker.close():
+                        chunks.put(chunk)
+                finally:
+                    chunks.put(None)
+            if cache is not None:
+                html = b"".join(cache_pieces).decode(encoding, errors="replace")
+                await asyncio.to_thread(cache.put_html, website, html)
+            return await summary
+        except Exception as e:
+            return f"Error while processing website: {str(e)}"
 
 if __name__ == "__main__":
     # Example usage
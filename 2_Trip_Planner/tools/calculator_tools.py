@@ -1,25 +1,55 @@
+import json
+from typing import Dict, List, Optional, Union
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
+from tools.expression import evaluate, evaluate_batch, ExpressionError
+from tools.progress import reports_progress
+from tools.token_budget import fits_budget
+from tools.tracing import traced_tool
 
 class CalculationInput(BaseModel):
-    operation: str = Field(..., description="The mathematical expression to evaluate")
+    operation: Optional[str] = Field(None, description="The mathematical expression to evaluate")
+    expressions: Optional[Union[Dict[str, str], List[str]]] = Field(
+        None,
+        description="Several expressions evaluated in one call: a list, or a table of "
+                    "{label: expression} where a row may use earlier rows by label, "
+                    "e.g. {'hotel': '5 * 80', 'food': '5 * 30', 'total': 'hotel + food + 10%'}")
 
 class CalculatorTools(BaseTool):
     name: str = "Make a calculation"
     description: str = """Useful to perform any mathematical calculations, 
-    like sum, minus, multiplication, division, etc.
-    The input should be a mathematical expression, e.g. '200*7' or '5000/2*10'"""
+    like sum, minus, multiplication, division, percentages, etc.
+    The input should be a mathematical expression, e.g. '200*7', '5000/2*10', '$1,200 + 15%' or '10% of 850'.
+    To compute a whole budget at once, pass a table of labelled expressions in 'expressions' instead."""
     args_schema: type[BaseModel] = CalculationInput
 
-    def _run(self, operation: str) -> float:
-        return eval(operation)
+    def _calculate(self, operation: str = None, expressions=None):
+        # Expressions are checked against a whitelist and never passed to eval() as-is
+        if expressions:
+            return json.dumps(evaluate_batch(expressions))
+        if not operation:
+            return "Error: provide an 'operation' or a list/table of 'expressions'"
+        try:
+            return evaluate(operation)
+        except ExpressionError as e:
+            return f"Error: {e}"
+
+    @reports_progress
+    @traced_tool
+    @fits_budget
+    def _run(self, operation: str = None, expressions=None):
+        return self._calculate(operation, expressions)
     
-    async def _arun(self, operation: str) -> float:
-        raise NotImplementedError("Async not implemented")
+    @reports_progress
+    @traced_tool
+    @fits_budget
+    async def _arun(self, operation: str = None, expressions=None):
+        # Cheap CPU work on cached, compiled expressions: no need to leave the event loop
+        return self._calculate(operation, expressions)
 
 if __name__ == "__main__":
     # Example usage
     calculator_tool = CalculatorTools()
     query = "200*7"
     result = calculator_tool._run(query)
-    print(result)
\ No newline at end of file
+    print(result)
@@ -0,0 +1,72 @@
+import math
+import os
+import re
+from collections import Counter
+
+# Local relevance ranking of page chunks for BrowserTools' focus query.
+# Chunks are scored with BM25 against the focus, using the page's own chunks as the
+# corpus; only the best ones are sent to the LLM summarizer.
+FOCUS_TOP_K = int(os.getenv("BROWSER_FOCUS_TOP_K", "3"))
+# Chunks scoring below this fraction of the best chunk's score are dropped even within the top k
+FOCUS_MIN_SCORE = float(os.getenv("BROWSER_FOCUS_MIN_SCORE", "0.3"))
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "about", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "has", "have",
+    "how", "i", "in", "into", "is", "it", "its", "me", "my", "of", "on", "or", "our", "so", "that", "the",
+    "their", "there", "this", "to", "was", "we", "what", "when", "where", "which", "who", "will", "with", "you",
+    "your",
+}
+
+
+def tokenize(text: str) -> list:
+    """Lowercased words without stopwords; plurals fold into the singular ('beaches' -> 'beach')."""
+    tokens = []
+    for word in re.findall(r"\w+", text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("es") and word[-3] in "sxzh":
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def bm25_scores(chunks: list, query: str, k1: float = BM25_K1, b: float = BM25_B) -> list:
+    """BM25 score of every chunk for the query, the chunks themselves being the corpus."""
+    terms = set(tokenize(query))
+    documents = [Counter(tokenize(chunk)) for chunk in chunks]
+    if not terms or not documents:
+        return [0.0] * len(chunks)
+    average = sum(sum(document.values()) for document in documents) / len(documents) or 1.0
+    frequency = {term: sum(1 for document in documents if term in document) for term in terms}
+    scores = []
+    for document in documents:
+        length = sum(document.values())
+        score = 0.0
+        for term in terms:
+            count = document.get(term, 0)
+            if not count:
+                continue
+            idf = math.log(1 + (len(documents) - frequency[term] + 0.5) / (frequency[term] + 0.5))
+            score += idf * count * (k1 + 1) / (count + k1 * (1 - b + b * length / average))
+        scores.append(score)
+    return scores
+
+
+def select_chunks(chunks: list, query: str, top_k: int = FOCUS_TOP_K, min_score: float = FOCUS_MIN_SCORE) -> list:
+    """The top_k chunks most relevant to query, in page order.
+
+    Chunks scoring below min_score times the best score are left out. When no chunk
+    matches the query at all, the first chunk (usually the page's introduction) is kept.
+    """
+    if len(chunks) <= 1:
+        return list(chunks)
+    scores = bm25_scores(chunks, query)
+    best = max(scores)
+    if best <= 0:
+        return chunks[:1]
+    ranked = sorted(range(len(chunks)), key=lambda i: scores[i], reverse=True)[:max(1, top_k)]
+    return [chunks[i] for i in sorted(ranked) if scores[i] >= best * min_score]
@@ -0,0 +1,218 @@
+import ast
+import functools
+import math
+import re
+
+# Safe arithmetic for CalculatorTools. Expressions come from the LLM, so they are parsed
+# and checked against a whitelist of AST nodes instead of being passed to eval().
+MAX_EXPRESSION_LENGTH = 1000
+# Largest integer power computed, in bits (about 3000 digits), so 9**9**9 cannot hang a worker.
+# The result is bounded, not the syntax: every ** goes through _power.
+MAX_POWER_BITS = 10000
+# Parsed and checked expressions kept, by their text
+CACHE_SIZE = 1024
+
+CURRENCY_SYMBOLS = "$€£¥₹฿₩₫"
+CURRENCY_CODES = ("USD", "EUR", "GBP", "INR", "THB", "JPY", "AUD", "CAD", "SGD", "IDR", "CHF", "CNY", "AED")
+
+FUNCTIONS = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "sqrt": math.sqrt,
+    "ceil": math.ceil,
+    "floor": math.floor,
+}
+
+_BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_UNARY_OPERATORS = (ast.UAdd, ast.USub)
+_PERCENT = "__percent__"
+_POWER = "__power__"
+
+
+class ExpressionError(ValueError):
+    """The expression is not valid arithmetic, or uses something that is not allowed."""
+
+
+def normalize(expression: str) -> str:
+    """Rewrite the notations the LLM likes to use into Python arithmetic.
+
+    '$1,200.50' -> '1200.50', '3 x 40' -> '3 * 40', '2^3' -> '2**3',
+    '15% of 200' -> '__percent__(15) * 200', '200 + 15%' -> '200 + __percent__(15)'.
+    """
+    text = expression.strip()
+    text = re.sub(rf"\b(?:{'|'.join(CURRENCY_CODES)})\b", "", text, flags=re.IGNORECASE)
+    text = re.sub(f"[{CURRENCY_SYMBOLS}]", "", text)
+    text = _strip_thousands(text)
+    text = text.replace("×", "*").replace("÷", "/").replace("^", "**")
+    text = re.sub(r"(?<=[\d)\s])[xX](?=[\s\d(])", "*", text)
+    text = re.sub(r"(\d+(?:\.\d+)?)\s*%\s*of\b", rf"{_PERCENT}(\1) *", text, flags=re.IGNORECASE)
+    text = re.sub(r"(\d+(?:\.\d+)?)\s*%", rf"{_PERCENT}(\1)", text)
+    return text.strip()
+
+
+# 1,200,000 and 1,200.50, but not the 1,2 of 1,2345
+_GROUPED_NUMBER = re.compile(r"(?<![\d.,])\d{1,3}(?:,\d{3})+(?![\d,])")
+
+
+def _strip_thousands(text: str) -> str:
+    """Remove thousands separators: 1,200,000.50 -> 1200000.50.
+
+    Inside the parentheses of a function call commas separate arguments, so min(100,250)
+    is left alone.
+    """
+    calls, in_call, previous = [], [], ""
+    for char in text:
+        if char == "(":
+            calls.append(previous.isalnum() or previous == "_")
+        elif char == ")" and calls:
+            calls.pop()
+        in_call.append(any(calls))
+        if not char.isspace():
+            previous = char
+    return _GROUPED_NUMBER.sub(
+        lambda match: match.group(0) if in_call[match.start()] else match.group(0).replace(",", ""), text)
+
+
+class _Validator(ast.NodeVisitor):
+    """Reject every node that is not plain arithmetic on numbers and whitelisted functions."""
+
+    def generic_visit(self, node):
+        raise ExpressionError(f"'{type(node).__name__}' is not allowed in a calculation")
+
+    def visit_Expression(self, node):
+        self.visit(node.body)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ExpressionError(f"Only numbers are allowed, got {node.value!r}")
+
+    def visit_Name(self, node):
+        # Variables: results of earlier expressions of the same batch
+        if not isinstance(node.ctx, ast.Load):
+            raise ExpressionError("Assignments are not allowed")
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, _BINARY_OPERATORS):
+            raise ExpressionError(f"Operator '{type(node.op).__name__}' is not allowed")
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, _UNARY_OPERATORS):
+            raise ExpressionError(f"Operator '{type(node.op).__name__}' is not allowed")
+        self.visit(node.operand)
+
+    def visit_Call(self, node):
+        name = node.func.id if isinstance(node.func, ast.Name) else None
+        if name not in FUNCTIONS and name != _PERCENT or node.keywords:
+            raise ExpressionError(f"Function '{name or ast.unparse(node.func)}' is not allowed")
+        for arg in node.args:
+            self.visit(arg)
+
+
+class _PercentRewriter(ast.NodeTransformer):
+    """'a + 15%' means a increased by 15%; any other percentage is a fraction."""
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if (isinstance(node.op, (ast.Add, ast.Sub)) and isinstance(node.right, ast.Call)
+                and isinstance(node.right.func, ast.Name) and node.right.func.id == _PERCENT):
+            # a +/- p% -> a * (1 +/- p/100)
+            factor = ast.BinOp(ast.Constant(1), node.op, node.right)
+            return ast.BinOp(node.left, ast.Mult(), factor)
+        return node
+
+
+class _PowerRewriter(ast.NodeTransformer):
+    """a ** b -> __power__(a, b), which refuses results too large to compute."""
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            return ast.Call(ast.Name(_POWER, ast.Load()), [node.left, node.right], [])
+        return node
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(expression: str):
+    """Parse, check and compile an expression; cached by its text."""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expressions are limited to {MAX_EXPRESSION_LENGTH} characters")
+    text = normalize(expression)
+    if not text:
+        raise ExpressionError("Empty expression")
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression '{expression}': {e.msg}") from None
+    _Validator().visit(tree)
+    tree = ast.fix_missing_locations(_PowerRewriter().visit(_PercentRewriter().visit(tree)))
+    # Only whitelisted nodes are left, so eval() without builtins is safe
+    return compile(tree, "<calculation>", "eval")
+
+
+def _percent(value):
+    return value / 100
+
+
+def _power(base, exponent):
+    # Integer powers grow without limit; check the size of the result before computing it.
+    # Float powers overflow to an OverflowError on their own.
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+        if abs(base).bit_length() * exponent > MAX_POWER_BITS:
+            raise ExpressionError(f"Powers are limited to results of {MAX_POWER_BITS} bits")
+    return base ** exponent
+
+
+def evaluate(expression: str, variables: dict = None):
+    """Evaluate one expression; variables may hold earlier results by name."""
+    code = compile_expression(expression)
+    names = dict(FUNCTIONS, **{_PERCENT: _percent, _POWER: _power}, **(variables or {}))
+    try:
+        value = eval(code, {"__builtins__": {}}, names)
+    except NameError as e:
+        raise ExpressionError(str(e)) from None
+    except (ArithmeticError, TypeError, ValueError) as e:
+        raise ExpressionError(f"Cannot evaluate '{expression}': {e}") from None
+    if isinstance(value, float):
+        # Hide float noise: 200 * 1.15 is 230, not 229.99999999999997
+        value = round(value, 10)
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def _variable_name(label: str) -> str:
+    """'Hotel (5 nights)' -> 'hotel_5_nights', so later rows can refer to earlier ones."""
+    name = re.sub(r"\W+", "_", label.strip().lower()).strip("_")
+    return f"_{name}" if name[:1].isdigit() else name
+
+
+def evaluate_batch(expressions) -> dict:
+    """Evaluate a list of expressions, or a {label: expression} table, in order.
+
+    In a table, a row can use the value of an earlier row by its label in snake_case,
+    e.g. {"hotel": "5 * 80", "food": "5 * 30", "total": "hotel + food + 10%"}.
+    Errors are reported per row. A list also gets the total of the rows that evaluated;
+    a table does not, since its rows may already add each other up.
+    """
+    table = isinstance(expressions, dict)
+    rows = expressions.items() if table else ((None, e) for e in expressions)
+    variables, results, total = {}, [], 0
+    for label, expression in rows:
+        row = {"label": label, "expression": expression} if label is not None else {"expression": expression}
+        try:
+            value = evaluate(str(expression), variables)
+        except ExpressionError as e:
+            row["error"] = str(e)
+        else:
+            row["value"] = value
+            total += value
+            if label is not None:
+                variables[_variable_name(label)] = value
+        results.append(row)
+    batch = {"results": results, "errors": sum("error" in row for row in results)}
+    if not table:
+        batch["total"] = round(total, 10)
+    return batch
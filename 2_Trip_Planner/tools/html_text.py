@@ -0,0 +1,169 @@
+import codecs
+import os
+import re
+from html.parser import HTMLParser
+
+# Streaming HTML-to-text extraction for BrowserTools.
+# The page is parsed as it downloads: boilerplate elements are skipped while parsing,
+# text is collected paragraph by paragraph, and chunks are handed out as soon as they
+# are full, so the first chunk can be summarized while the rest of the page arrives.
+# Only one chunk of text is held at a time, never the whole page.
+PAGE_MAX_BYTES = int(os.getenv("BROWSER_PAGE_MAX_BYTES", str(2 * 1024 * 1024)))
+CHUNK_CHARS = int(os.getenv("BROWSER_CHUNK_CHARS", "8000"))
+# Size of the pieces the response body is read and parsed in
+READ_SIZE = 64 * 1024
+
+# Elements whose whole subtree is dropped
+SKIPPED_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object",
+    "nav", "footer", "header", "aside", "form", "button", "select", "dialog",
+}
+SKIPPED_ROLES = {"navigation", "banner", "contentinfo", "complementary", "menu", "menubar", "dialog", "search"}
+# Elements that end a paragraph
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd", "table", "tr",
+    "blockquote", "pre", "figure", "figcaption", "address", "br", "hr", "h1", "h2", "h3", "h4", "h5", "h6",
+}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class HtmlChunker(HTMLParser):
+    """Incremental HTML parser turning a page into text chunks of about chunk_chars.
+
+    feed() takes the next piece of the page (bytes or str) and returns the chunks it
+    completed; close() returns the rest. Chunks break before headings when the current
+    chunk is at least half full, otherwise between paragraphs, and only inside a
+    paragraph that is longer than a chunk on its own. Once max_bytes of HTML have been
+    fed (characters, for str pieces), the rest of the page is ignored and `truncated` is set.
+    """
+
+    def __init__(self, chunk_chars: int = CHUNK_CHARS, max_bytes: int = PAGE_MAX_BYTES, encoding: str = "utf-8"):
+        super().__init__(convert_charrefs=True)
+        self.chunk_chars = chunk_chars
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.truncated = False
+        self._decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        # Open skipped elements, innermost last; text is dropped while it is not empty
+        self._skipping = []
+        self._text = []
+        self._chunk = []
+        self._chunk_size = 0
+        self._ready = []
+        # Paragraphs already emitted, to drop repeated boilerplate like "Read more"
+        self._seen = set()
+
+    # --- parser callbacks -------------------------------------------------------------
+
+    def handle_starttag(self, tag, attrs):
+        if self._skipping:
+            if tag not in VOID_TAGS:
+                self._skipping.append(tag)
+            return
+        attributes = dict(attrs)
+        if (tag in SKIPPED_TAGS or attributes.get("role") in SKIPPED_ROLES
+                or "hidden" in attributes or attributes.get("aria-hidden") == "true"):
+            if tag not in VOID_TAGS:
+                self._skipping.append(tag)
+            return
+        if tag in BLOCK_TAGS:
+            self._end_paragraph(heading=tag in HEADING_TAGS)
+
+    def handle_endtag(self, tag):
+        if self._skipping:
+            # Unclosed children of the skipped element are closed with it
+            if tag in self._skipping:
+                while self._skipping.pop() != tag:
+                    pass
+            return
+        if tag in BLOCK_TAGS:
+            self._end_paragraph()
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self._text.append(data)
+
+    # --- chunking ---------------------------------------------------------------------
+
+    def _end_paragraph(self, heading: bool = False):
+        if heading and self._chunk_size >= self.chunk_chars // 2:
+            self._emit()
+        if not self._text:
+            return
+        paragraph = " ".join("".join(self._text).split())
+        self._text = []
+        if not paragraph or (len(paragraph) < 200 and paragraph in self._seen):
+            return
+        if len(paragraph) < 200:
+            self._seen.add(paragraph)
+        while len(paragraph) > self.chunk_chars:
+            # A paragraph longer than a chunk is split after its last sentence that fits
+            cut = paragraph.rfind(". ", 0, self.chunk_chars) + 1 or self.chunk_chars
+            self._add(paragraph[:cut].strip())
+            self._emit()
+            paragraph = paragraph[cut:].strip()
+        self._add(paragraph)
+
+    def _add(self, paragraph: str):
+        if self._chunk_size + len(paragraph) > self.chunk_chars:
+            self._emit()
+        self._chunk.append(paragraph)
+        self._chunk_size += len(paragraph) + 2
+
+    def _emit(self):
+        if self._chunk:
+            self._ready.append("\n\n".join(self._chunk))
+        self._chunk = []
+        self._chunk_size = 0
+
+    def _take(self) -> list:
+        ready, self._ready = self._ready, []
+        return ready
+
+    # --- input ------------------------------------------------------------------------
+
+    def feed(self, data) -> list:
+        if self.truncated:
+            return []
+        size = len(data)
+        if self.bytes_read + size > self.max_bytes:
+            data = data[:self.max_bytes - self.bytes_read]
+            self.truncated = True
+        self.bytes_read += len(data)
+        if isinstance(data, bytes):
+            data = self._decoder.decode(data)
+        super().feed(data)
+        return self._take()
+
+    def close(self) -> list:
+        if not self.truncated:
+            super().feed(self._decoder.decode(b"", final=True))
+        super().close()
+        self._end_paragraph()
+        self._emit()
+        return self._take()
+
+
+def iter_chunks(pieces, chunk_chars: int = CHUNK_CHARS, max_bytes: int = PAGE_MAX_BYTES, encoding: str = "utf-8"):
+    """Yield the text chunks of a page given as an iterable of bytes or str pieces."""
+    chunker = HtmlChunker(chunk_chars=chunk_chars, max_bytes=max_bytes, encoding=encoding)
+    for piece in pieces:
+        yield from chunker.feed(piece)
+        if chunker.truncated:
+            break
+    yield from chunker.close()
+
+
+def split_text(text: str, size: int = READ_SIZE):
+    """Pieces of an already downloaded page, so it is parsed the same way as a stream."""
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+
+def charset(content_type: str) -> str:
+    """Encoding named in a Content-Type header, if any."""
+    match = re.search(r"charset=[\"']?([\w-]+)", content_type or "", re.IGNORECASE)
+    try:
+        return codecs.lookup(match.group(1)).name if match else "utf-8"
+    except LookupError:
+        return "utf-8"
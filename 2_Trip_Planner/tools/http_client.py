@@ -0,0 +1,142 @@
+import asyncio
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from tools.tracing import is_enabled, record_span
+
+# Connection pooling for the tools' HTTP calls (Serper, browserless).
+# Every process keeps one requests.Session for sync calls and one httpx.AsyncClient
+# for async calls, so TCP+TLS connections are kept alive and reused between tool calls.
+POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))   # distinct hosts kept pooled
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))           # connections kept alive per host
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")) # seconds an idle connection is kept
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "120"))        # browserless can take a while on big pages
+
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+# Requests per second allowed to a rate-limited API (e.g. Serper), and the burst on top
+RATE_LIMIT = float(os.getenv("HTTP_RATE_LIMIT", "5"))
+RATE_LIMIT_BURST = int(os.getenv("HTTP_RATE_LIMIT_BURST", "5"))
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_async_client = None
+_async_client_loop = None
+_rate_limiters = {}
+
+
+class RateLimiter:
+    """Token bucket shared by the sync and async callers of one API in this process."""
+
+    def __init__(self, rate: float = RATE_LIMIT, burst: int = RATE_LIMIT_BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token; return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is the queue of callers already waiting
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """Return the process-wide rate limiter for the API called name."""
+    with _lock:
+        if name not in _rate_limiters:
+            _rate_limiters[name] = RateLimiter()
+        return _rate_limiters[name]
+
+
+def _trace_response(response, *args, **kwargs):
+    # requests response hook; elapsed is the time until the response headers arrived
+    if is_enabled():
+        # Reading .content of a streamed response would download it all before the caller reads it
+        size = int(response.headers.get("content-length", 0)) if kwargs.get("stream") else len(response.content)
+        record_span("http.request", response.elapsed.total_seconds(), method=response.request.method,
+                    host=urlsplit(response.url).hostname, status=response.status_code,
+                    request_bytes=len(response.request.body or b""), response_bytes=size)
+
+
+async def _mark_request_start(request):
+    request.extensions["trace_start"] = time.perf_counter()
+
+
+async def _trace_async_response(response):
+    # httpx response hook, called once the headers arrived
+    start = response.request.extensions.get("trace_start")
+    if is_enabled() and start is not None:
+        record_span("http.request", time.perf_counter() - start, method=response.request.method,
+                    host=response.request.url.host, status=response.status_code,
+                    request_bytes=len(response.request.content or b""),
+                    response_bytes=int(response.headers.get("content-length", 0)))
+
+
+def get_session() -> requests.Session:
+    """Return the pooled requests.Session of this process."""
+    global _session, _session_pid
+    with _lock:
+        # A session inherited through fork() would share sockets with the parent
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.hooks["response"].append(_trace_response)
+            _session = session
+            _session_pid = os.getpid()
+        return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the pooled httpx.AsyncClient for the running event loop.
+
+    Under uvicorn there is one loop per worker process, so this is one client per process.
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    with _lock:
+        # httpx connections are bound to the loop that opened them
+        if _async_client is None or _async_client_loop is not loop or _async_client.is_closed:
+            _async_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=POOL_CONNECTIONS * POOL_MAXSIZE,
+                    max_keepalive_connections=POOL_MAXSIZE,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                event_hooks={"request": [_mark_request_start], "response": [_trace_async_response]},
+            )
+            _async_client_loop = loop
+        return _async_client
+
+
+async def aclose_async_client():
+    """Close the async client, e.g. on application shutdown."""
+    global _async_client, _async_client_loop
+    client = _async_client
+    _async_client = None
+    _async_client_loop = None
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Disk-backed cache shared by every process on the machine (API workers, CLI, Streamlit).
+# Two layers live in one SQLite table:
+#   html    - raw browserless responses keyed by URL, expire after CACHE_HTML_TTL seconds
+#   summary - chunk summaries keyed by sha256(chunk) and the summarizer model, never expire
+# Both layers share one size budget and are evicted least recently used first.
+CACHE_PATH = os.getenv(
+    "PAGE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "pages.db")
+)
+CACHE_HTML_TTL = int(os.getenv("PAGE_CACHE_HTML_TTL", str(6 * 60 * 60)))
+CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_MB", "256")) * 1024 * 1024
+CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+LAYERS = ("html", "summary")
+
+
+class PageCache:
+    def __init__(self, path: str = CACHE_PATH, html_ttl: int = CACHE_HTML_TTL, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.html_ttl = html_ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                layer TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            conn.execute("""CREATE TABLE IF NOT EXISTS stats (
+                layer TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0)""")
+            conn.executemany("INSERT OR IGNORE INTO stats (layer) VALUES (?)", [(layer,) for layer in LAYERS])
+
+    def _connect(self) -> sqlite3.Connection:
+        # SQLite connections must not be shared between threads, so keep one per thread.
+        # WAL lets readers in other processes carry on while one process writes.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def summary_key(content: str, model: str) -> str:
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return f"summary:{model}:{digest}"
+
+    @staticmethod
+    def html_key(url: str) -> str:
+        return f"html:{url}"
+
+    def _get(self, key: str, layer: str, ttl: int = None):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and ttl is not None and now - row[1] > ttl:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                conn.execute("UPDATE stats SET misses = misses + 1 WHERE layer = ?", (layer,))
+                return None
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            conn.execute("UPDATE stats SET hits = hits + 1 WHERE layer = ?", (layer,))
+            return row[0]
+
+    def _put(self, key: str, layer: str, value: str):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, layer, value, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, layer, value, size, now, now)
+            )
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its size budget."""
+        conn = self._connect()
+        with conn:
+            # BEGIN IMMEDIATE takes the write lock up front, so two processes never evict at once
+            conn.execute("BEGIN IMMEDIATE")
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            # Evict down to 90% of the budget so every put does not trigger another eviction
+            excess = total - int(self.max_bytes * 0.9)
+            freed = 0
+            doomed = []
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                doomed.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def get_html(self, url: str):
+        return self._get(self.html_key(url), "html", ttl=self.html_ttl)
+
+    def put_html(self, url: str, html: str):
+        self._put(self.html_key(url), "html", html)
+
+    def get_summary(self, content: str, model: str):
+        return self._get(self.summary_key(content, model), "summary")
+
+    def put_summary(self, content: str, model: str, summary: str):
+        self._put(self.summary_key(content, model), "summary", summary)
+
+    def stats(self) -> dict:
+        """Hit/miss counters per layer, shared by every process using this cache file."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT layer, hits, misses FROM stats").fetchall()
+            size, entries = conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries").fetchone()
+        stats = {"size_bytes": size, "entries": entries}
+        for layer, hits, misses in rows:
+            total = hits + misses
+            stats[layer] = {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+        return stats
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("UPDATE stats SET hits = 0, misses = 0")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    """Return the process-wide page cache, or None when caching is disabled."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache()
+        return _cache
@@ -0,0 +1,99 @@
+import asyncio
+import contextvars
+import functools
+import json
+import queue
+import threading
+import time
+
+# Progress events of a running crew (tool calls, task outputs, final itinerary).
+# The emitter of the current request lives in a context variable, so the shared tool
+# instances can report progress without knowing which request they are serving.
+_current_emitter = contextvars.ContextVar("progress_emitter", default=None)
+
+
+class ProgressEmitter:
+    """Thread-safe queue of progress events for one crew run.
+
+    Events are also forwarded to the emitters of requests following the run (coalesced
+    onto it). Without buffer, events are only forwarded: nobody reads this queue.
+    """
+
+    def __init__(self, buffer: bool = True):
+        self.events = queue.Queue()
+        self.started_at = time.time()
+        self.buffer = buffer
+        self._followers = []
+        self._lock = threading.Lock()
+
+    def add_follower(self, emitter: "ProgressEmitter"):
+        """Forward the events emitted from now on to emitter too."""
+        with self._lock:
+            self._followers.append(emitter)
+
+    def emit(self, event: str, **data):
+        data["elapsed"] = round(time.time() - self.started_at, 2)
+        if self.buffer:
+            self.events.put((event, data))
+        with self._lock:
+            followers = list(self._followers)
+        for follower in followers:
+            follower.events.put((event, dict(data)))
+
+    def task_callback(self, output):
+        """Crew task_callback: called with the TaskOutput of every finished task."""
+        self.emit(
+            "task_completed",
+            task=getattr(output, "name", None) or getattr(output, "description", "")[:80],
+            agent=getattr(output, "agent", None),
+            output=getattr(output, "raw", str(output)),
+        )
+
+
+def set_emitter(emitter: ProgressEmitter):
+    """Install the emitter for the current context; returns a token for reset_emitter."""
+    return _current_emitter.set(emitter)
+
+
+def reset_emitter(token):
+    _current_emitter.reset(token)
+
+
+def emit(event: str, **data):
+    """Report an event to the current request's emitter, if it has one."""
+    emitter = _current_emitter.get()
+    if emitter is not None:
+        emitter.emit(event, **data)
+
+
+def reports_progress(method):
+    """Decorate a tool's _run/_arun so each call emits tool_started and tool_finished."""
+    def started(tool, args, kwargs):
+        emit("tool_started", tool=tool.name, input=kwargs or list(args))
+        return time.perf_counter()
+
+    def finished(tool, start, output):
+        emit("tool_finished", tool=tool.name, duration=round(time.perf_counter() - start, 2),
+             output=str(output)[:500])
+
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            start = started(self, args, kwargs)
+            output = await method(self, *args, **kwargs)
+            finished(self, start, output)
+            return output
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = started(self, args, kwargs)
+        output = method(self, *args, **kwargs)
+        finished(self, start, output)
+        return output
+    return wrapper
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
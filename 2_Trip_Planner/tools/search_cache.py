@@ -0,0 +1,202 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Cache of Serper responses in front of SearchTools.
+# Queries are normalized (case, punctuation, whitespace, stopwords) so 'Weather in Krabi
+# in June' and 'krabi weather june' share an entry. How long an entry stays fresh depends
+# on what the query is about: weather and prices change daily, attractions hardly ever.
+# Entries live in an in-memory LRU, backed by an optional SQLite file shared by every
+# process on the machine (API workers, CLI, Streamlit).
+CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+# SQLite file behind the in-memory LRU; empty to keep the cache in memory only
+CACHE_PATH = os.getenv(
+    "SEARCH_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "searches.db")
+)
+
+# Query classes, first match wins: (name, keywords, TTL in seconds)
+QUERY_CLASSES = (
+    ("weather", {"weather", "forecast", "temperature", "rain", "rainfall", "climate", "monsoon"},
+     int(os.getenv("SEARCH_CACHE_TTL_WEATHER", str(60 * 60)))),
+    ("prices", {"flight", "flights", "airfare", "fare", "fares", "price", "prices", "cost", "costs", "ticket",
+                "tickets", "deal", "deals", "booking", "hotel", "hotels"},
+     int(os.getenv("SEARCH_CACHE_TTL_PRICES", str(6 * 60 * 60)))),
+    ("events", {"event", "events", "festival", "festivals", "concert", "concerts", "today", "tonight", "news",
+                "open", "opening", "hours"},
+     int(os.getenv("SEARCH_CACHE_TTL_EVENTS", str(24 * 60 * 60)))),
+    ("attractions", {"attraction", "attractions", "things", "sights", "sightseeing", "museum", "museums",
+                     "temple", "temples", "beach", "beaches", "hike", "hiking", "trek", "park", "parks",
+                     "history", "culture", "customs", "landmarks", "guide", "itinerary"},
+     int(os.getenv("SEARCH_CACHE_TTL_ATTRACTIONS", str(7 * 24 * 60 * 60)))),
+)
+DEFAULT_CLASS = "general"
+DEFAULT_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(24 * 60 * 60)))
+
+# Direction words (from, to, into) are not stopwords: they tell routes apart
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "how", "i", "in",
+    "is", "it", "me", "my", "near", "of", "on", "or", "our", "the", "there", "we", "what", "when",
+    "where", "which", "who", "with",
+}
+
+
+def normalize_query(query: str) -> str:
+    """'What is the weather in Krabi, Thailand?' -> 'weather krabi thailand'
+
+    Word order and direction words are kept: 'flights from Krabi to Bangalore' and
+    'flights to Krabi from Bangalore' differ.
+    """
+    words = re.findall(r"\w+", query.lower())
+    kept = [word for word in words if word not in STOPWORDS]
+    # A query made only of stopwords still needs a key
+    return " ".join(kept or words)
+
+
+def classify(normalized: str):
+    """Return (class name, TTL) for a normalized query."""
+    words = set(normalized.split())
+    for name, keywords, ttl in QUERY_CLASSES:
+        if words & keywords:
+            return name, ttl
+    return DEFAULT_CLASS, DEFAULT_TTL
+
+
+class SearchCache:
+    def __init__(self, max_size: int = CACHE_SIZE, path: str = CACHE_PATH):
+        self.max_size = max_size
+        self.path = path
+        # normalized query -> (expires, response), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Per query class: memory hits, disk hits and misses
+        self._stats = {}
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("""CREATE TABLE IF NOT EXISTS searches (
+                    key TEXT PRIMARY KEY,
+                    class TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires REAL NOT NULL)""")
+                conn.execute("CREATE INDEX IF NOT EXISTS searches_expires ON searches (expires)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread, WAL so other processes can read while one writes (as in PageCache)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, query_class: str, outcome: str):
+        with self._lock:
+            counts = self._stats.setdefault(query_class, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+            counts[outcome] += 1
+
+    def _remember(self, key: str, expires: float, response: dict):
+        with self._lock:
+            self._entries[key] = (expires, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, query: str):
+        """Return the cached response for query, or None."""
+        key = normalize_query(query)
+        query_class, _ = classify(key)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            self._count(query_class, "memory_hits")
+            return entry[1]
+
+        if self.path:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value, expires FROM searches WHERE key = ? AND expires >= ?",
+                                   (key, now)).fetchone()
+            if row is not None:
+                response = json.loads(row[0])
+                self._remember(key, row[1], response)
+                self._count(query_class, "disk_hits")
+                return response
+        self._count(query_class, "misses")
+        return None
+
+    def put(self, query: str, response: dict):
+        key = normalize_query(query)
+        query_class, ttl = classify(key)
+        expires = time.time() + ttl
+        self._remember(key, expires, response)
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO searches (key, class, value, expires) VALUES (?, ?, ?, ?)",
+                             (key, query_class, json.dumps(response), expires))
+                conn.execute("DELETE FROM searches WHERE expires < ?", (time.time(),))
+
+    def stats(self) -> dict:
+        """Hit rates per query class, for this process."""
+        with self._lock:
+            classes = {name: dict(counts) for name, counts in self._stats.items()}
+            entries = len(self._entries)
+        totals = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        for counts in classes.values():
+            for outcome, value in counts.items():
+                totals[outcome] += value
+            lookups = sum(counts.values())
+            counts["hit_rate"] = (counts["memory_hits"] + counts["disk_hits"]) / lookups if lookups else 0.0
+        lookups = sum(totals.values())
+        return {
+            "entries": entries,
+            **totals,
+            "hit_rate": (totals["memory_hits"] + totals["disk_hits"]) / lookups if lookups else 0.0,
+            "classes": classes,
+        }
+
+    def render_prometheus(self) -> str:
+        """Lookup counters per query class and outcome, in the Prometheus text format."""
+        stats = self.stats()
+        lines = ["# HELP search_cache_lookups_total Search cache lookups by query class and outcome.",
+                 "# TYPE search_cache_lookups_total counter"]
+        for name, counts in sorted(stats["classes"].items()):
+            for outcome in ("memory_hits", "disk_hits", "misses"):
+                lines.append(f'search_cache_lookups_total{{class="{name}",outcome="{outcome}"}} {counts[outcome]}')
+        lines += ["# TYPE search_cache_entries gauge", f"search_cache_entries {stats['entries']}"]
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM searches")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """Return the process-wide search cache, or None when it is disabled."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache()
+        return _cache
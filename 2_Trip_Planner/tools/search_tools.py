@@ -1,63 +1,208 @@
+import asyncio
+import contextvars
 import json
-import requests
-import streamlit as st
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Union
+from urllib.parse import urlsplit
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
+from tools.http_client import get_session, get_async_client, get_rate_limiter, TIMEOUT
+from tools.progress import reports_progress
+from tools.search_cache import get_search_cache, normalize_query
+from tools.token_budget import fits_budget
+from tools.tracing import traced_tool
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
+# Results kept per query, and the most queries one tool call may batch
+SEARCH_TOP_RESULTS = int(os.getenv("SEARCH_TOP_RESULTS", "4"))
+SEARCH_MAX_QUERIES = int(os.getenv("SEARCH_MAX_QUERIES", "5"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide pool running the queries of batched searches."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_QUERIES * 2, thread_name_prefix="search")
+        return _executor
+
+
+def normalize_link(link: str) -> str:
+    """Key used to spot the same page in the results of different queries."""
+    parts = urlsplit(link.strip())
+    return f"{parts.netloc.lower().removeprefix('www.')}{parts.path.rstrip('/')}?{parts.query}"
+
+
 class SearchQuery(BaseModel):
-    query: str = Field(
-        ..., description="The search query to look up"
+    query: Union[str, List[str]] = Field(
+        ..., description="The search query to look up, or a list of related queries "
+                         f"(up to {SEARCH_MAX_QUERIES}) to run together, e.g. flights, weather and hotels for one city"
     )
 
 class SearchTools(BaseTool):
     name: str = "Search the internet"
-    description: str = "Useful to search the internet about a given topic and return relevant results. Input should be a string. Example: 'Best vegetarian restaurants near Austin, Texas'."
+    description: str = ("Useful to search the internet about a given topic and return relevant results. "
+                        "Input should be a string, or a list of strings to run several related searches in one call. "
+                        "Example: 'Best vegetarian restaurants near Austin, Texas' or "
+                        "['Flights from Bangalore to Krabi in June', 'Krabi weather in June', 'Best hotels in Krabi'].")
     args_schema: type[BaseModel] = SearchQuery
+    top_result_to_return: int = SEARCH_TOP_RESULTS
+
+    def _request(self, query: str):
+        url = "https://google.serper.dev/search"
+        payload = {"q": query}
+        headers = {
+            'X-API-KEY': os.getenv('SERPER_API_KEY'),
+            'content-type': 'application/json'
+        }
+        return url, headers, payload
+
+    def _queries(self, query) -> list:
+        queries = [query] if isinstance(query, str) else list(query)
+        # Drop blanks and repeats (same normalized query), keep the order the agent gave
+        unique = {}
+        for q in queries:
+            if q and q.strip():
+                unique.setdefault(normalize_query(q), q.strip())
+        return list(unique.values())[:SEARCH_MAX_QUERIES]
+
+    def _results(self, data: dict) -> list:
+        """The top organic results of one response, or an error message."""
+        if 'organic' not in data:
+            return "No results found or API error occurred."
+        return [result for result in data['organic'][:self.top_result_to_return]
+                if all(key in result for key in ('title', 'link', 'snippet'))]
+
+    def _format_results(self, data: dict) -> str:
+        results = self._results(data)
+        if isinstance(results, str):
+            return results
+        string = []
+        for result in results:
+            string.append('\n'.join([
+                f"Title: {result['title']}", 
+                f"Link: {result['link']}",
+                f"Snippet: {result['snippet']}", 
+                "\n-----------------"
+            ]))
+        return '\n'.join(string) if string else "No valid results found"
+
+    def _merge_results(self, queries: list, responses: list) -> str:
+        """One compact block for several queries.
+
+        Results are interleaved by rank (the best of every query first), so trimming the
+        block to the token budget drops the weakest results of every query, and a page
+        found by several queries is listed once, under all of them.
+        """
+        ranked, errors = [], []
+        for query, response in zip(queries, responses):
+            results = self._results(response) if isinstance(response, dict) else response
+            if isinstance(results, str):
+                errors.append(f"{query}: {results}")
+                results = []
+            ranked.append((query, results))
+
+        merged = {}
+        for rank in range(self.top_result_to_return):
+            for query, results in ranked:
+                if rank >= len(results):
+                    continue
+                result = results[rank]
+                key = normalize_link(result['link'])
+                if key in merged:
+                    merged[key]["queries"].append(query)
+                else:
+                    merged[key] = {"result": result, "queries": [query]}
+
+        string = []
+        for entry in merged.values():
+            result = entry["result"]
+            string.append('\n'.join([
+                f"Query: {' | '.join(entry['queries'])}",
+                f"Title: {result['title']}",
+                f"Link: {result['link']}",
+                f"Snippet: {result['snippet']}",
+                "\n-----------------"
+            ]))
+        string.extend(f"Error for query {error}" for error in errors)
+        return '\n'.join(string) if string else "No valid results found"
+
+    def _cached(self, query: str):
+        cache = get_search_cache()
+        return cache.get(query) if cache is not None else None
+
+    def _store(self, query: str, data: dict):
+        """Cache successful responses; only the organic results are used."""
+        cache = get_search_cache()
+        if cache is not None and 'organic' in data:
+            cache.put(query, {"organic": data["organic"]})
 
-    def _run(self, query: str) -> str:
+    def _search(self, query: str):
+        """Run one query; returns the JSON response or an error message."""
+        cached = self._cached(query)
+        if cached is not None:
+            return cached
         try:
-            top_result_to_return = 4
-            url = "https://google.serper.dev/search"
-            payload = {"q": query}
-            headers = {
-                'X-API-KEY': os.getenv('SERPER_API_KEY'),
-                'content-type': 'application/json'
-            }
-            response = requests.post(url, headers=headers, json=payload)
+            get_rate_limiter("serper").acquire()
+            url, headers, payload = self._request(query)
+            response = get_session().post(url, headers=headers, json=payload, timeout=TIMEOUT)
 
             if response.status_code != 200:
                 return f"Error: Search API request failed. Status code: {response.status_code}. Response: {response.text}"
-            
+
             data = response.json()
-            if 'organic' not in data:
-                return "No results found or API error occurred."
-            
-            results = data['organic']
-            string = []
-            for result in results[:top_result_to_return]:
-                try:
-                    string.append('\n'.join([
-                        f"Title: {result['title']}", 
-                        f"Link: {result['link']}",
-                        f"Snippet: {result['snippet']}", 
-                        "\n-----------------"
-                    ]))
-                except KeyError:
-                    continue
-            return '\n'.join(string) if string else "No valid results found"
+            self._store(query, data)
+            return data
         except Exception as e:
             return f"Error during search: {str(e)}"
 
-    async def _arun(self, query: str) -> str:
-        raise NotImplementedError("Async not implemented")
+    async def _asearch(self, query: str):
+        cached = self._cached(query)
+        if cached is not None:
+            return cached
+        try:
+            await get_rate_limiter("serper").acquire_async()
+            url, headers, payload = self._request(query)
+            response = await get_async_client().post(url, headers=headers, json=payload)
+
+            if response.status_code != 200:
+                return f"Error: Search API request failed. Status code: {response.status_code}. Response: {response.text}"
+
+            data = response.json()
+            self._store(query, data)
+            return data
+        except Exception as e:
+            return f"Error during search: {str(e)}"
 
+    @reports_progress
+    @traced_tool
+    @fits_budget(separator="-----------------\n")
+    def _run(self, query) -> str:
+        queries = self._queries(query)
+        if not queries:
+            return "Error: empty search query"
+        if len(queries) == 1:
+            response = self._search(queries[0])
+            return self._format_results(response) if isinstance(response, dict) else response
+        # Run the queries concurrently, each in the caller's context (progress, budget, tracing)
+        futures = [get_executor().submit(contextvars.copy_context().run, self._search, q) for q in queries]
+        return self._merge_results(queries, [future.result() for future in futures])
 
-if __name__ == "__main__":
-    # Example usage
-    search_tool = SearchTools()
-    query = "Best vegetarian restauarants near Austin, Texas"
-    result = search_tool._run(query)
-    print(result)
\ No newline at end of file
+    @reports_progress
+    @traced_tool
+    @fits_budget(separator="-----------------\n")
+    async def _arun(self, query) -> str:
+        queries = self._queries(query)
+        if not queries:
+            return "Error: empty search query"
+        if len(queries) == 1:
+            response = await self._asearch(queries[0])
+            return self._format_results(response) if isinstance(response, dict) else response
+        responses = await asyncio.gather(*(self._asearch(q) for q in queries))
+        return self._merge_results(queries, responses)
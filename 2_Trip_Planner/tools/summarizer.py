@@ -0,0 +1,112 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from crewai import Agent, Task, LLM
+
+# Size of the process-wide worker pool shared by every summarizer instance
+MAX_WORKERS = int(os.getenv("SUMMARIZER_MAX_WORKERS", "8"))
+# How many chunks of one page (one summarize() call) may be summarized at the same time;
+# the pool size bounds the whole process
+MAX_CONCURRENCY = int(os.getenv("SUMMARIZER_MAX_CONCURRENCY", "4"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide pool used to summarize chunks."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="summarizer")
+        return _executor
+
+
+class ChunkSummarizer:
+    """Map-reduce summarizer for scraped website content.
+
+    Map: every chunk is summarized concurrently on the shared worker pool,
+    at most `max_concurrency` at a time per page.
+    Reduce (optional): the ordered chunk summaries are merged into one summary.
+    """
+
+    def __init__(self, llm=None, max_concurrency: int = MAX_CONCURRENCY, reduce: bool = False, cache=None):
+        self.llm = llm if llm is not None else LLM(model="gemini/gemini-2.0-flash")
+        self.reduce = reduce
+        # Optional PageCache; summaries are keyed by chunk content and the model name
+        self.cache = cache
+        self.model = getattr(self.llm, "model", str(self.llm))
+        self.max_concurrency = max(1, max_concurrency)
+        # The summarizer agent is built once and reused for every chunk.
+        # Agent.execute_task keeps per-call executor state on the agent, so each
+        # worker thread gets its own copy of the template instead of sharing it.
+        self.agent = Agent(
+            role='Principal Researcher',
+            goal='Do amazing researches and summaries based on the content you are working with',
+            backstory="You're a Principal Researcher at a big company and you need to do a research about a given topic.",
+            allow_delegation=False,
+            llm=self.llm
+        )
+        self._local = threading.local()
+
+    def _worker_agent(self):
+        agent = getattr(self._local, "agent", None)
+        if agent is None:
+            agent = self.agent.copy()
+            self._local.agent = agent
+        return agent
+
+    def summarize_chunk(self, chunk: str) -> str:
+        if self.cache is not None:
+            cached = self.cache.get_summary(chunk, self.model)
+            if cached is not None:
+                return cached
+        summary = self._summarize_chunk(chunk)
+        if self.cache is not None:
+            self.cache.put_summary(chunk, self.model, summary)
+        return summary
+
+    def _summarize_chunk(self, chunk: str) -> str:
+        agent = self._worker_agent()
+        task = Task(
+            description=f"""Analyze and summarize the content below,
+            make sure to include the most relevant information in the summary,
+            return only the summary nothing else.\n\nCONTENT\n----------\n{chunk}""",
+            expected_output="A concise summary of the content provided",
+            agent=agent
+        )
+        return str(agent.execute_task(task=task))
+
+    def merge(self, summaries: list) -> str:
+        agent = self._worker_agent()
+        joined = "\n\n".join(summaries)
+        task = Task(
+            description=f"""Merge the partial summaries below, taken in order from the same website,
+            into a single concise summary. Remove repetition and keep every relevant fact,
+            return only the summary nothing else.\n\nSUMMARIES\n----------\n{joined}""",
+            expected_output="A single concise summary of the website",
+            agent=agent
+        )
+        return str(agent.execute_task(task=task))
+
+    def summarize(self, chunks) -> str:
+        """Summarize the chunks concurrently and return the summaries in chunk order."""
+        executor = get_executor()
+        # Per call: the tool, and this summarizer, are shared by every concurrent request
+        slots = threading.BoundedSemaphore(self.max_concurrency)
+        futures = []
+        for chunk in chunks:
+            # Wait for a free slot before submitting, so a busy tool never parks
+            # shared pool threads that other tools could be using
+            slots.acquire()
+            # Run in a copy of the caller's context, so the chunk's LLM call and progress
+            # events belong to the request (and span) that scraped the page
+            future = executor.submit(contextvars.copy_context().run, self.summarize_chunk, chunk)
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+        # Futures are kept in submission order, so summaries stay in chunk order
+        summaries = [future.result() for future in futures]
+        if self.reduce and len(summaries) > 1:
+            return self.merge(summaries)
+        return "\n\n".join(summaries)
@@ -0,0 +1,13 @@
+import os
+from crew_common import token_budget as _token_budget
+from crew_common.token_budget import (TokenBudget, compress, count_tokens, current_budget, fits_budget,
+                                      reset_budget, run_within_budget, set_budget, truncate)
+
+# This project's token budget settings; the implementation is crew_common/token_budget.py.
+# Token budget of one crew run: long pages are trimmed before they reach the agents.
+TOKEN_BUDGET = int(os.getenv("TOKEN_BUDGET", "60000"))
+# Bounds of what a single tool call may return
+TOOL_OUTPUT_MAX_TOKENS = int(os.getenv("TOOL_OUTPUT_MAX_TOKENS", "4000"))
+TOOL_OUTPUT_MIN_TOKENS = int(os.getenv("TOOL_OUTPUT_MIN_TOKENS", "300"))
+
+_token_budget.configure(TOKEN_BUDGET, TOOL_OUTPUT_MAX_TOKENS, TOOL_OUTPUT_MIN_TOKENS)
@@ -0,0 +1,20 @@
+import os
+from crew_common import tracing as _tracing
+from crew_common.tracing import (DURATION_BUCKETS, OTLP_ENDPOINT, TRACING_ENABLED, Span, instrument_llm, is_enabled,
+                                 record_span, render_metrics, span, step_tracer, traced_tool)
+
+# This project's tracing settings; the implementation is crew_common/tracing.py.
+# JSON-lines file every finished span is appended to; empty to disable
+TRACE_FILE = os.getenv(
+    "TRACE_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "traces.jsonl")
+)
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "trip-planner")
+
+
+def configure(enabled: bool = True, trace_file: str = TRACE_FILE, otlp_endpoint: str = OTLP_ENDPOINT):
+    """Replace the process-wide tracer, e.g. to turn tracing on in a benchmark."""
+    return _tracing.configure(enabled, trace_file, otlp_endpoint, SERVICE_NAME)
+
+
+configure(enabled=TRACING_ENABLED)
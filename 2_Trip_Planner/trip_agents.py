@@ -1,15 +1,14 @@
 
 from crewai import Agent
 import re
-import streamlit as st
-from langchain_core.language_models.chat_models import BaseChatModel
 from crewai import LLM
 from tools.browser_tools import BrowserTools
 from tools.calculator_tools import CalculatorTools
 from tools.search_tools import SearchTools
 
 class TripAgents():
-    def __init__(self, llm: BaseChatModel = None):
+    def __init__(self, llm: LLM = None, search_tool: SearchTools = None,
+                 browser_tool: BrowserTools = None, calculator_tool: CalculatorTools = None):
         if llm is None:
             # self.llm = LLM(model="groq/llama3-8b-8192")
             self.llm = LLM(model="gemini/gemini-2.0-flash")
@@ -17,10 +16,10 @@ class TripAgents():
         else:
             self.llm = llm
 
-        # Initialize tools once
-        self.search_tool = SearchTools()
-        self.browser_tool = BrowserTools()
-        self.calculator_tool = CalculatorTools()
+        # Initialize tools once, or reuse the ones passed in (TripEngine shares them process-wide)
+        self.search_tool = search_tool or SearchTools()
+        self.browser_tool = browser_tool or BrowserTools()
+        self.calculator_tool = calculator_tool or CalculatorTools()
 
     def city_selection_agent(self):
         return Agent(
@@ -84,6 +83,8 @@ class StreamToExpander:
             task_value = task_match_input.group(1).strip()
 
         if task_value:
+            # Only the Streamlit app uses this class, so the CLI and the API never import streamlit
+            import streamlit as st
             st.toast(":robot_face: " + task_value)
 
         # Check if the text contains the specified phrase and apply color
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from crewai import LLM
+from trip_agents import TripAgents
+from trip_tasks import TripTasks
+from trip_graph import build_trip_crew, PARALLEL_TASKS
+from tools.browser_tools import BrowserTools
+from tools.calculator_tools import CalculatorTools
+from tools.search_tools import SearchTools
+from tools.http_client import get_session
+from tools.page_cache import get_page_cache
+from tools.token_budget import TokenBudget, run_within_budget
+from tools.tracing import instrument_llm
+
+# Model used by the agents and the page summarizer
+TRIP_MODEL = os.getenv("TRIP_MODEL", "gemini/gemini-2.0-flash")
+
+# Agent templates, by the TripAgents method that builds them
+AGENT_ROLES = ("city_selection_agent", "local_expert", "travel_concierge")
+
+
+class RequestAgents:
+    """The agents of one request: copies of the engine's templates, made on demand.
+
+    Has the same methods as TripAgents, so build_trip_crew takes either. A crew mutates
+    its agents (crew reference, executor), so every request gets its own copies; the
+    copies share the template's LLM client and tool instances.
+    """
+
+    def __init__(self, templates: dict):
+        self._templates = templates
+
+    def city_selection_agent(self):
+        return self._templates["city_selection_agent"].copy()
+
+    def local_expert(self):
+        return self._templates["local_expert"].copy()
+
+    def travel_concierge(self):
+        return self._templates["travel_concierge"].copy()
+
+
+class TripEngine:
+    """Process-wide pool of what every trip plan needs, shared by the API, CLI and Streamlit app.
+
+    - one LLM client per model
+    - one instance of each tool (their HTTP sessions, caches and summarizer come with them)
+    - one set of agent templates per model, copied for each request
+    The pool is built on first use, or ahead of time by warm_up().
+    """
+
+    def __init__(self, model: str = TRIP_MODEL):
+        self.model = model
+        self.tasks = TripTasks()
+        self._llms = {}
+        self._tools = None
+        self._templates = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "setup_ms_total": 0.0, "last_setup_ms": None,
+                       "templates_built": 0, "warm_up_ms": None}
+
+    def llm(self, model: str = None) -> LLM:
+        """Return the pooled LLM client for model."""
+        model = model or self.model
+        with self._lock:
+            if model not in self._llms:
+                # Records an llm.call span per call when tracing is enabled
+                self._llms[model] = instrument_llm(LLM(model=model))
+            return self._llms[model]
+
+    def tools(self) -> dict:
+        """Return the pooled tool instances, by name."""
+        llm = self.llm()
+        with self._lock:
+            if self._tools is None:
+                self._tools = {
+                    "search_tool": SearchTools(),
+                    # The page summarizer shares the agents' LLM client
+                    "browser_tool": BrowserTools(llm=llm),
+                    "calculator_tool": CalculatorTools(),
+                }
+            return self._tools
+
+    def templates(self, model: str = None) -> dict:
+        """Return the agent templates for model, built once."""
+        model = model or self.model
+        llm = self.llm(model)
+        tools = self.tools()
+        with self._lock:
+            if model not in self._templates:
+                agents = TripAgents(llm=llm, **tools)
+                self._templates[model] = {role: getattr(agents, role)() for role in AGENT_ROLES}
+                self._stats["templates_built"] += 1
+            return self._templates[model]
+
+    def agents(self, model: str = None) -> RequestAgents:
+        return RequestAgents(self.templates(model))
+
+    def build(self, origin, destination, interests, date_range, task_callback=None,
+              model: str = None, parallel: bool = PARALLEL_TASKS):
+        """Build the crew of one request; returns (crew, graph) like build_trip_crew."""
+        start = time.perf_counter()
+        crew, graph = build_trip_crew(
+            self.agents(model),
+            self.tasks,
+            origin,
+            destination,
+            interests,
+            date_range,
+            task_callback=task_callback,
+            parallel=parallel
+        )
+        setup_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["setup_ms_total"] += setup_ms
+            self._stats["last_setup_ms"] = round(setup_ms, 2)
+        return crew, graph
+
+    def run(self, origin, destination, interests, date_range, task_callback=None, model: str = None,
+            budget: TokenBudget = None):
+        """Plan a trip under a token budget.
+
+        Returns (result, timings, tokens): the per-task timing breakdown and the token
+        accounting per agent and per tool.
+        """
+        crew, graph = self.build(origin, destination, interests, date_range,
+                                 task_callback=task_callback, model=model)
+        graph.start()
+        result, budget = run_within_budget(crew, budget=budget)
+        return result, graph.timings(), budget.report()
+
+    def warm_up(self):
+        """Build the pool ahead of the first request: LLM client, tools, agent templates,
+        the page summarizer's agent, the HTTP connection pool and the page cache."""
+        start = time.perf_counter()
+        self.templates()
+        self.tools()["browser_tool"]._get_summarizer()
+        get_session()
+        get_page_cache()
+        with self._lock:
+            self._stats["warm_up_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_setup_ms"] = round(stats.pop("setup_ms_total") / stats["requests"], 2) if stats["requests"] else None
+        return stats
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> TripEngine:
+    """Return the process-wide engine."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TripEngine()
+        return _engine
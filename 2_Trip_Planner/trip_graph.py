@@ -0,0 +1,121 @@
+import os
+import time
+from crewai import Crew
+from places import is_single_city
+
+# Run independent tasks concurrently (CrewAI async task execution). Set to false to
+# get the original strictly sequential identify -> gather -> plan chain.
+PARALLEL_TASKS = os.getenv("TRIP_PARALLEL_TASKS", "true").lower() not in ("0", "false", "no")
+
+
+class TaskGraph:
+    """Dependency graph of the trip tasks.
+
+    Every task only gets the outputs of the tasks it depends on as context. Tasks of the
+    same level (same longest dependency chain) do not depend on each other, so they run
+    concurrently as async tasks, and the next level waits for them. The last task always
+    runs synchronously, as CrewAI requires.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.order = []
+        self.started_at = None
+        self.finished_at = {}
+
+    def add(self, name: str, task, depends_on=()):
+        for dependency in depends_on:
+            if dependency not in self.nodes:
+                raise ValueError(f"Task '{name}' depends on unknown task '{dependency}'")
+        self.nodes[name] = {"task": task, "depends_on": list(depends_on)}
+        return task
+
+    def levels(self) -> dict:
+        """Map every task to its level: 0 for no dependencies, else 1 + the deepest dependency."""
+        levels = {}
+        # Nodes are added after their dependencies, so insertion order is a topological order
+        for name, node in self.nodes.items():
+            levels[name] = 1 + max((levels[dep] for dep in node["depends_on"]), default=-1)
+        return levels
+
+    def tasks(self, parallel: bool = PARALLEL_TASKS) -> list:
+        """Wire context, async execution and timing callbacks, and return the tasks in run order."""
+        levels = self.levels()
+        order = sorted(self.nodes, key=lambda name: levels[name])
+        for name in order:
+            node = self.nodes[name]
+            task = node["task"]
+            if node["depends_on"]:
+                task.context = [self.nodes[dep]["task"] for dep in node["depends_on"]]
+            siblings = [other for other in order if levels[other] == levels[name]]
+            task.async_execution = parallel and len(siblings) > 1 and name != order[-1]
+            task.callback = self._timing_callback(name)
+        self.order = order
+        return [self.nodes[name]["task"] for name in order]
+
+    def _timing_callback(self, name: str):
+        def record(output):
+            self.finished_at[name] = time.time()
+        return record
+
+    def start(self):
+        self.started_at = time.time()
+
+    def timings(self) -> dict:
+        """Per-task wall-clock breakdown in seconds, plus the total."""
+        timings = {}
+        barrier = self.started_at
+        for name in self.order:
+            end = self.finished_at.get(name)
+            if end is None:
+                continue
+            task = self.nodes[name]["task"]
+            # Async tasks start as soon as the previous synchronous task is done;
+            # synchronous tasks wait for every task before them
+            if task.async_execution:
+                start = barrier
+            else:
+                start = max([barrier] + [self.finished_at[prev] for prev in self.order[:self.order.index(name)]
+                                         if prev in self.finished_at])
+                barrier = end
+            timings[name] = {"start": round(start - self.started_at, 2), "duration": round(end - start, 2)}
+        if self.finished_at:
+            timings["total"] = round(max(self.finished_at.values()) - self.started_at, 2)
+        return timings
+
+
+def build_trip_crew(agents, tasks, origin, destination, interests, date_range, task_callback=None,
+                    parallel: bool = PARALLEL_TASKS):
+    """Build the trip crew and its task graph.
+
+    When the destination is a single city, city selection is replaced by a logistics task
+    (flights, weather, events) that runs alongside the local expert's city guide; the
+    itinerary waits for both. Otherwise the city is selected first, as before.
+    """
+    city_selector_agent = agents.city_selection_agent()
+    local_expert_agent = agents.local_expert()
+    travel_concierge_agent = agents.travel_concierge()
+
+    graph = TaskGraph()
+    if is_single_city(destination):
+        graph.add("identify_task", tasks.logistics_task(
+            city_selector_agent, origin, destination, interests, date_range))
+        graph.add("gather_task", tasks.gather_task(
+            local_expert_agent, origin, interests, date_range, city=destination))
+    else:
+        graph.add("identify_task", tasks.identify_task(
+            city_selector_agent, origin, destination, interests, date_range))
+        graph.add("gather_task", tasks.gather_task(
+            local_expert_agent, origin, interests, date_range), depends_on=["identify_task"])
+    graph.add("plan_task", tasks.plan_task(
+        travel_concierge_agent, origin, interests, date_range), depends_on=["identify_task", "gather_task"])
+
+    crew = Crew(
+        agents=[
+            city_selector_agent, local_expert_agent, travel_concierge_agent
+        ],
+        tasks=graph.tasks(parallel=parallel),
+        task_callback=task_callback,
+        verbose=True
+    )
+    return crew, graph
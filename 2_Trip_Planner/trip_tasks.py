@@ -1,7 +1,6 @@
 from crewai import Task
 from textwrap import dedent
 from datetime import date
-import streamlit as st
 
 class TripTasks():
     def __validate_inputs(self, origin, cities, interests, date_range):
@@ -33,7 +32,33 @@ class TripTasks():
             expected_output="A detailed report on the chosen city with flight costs, weather forecast, and attractions.",
             agent=agent)
 
-    def gather_task(self, agent, origin, interests, range):
+    def logistics_task(self, agent, origin, city, interests, range):
+        """Shortcut for identify_task when the traveler already picked a single city."""
+        self.__validate_inputs(origin, city, interests, range)
+        return Task(description=dedent(f"""
+            Research the travel logistics for a trip to {city}.
+            The traveler already chose this city, do not compare it
+            with other cities.
+
+            Your final answer must be a detailed report on the
+            actual flight costs from the origin, the weather
+            forecast for the trip dates and any seasonal events
+            happening in the city during the trip.
+            Search for flights, weather and events in one call by
+            passing the search tool a list of queries.
+            {self.__tip_section()}
+
+            Traveling from: {origin}
+            City: {city}
+            Trip Date: {range}
+            Traveler Interests: {interests}
+          """),
+            expected_output="A detailed report on flight costs, weather forecast and seasonal events for the city.",
+            agent=agent)
+
+    def gather_task(self, agent, origin, interests, range, city=None):
+        # Without a city the local expert works on the city chosen by identify_task
+        city_line = f"City: {city}" if city else ""
         return Task(description=dedent(f"""
             As a local expert on this city you must compile an
             in-depth guide for someone traveling there and wanting
@@ -52,6 +77,7 @@ class TripTasks():
             tailored to enhance the travel experience.
             {self.__tip_section()}
 
+            {city_line}
             Trip Date: {range}
             Traveling from: {origin}
             Traveler Interests: {interests}
@@ -66,6 +92,9 @@ class TripTasks():
             weather forecasts, places to eat, packing suggestions,
             and a budget breakdown.
 
+            Compute the whole budget breakdown with a single calculator
+            call, passing every line item as a labelled expression.
+
             You MUST suggest actual places to visit, actual hotels
             to stay and actual restaurants to go to.
 
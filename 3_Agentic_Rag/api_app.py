@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import time
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Literal, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from src.crew import AgenticRag, get_pdf_tool
+from src.retrieval_service import RetrievalService
+from src.query_pool import QueueFullError, get_query_pool
+from src.tools.index_registry import get_index_registry
+from src.tools.token_budget import run_within_budget
+from src.tools.tracing import render_metrics
+
+# HTTP API of the RAG crew, so several frontends can share one process: the index
+# registry, the Qdrant client and the embedding model are loaded once and used by every
+# request. Run it from this folder: uvicorn api_app:app --port 8001
+
+load_dotenv()
+
+# Uploaded PDFs are stored like the Streamlit app's, named by content hash
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "uploads")
+# Holder name of the API in the index registry; every query on an index renews it
+API_HOLDER = "api"
+# Questions accepted by one batch request
+RAG_BATCH_MAX = int(os.getenv("RAG_BATCH_MAX", "16"))
+# Seconds between keep-alive comments, so proxies do not drop a quiet stream
+STREAM_KEEPALIVE = 15
+
+app = FastAPI(
+    title="Agentic RAG API",
+    description="Question answering over PDFs and the web using CrewAI",
+    version="1.0.0"
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # In production, replace with specific origins
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+class QueryRequest(BaseModel):
+    query: str = Field(..., min_length=1,
+        example="What is DSPy and what are its main modules?",
+        description="Question to answer")
+    index_id: Optional[str] = Field(None,
+        description="Index returned by /api/v1/documents; the crew's knowledge PDF when omitted")
+    mode: Literal["crew", "service"] = Field("crew",
+        description="crew: retriever and synthesizer agents; service: concurrent retrieval, one agent")
+
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=RAG_BATCH_MAX)
+    index_id: Optional[str] = None
+    mode: Literal["crew", "service"] = "crew"
+
+
+class QueryResponse(BaseModel):
+    status: str
+    query: str
+    answer: Optional[str] = None
+    error: Optional[str] = None
+    # Seconds waiting for a worker, running, and both
+    timings: Optional[dict] = None
+    # Token budget and estimated tokens per agent and per tool
+    tokens: Optional[dict] = None
+    # How the context was chosen (service mode)
+    retrieval: Optional[dict] = None
+
+
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse]
+    elapsed: float
+    # Questions answered per second by this batch
+    throughput: float
+
+
+class IngestResponse(BaseModel):
+    index_id: str
+    documents: List[str]
+    chunks: int
+    elapsed: float
+
+
+@lru_cache()
+def default_crew():
+    """Crew template over the crew's knowledge PDF (PDF_PATH)."""
+    return AgenticRag().crew()
+
+
+def build_crew(pdf_tool):
+    """Crew template whose retriever searches pdf_tool."""
+    return AgenticRag(pdf_tool=pdf_tool).crew()
+
+
+def run_query(query: str, index_id: Optional[str], mode: str, emit=None) -> dict:
+    """Blocking query, executed on a pool worker thread.
+
+    emit, if given, is called with (event, data) as the query progresses.
+    """
+    if emit:
+        emit("started", {})
+    # Templates are shared by every query on the same index; runs use copies
+    if index_id is None:
+        template, pdf_tool = default_crew(), get_pdf_tool()
+    else:
+        template = get_index_registry().crew(index_id, build_crew)
+        pdf_tool = get_index_registry().tool(index_id)
+    if mode == "service":
+        retriever, synthesizer = template.agents
+        service = RetrievalService(pdf_tool, retriever.tools[-1], synthesizer, template.tasks[-1].expected_output)
+        result, budget, retrieval = service.answer(
+            query, on_retrieval=(lambda info: emit("retrieval", info)) if emit else None)
+    else:
+        crew = template.copy()
+        if emit:
+            crew.task_callback = lambda output: emit("task_completed", {"agent": output.agent, "output": output.raw})
+        result, budget = run_within_budget(crew, inputs={"query": query})
+        retrieval = None
+    answer = result.raw if hasattr(result, "raw") else str(result)
+    return {"answer": answer, "tokens": budget.report(), "retrieval": retrieval}
+
+
+def check_index(index_id: Optional[str]):
+    """Fail fast on unknown indexes, and keep the index from being evicted."""
+    if index_id is not None and not get_index_registry().touch(index_id, API_HOLDER):
+        raise HTTPException(status_code=404, detail="Index not found; it may have been evicted, ingest the documents again")
+
+
+def submit_queries(queries: List[str], index_id: Optional[str], mode: str, emit=None) -> list:
+    try:
+        return get_query_pool().submit([(run_query, question, index_id, mode, emit) for question in queries], mode)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+def to_response(query: str, outcome) -> QueryResponse:
+    """QueryResponse from a pool future's (result, timings), or from the exception it raised."""
+    if isinstance(outcome, Exception):
+        return QueryResponse(status="error", query=query, error=f"{type(outcome).__name__}: {outcome}")
+    result, timings = outcome
+    return QueryResponse(status="success", query=query, timings=timings, **result)
+
+
+def save_pdf(name: str, data: bytes) -> str:
+    """Write an uploaded PDF once, under the hash of its content; return its path."""
+    folder = os.path.join(UPLOAD_DIR, hashlib.sha256(data).hexdigest())
+    path = os.path.join(folder, os.path.basename(name))
+    if not os.path.exists(path):
+        os.makedirs(folder, exist_ok=True)
+        # Written under a temporary name, so a concurrent reader never sees a partial file
+        temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+    return path
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    get_query_pool().shutdown()
+
+
+@app.post("/api/v1/documents", response_model=IngestResponse)
+async def ingest_documents(files: List[UploadFile] = File(...)):
+    """Index uploaded PDFs and return the index id to query them with.
+
+    Uploading documents another client already indexed shares that index.
+    """
+    start = time.perf_counter()
+    paths = []
+    for upload in files:
+        if not (upload.filename or "").lower().endswith(".pdf"):
+            raise HTTPException(status_code=400, detail=f"Not a PDF: {upload.filename}")
+        data = await upload.read()
+        paths.append(await asyncio.to_thread(save_pdf, upload.filename, data))
+    registry = get_index_registry()
+    try:
+        # Embedding is CPU bound and may take minutes: keep it off the event loop
+        index_id = await asyncio.to_thread(registry.acquire, paths, API_HOLDER)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Could not index the documents: {e}")
+    tool = registry.tool(index_id)
+    return IngestResponse(index_id=index_id, documents=tool.sources, chunks=tool.chunk_count,
+                          elapsed=round(time.perf_counter() - start, 3))
+
+
+@app.post("/api/v1/query", response_model=QueryResponse)
+async def query(request: QueryRequest):
+    check_index(request.index_id)
+    future, = submit_queries([request.query], request.index_id, request.mode)
+    try:
+        # Wait for the worker thread without blocking the event loop
+        outcome = await asyncio.wrap_future(future)
+    except Exception as e:
+        outcome = e
+    return to_response(request.query, outcome)
+
+
+@app.post("/api/v1/query/stream")
+async def query_stream(request: QueryRequest):
+    """Answer a question and stream progress as Server-Sent Events.
+
+    Events: queued, started, retrieval (service mode) or task_completed (crew mode),
+    then final or error.
+    """
+    check_index(request.index_id)
+    events = queue.Queue()
+    future, = submit_queries([request.query], request.index_id, request.mode,
+                             lambda event, data: events.put((event, data)))
+
+    async def event_stream():
+        yield format_sse("queued", {"mode": request.mode})
+        loop = asyncio.get_running_loop()
+        last_sent = loop.time()
+        while True:
+            finished = future.done()
+            # Drain what the worker thread queued since the last pass
+            while not events.empty():
+                event, data = events.get_nowait()
+                yield format_sse(event, data)
+                last_sent = loop.time()
+            if finished:
+                break
+            if loop.time() - last_sent > STREAM_KEEPALIVE:
+                yield ": keep-alive\n\n"
+                last_sent = loop.time()
+            await asyncio.sleep(0.2)
+
+        response = to_response(request.query, future.exception() or future.result())
+        yield format_sse("final" if response.status == "success" else "error", response.model_dump())
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/v1/query/batch", response_model=BatchQueryResponse)
+async def query_batch(request: BatchQueryRequest):
+    """Answer several questions concurrently on the worker pool.
+
+    The batch is queued whole or refused (429); a failed question does not fail the others.
+    """
+    check_index(request.index_id)
+    start = time.perf_counter()
+    futures = submit_queries(request.queries, request.index_id, request.mode)
+    outcomes = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    results = [to_response(question, outcome) for question, outcome in zip(request.queries, outcomes)]
+    return BatchQueryResponse(results=results, elapsed=round(elapsed, 3),
+                              throughput=round(len(results) / elapsed, 3) if elapsed else 0.0)
+
+
+@app.get("/api/v1/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "queries": get_query_pool().stats(),
+        "indexes": get_index_registry().stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Query latency, queue wait and throughput, plus span metrics, in the Prometheus text format.
+
+    Span metrics are empty unless TRACING_ENABLED is set; query metrics are always reported.
+    """
+    lines = [get_query_pool().render_prometheus(), render_metrics()]
+    return PlainTextResponse("".join(lines), media_type="text/plain; version=0.0.4")
+
+
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("__main__:app", host="127.0.0.1", port=8001)
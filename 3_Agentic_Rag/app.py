@@ -1,17 +1,31 @@
 import streamlit as st
 import os
-import tempfile
 import gc
-import base64
-import time
+import hashlib
+import uuid
+from urllib.parse import quote
 
 from crewai import Agent, Crew, Process, Task, LLM
-from src.tools.custom_tool import DocumentSearchTool
-from crewai_tools import SerperDevTool 
+from src.tools.web_search_tool import WebSearchTool
+from src.tools.token_budget import run_within_budget
+from src.tools.tracing import instrument_llm
+from src.tools.documents import remove_old_uploads
+from src.tools.index_registry import get_index_registry
+from src.retrieval_service import RetrievalService
+
+# Uploads are written once, named by content hash, under the folder Streamlit serves as
+# app/static (server.enableStaticServing in .streamlit/config.toml). The indexer reads
+# them from disk and the browser fetches the preview from there, so reruns never touch
+# the PDF bytes. Uploads older than UPLOAD_MAX_AGE seconds are removed once no session
+# or index uses them.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+UPLOAD_DIR = os.path.join(STATIC_DIR, "uploads")
+UPLOAD_MAX_AGE = int(os.getenv("UPLOAD_MAX_AGE", str(24 * 60 * 60)))
 
 @st.cache_resource
 def load_llm():
-    llm = LLM(model="gemini/gemini-2.0-flash")
+    # Records an llm.call span per call when TRACING_ENABLED is set
+    llm = instrument_llm(LLM(model="gemini/gemini-2.0-flash"))
     return llm
 
 # ===========================
@@ -19,7 +33,7 @@ def load_llm():
 # ===========================
 def create_agents_and_tasks(pdf_tool):
     """Creates a Crew with the given PDF tool (if any) and a web search tool."""
-    web_search_tool = SerperDevTool()
+    web_search_tool = WebSearchTool()
 
     retriever_agent = Agent(
         role="Retrieve relevant information to answer the user query: {query}",
@@ -102,22 +116,57 @@ if "file_uploader_key" not in st.session_state:
 if "messages" not in st.session_state:
     st.session_state.messages = []  # Chat history
 
-if "pdf_tool" not in st.session_state:
-    st.session_state.pdf_tool = None  # Store the DocumentSearchTool
+# The DocumentSearchTool and the crew are shared by every session with the same PDFs;
+# a session only keeps the key of its index in the process-wide registry
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+if "index_key" not in st.session_state:
+    st.session_state.index_key = None   # Registry key of this session's index
+
+if "index_files" not in st.session_state:
+    st.session_state.index_files = None # Paths the index was built from
 
-if "crew" not in st.session_state:
-    st.session_state.crew = None      # Store the Crew object
+if "uploads" not in st.session_state:
+    st.session_state.uploads = {}     # Upload id -> path of the saved PDF
 
 def reset_chat():
     st.session_state.messages = []
     gc.collect()
 
-def display_pdf(file_bytes: bytes, file_name: str):
-    """Displays the uploaded PDF in an iframe."""
-    base64_pdf = base64.b64encode(file_bytes).decode("utf-8")
+def save_upload(uploaded_file) -> str:
+    """Write an upload to UPLOAD_DIR/<sha256>/<file name> once per session and return the path.
+
+    getbuffer() is a view of the upload's own buffer, so hashing and writing copy nothing.
+    The file name is kept, since it is the source shown in answers.
+    """
+    # file_id changes when the same name is uploaded again with other content
+    upload_id = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+    path = st.session_state.uploads.get(upload_id)
+    if path is not None and os.path.exists(path):
+        return path
+    buffer = uploaded_file.getbuffer()
+    digest = hashlib.sha256(buffer).hexdigest()
+    folder = os.path.join(UPLOAD_DIR, digest)
+    path = os.path.join(folder, os.path.basename(uploaded_file.name))
+    if not os.path.exists(path):
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        # Files an active session or a registered index still uses are kept, whatever their age
+        remove_old_uploads(UPLOAD_DIR, UPLOAD_MAX_AGE, keep=get_index_registry().documents_in_use())
+        os.makedirs(folder, exist_ok=True)
+        # Write then rename, so the preview never serves a half-written file
+        with open(path + ".tmp", "wb") as f:
+            f.write(buffer)
+        os.replace(path + ".tmp", path)
+    st.session_state.uploads[upload_id] = path
+    return path
+
+def display_pdf(path: str, file_name: str):
+    """Displays a saved PDF in an iframe; the browser loads (and caches) it from the static route."""
+    url = "app/static/" + quote(os.path.relpath(path, STATIC_DIR).replace(os.sep, "/"))
     pdf_display = f"""
     <iframe 
-        src="data:application/pdf;base64,{base64_pdf}" 
+        src="{url}" 
         width="100%" 
         height="600px" 
         type="application/pdf"
@@ -134,30 +183,53 @@ with st.sidebar:
 
     if st.button("Reset Session"):
         reset_chat()
-        st.session_state.pdf_tool = None
-        st.session_state.crew = None 
+        if st.session_state.index_key is not None:
+            get_index_registry().release(st.session_state.index_key, st.session_state.session_id)
+        st.session_state.index_key = None
+        st.session_state.index_files = None
+        st.session_state.uploads = {}
         st.session_state.file_uploader_key += 1
 
-    st.header("Add Your PDF Document")
-    uploaded_file = st.file_uploader("Choose a PDF file", type=["pdf"], key=st.session_state.file_uploader_key)
+    # Searches the PDFs and the web at once and answers in one step, without the retriever agent
+    st.toggle("Concurrent retrieval", key="concurrent_retrieval", value=True)
+
+    st.header("Add Your PDF Documents")
+    uploaded_files = st.file_uploader("Choose PDF files", type=["pdf"], accept_multiple_files=True,
+                                      key=st.session_state.file_uploader_key)
 
 
 
-    if uploaded_file is not None:
-        # If there's a new file and we haven't set pdf_tool yet...
-        if st.session_state.pdf_tool is None:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_file_path = os.path.join(temp_dir, uploaded_file.name)
-                with open(temp_file_path, "wb") as f:
-                    f.write(uploaded_file.getvalue())
+    if uploaded_files:
+        # Index the files, or share the index another session built for the same documents
+        # Saved once per upload; later reruns only look the path up
+        file_paths = [save_upload(uploaded_file) for uploaded_file in uploaded_files]
+        registry = get_index_registry()
+        key, session_id = st.session_state.index_key, st.session_state.session_id
+        # Re-acquired when files were added or removed, or the registry evicted the index
+        if st.session_state.index_files != file_paths or not registry.touch(key, session_id):
+            if key is not None:
+                registry.release(key, session_id)
+            progress_bar = st.progress(0.0, text="Indexing PDFs... Please wait...")
 
-                with st.spinner("Indexing PDF... Please wait..."):
-                    st.session_state.pdf_tool = DocumentSearchTool(file_path=temp_file_path)
+            def show_progress(stats):
+                done, total = stats["files_done"], max(stats["files_total"], 1)
+                progress_bar.progress(done / total, text=f"Indexed {done} of {total} PDFs")
+
+            st.session_state.index_key = registry.acquire(file_paths, session_id, progress=show_progress)
+            st.session_state.index_files = file_paths
+            progress_bar.empty()
             
-            st.success("PDF indexed! Ready to chat.")
+            st.success("PDFs indexed! Ready to chat.")
+
+        # Optionally display a PDF in the sidebar
+        preview = st.selectbox("Preview", range(len(uploaded_files)), format_func=lambda i: uploaded_files[i].name)
+        display_pdf(file_paths[preview], uploaded_files[preview].name)
 
-        # Optionally display the PDF in the sidebar
-        display_pdf(uploaded_file.getvalue(), uploaded_file.name)
+    elif st.session_state.index_key is not None:
+        # Every upload was removed: release the index and answer from the web only
+        get_index_registry().release(st.session_state.index_key, st.session_state.session_id)
+        st.session_state.index_key = None
+        st.session_state.index_files = None
 
 # ===========================
 #   Main Chat Interface
@@ -171,7 +243,7 @@ for message in st.session_state.messages:
         st.markdown(message["content"])
 
 # Chat input
-prompt = st.chat_input("Ask a question about your PDF...")
+prompt = st.chat_input("Ask a question about your PDFs...")
 
 if prompt:
     # 1. Show user message immediately
@@ -179,9 +251,14 @@ if prompt:
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # 2. Build or reuse the Crew (only once after PDF is loaded)
-    if st.session_state.crew is None:
-        st.session_state.crew = create_agents_and_tasks(st.session_state.pdf_tool)
+    # 2. The crew template shared by the sessions with the same PDFs
+    registry, key = get_index_registry(), st.session_state.index_key
+    if key is not None and not registry.touch(key, st.session_state.session_id):
+        # The registry evicted the index: build it again from the same files
+        with st.spinner("Indexing PDFs..."):
+            key = registry.acquire(st.session_state.index_files, st.session_state.session_id)
+        st.session_state.index_key = key
+    template = registry.crew(key, create_agents_and_tasks)
 
     # 3. Get the response
     with st.chat_message("assistant"):
@@ -191,11 +268,26 @@ if prompt:
         # Get the complete response first
         with st.spinner("Thinking..."):
             inputs = {"query": prompt}
-            result = st.session_state.crew.kickoff(inputs=inputs)
+            # Tool outputs are trimmed to fit the per-question token budget
+            if st.session_state.concurrent_retrieval:
+                retriever, synthesizer = template.agents
+                service = RetrievalService(registry.tool(key) if key is not None else None,
+                                           retriever.tools[-1], synthesizer, template.tasks[-1].expected_output)
+                result, budget, retrieval = service.answer(prompt)
+            else:
+                # A run keeps state on its crew: run a copy, which shares the LLM and the
+                # read-only search tool
+                result, budget = run_within_budget(template.copy(), inputs=inputs)
+                retrieval = None
             full_response = str(result)
         
         # Show the final response without the cursor
         message_placeholder.markdown(full_response)
+        with st.expander("🔢 Token usage (estimated)"):
+            st.json(budget.report())
+        if retrieval is not None:
+            with st.expander("🔎 Retrieval"):
+                st.json(retrieval)
 
     # 4. Save assistant's message to session
     st.session_state.messages.append({"role": "assistant", "content": full_response})
@@ -1,12 +1,32 @@
+import threading
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool
-from crewai_tools import PDFSearchTool
-from src.tools.custom_tool import DocumentSearchTool
+from src.tools.web_search_tool import WebSearchTool
+from src.retrieval_service import RetrievalService
 
-# Initialize the tool with a specific PDF path for exclusive search within that document
-pdf_tool = DocumentSearchTool(file_path='knowledge/dspy.pdf')
-web_search_tool = SerperDevTool()
+PDF_PATH = 'knowledge/dspy.pdf'
+
+web_search_tool = WebSearchTool()
+
+_pdf_tool = None
+_pdf_tool_lock = threading.Lock()
+
+
+def get_pdf_tool():
+	"""Return the search tool over PDF_PATH, indexing the PDF on first use.
+
+	Importing this module stays cheap: the PDF is parsed and embedded (and qdrant and
+	the embedding model loaded) only when the first crew is built.
+	"""
+	global _pdf_tool
+	with _pdf_tool_lock:
+		if _pdf_tool is None:
+			from src.tools.custom_tool import DocumentSearchTool
+			# Initialize the tool with a specific PDF path for exclusive search within that document.
+			# Only this tool indexes PDF_PATH, so an edited PDF replaces its previous version
+			# instead of leaving the old points behind
+			_pdf_tool = DocumentSearchTool(file_path=PDF_PATH, replace_versions=True)
+		return _pdf_tool
 
 @CrewBase
 class AgenticRag():
@@ -15,6 +35,11 @@ class AgenticRag():
 	agents_config = 'config/agents.yaml'
 	tasks_config = 'config/tasks.yaml'
 
+	def __init__(self, pdf_tool=None):
+		"""pdf_tool: document search tool of the retriever; get_pdf_tool() (PDF_PATH) when None."""
+		# Set before CrewBase maps the task variables, which already builds the agents
+		self.pdf_tool = pdf_tool
+
 	# If you would like to add tools to your agents, you can learn more about it here:
 	# https://docs.crewai.com/concepts/agents#agent-tools
 	# @agent
@@ -30,7 +55,7 @@ class AgenticRag():
 			config=self.agents_config['retriever_agent'],
 			verbose=True,
 			tools=[
-				pdf_tool,
+				self.pdf_tool or get_pdf_tool(),
 				web_search_tool
 			]
 		)
@@ -60,6 +85,15 @@ class AgenticRag():
 			config=self.tasks_config['response_task'],
 		)
 
+	def retrieval_service(self) -> RetrievalService:
+		"""Searches the PDF and the web concurrently, then answers with response_synthesizer_agent in one step."""
+		return RetrievalService(
+			self.pdf_tool or get_pdf_tool(),
+			web_search_tool,
+			self.response_synthesizer_agent(),
+			self.tasks_config['response_task']['expected_output'],
+		)
+
 	@crew
 	def crew(self) -> Crew:
 		"""Creates the AgenticRag crew"""
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+import argparse
+import os
+
+from src.tools.custom_tool import db_path, get_client
+from src.tools.ingestion import IngestionPipeline, INGEST_WORKERS, INGEST_BATCH_SIZE
+from src.tools.embeddings import get_embedding_service
+from src.tools.retrieval import get_bm25_index
+
+
+def print_progress(stats: dict):
+    print(f"[{stats['elapsed']:>7.1f}s] {stats['files_done']}/{stats['files_total']} documents, "
+          f"{stats['chunks_embedded']} chunks embedded, {stats['chunks_reused']} reused")
+
+
+def main():
+    """
+    Index folders of PDFs into the persistent document index.
+    Usage: python -m src.ingest knowledge/ --workers 8
+    """
+    parser = argparse.ArgumentParser(description="Index PDFs for the Agentic RAG crew")
+    parser.add_argument("paths", nargs="+", help="PDF files or folders of PDFs")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS,
+                        help="Processes extracting and chunking PDFs")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE,
+                        help="Chunks embedded and upserted per batch")
+    parser.add_argument("--replace", action="store_true",
+                        help="Replace the previous version of a PDF indexed from the same path")
+    args = parser.parse_args()
+
+    client = get_client(db_path)
+    pipeline = IngestionPipeline(
+        client,
+        os.path.join(os.path.dirname(db_path), "manifest.json"),
+        get_embedding_service(),
+        get_bm25_index(),
+        workers=args.workers,
+        batch_size=args.batch_size,
+        progress=print_progress,
+        replace_versions=args.replace
+    )
+    # Interrupted runs can simply be started again: indexed documents are skipped
+    doc_ids = pipeline.ingest(args.paths)
+    print(f"Indexed {len(doc_ids)} documents into {db_path}")
+
+
+if __name__ == "__main__":
+    main()
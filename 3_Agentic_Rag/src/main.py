@@ -6,6 +6,7 @@ import json
 from datetime import datetime
 
 from src.crew import AgenticRag
+from src.tools.token_budget import run_within_budget
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -28,11 +29,14 @@ def run():
 
     try:
         print("\nInitializing crew and executing query...")
-        result = AgenticRag().crew().kickoff(inputs=inputs)
+        # Tool outputs are trimmed to fit the token budget (TOKEN_BUDGET)
+        result, budget = run_within_budget(AgenticRag().crew(), inputs=inputs)
         
         print("\nRESULTS:")
         print("-"*50)
         print(result)
+        print("\nTOKENS (estimated):")
+        print(json.dumps(budget.report(), indent=2))
         print("\n" + "="*50)
         print("Execution completed successfully!")
         print("="*50 + "\n")
@@ -47,8 +51,40 @@ def run():
         raise
 
 
+def run_service():
+    """
+    Answer with the retrieval service: the PDF and web searches run concurrently and
+    the response synthesizer answers in one step, without the retriever agent.
+    """
+    query = 'Who is Elon musk and what is his net worth?'
+    print(f"\nProcessing query: '{query}'")
+    print("-"*50)
+
+    try:
+        result, budget, retrieval = AgenticRag().retrieval_service().answer(query)
+
+        print("\nRESULTS:")
+        print("-"*50)
+        print(result)
+        print("\nRETRIEVAL:")
+        print(json.dumps(retrieval, indent=2))
+        print("\nTOKENS (estimated):")
+        print(json.dumps(budget.report(), indent=2))
+        return result
+
+    except Exception as e:
+        print("\nERROR:")
+        print("-"*50)
+        print(f"An error occurred while running the crew: {e}")
+        print("\n" + "="*50)
+        raise
+
+
 
 
 
 if __name__ == "__main__":
-    run()
+    if "--service" in sys.argv[1:]:
+        run_service()
+    else:
+        run()
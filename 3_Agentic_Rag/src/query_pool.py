@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from src.tools.tracing import DURATION_BUCKETS
+
+# Crew runs block for seconds to minutes, so the HTTP API runs them on a bounded pool of
+# worker threads instead of on the event loop. Every worker uses the same process-wide
+# index registry, Qdrant client and embedding model; only the crew is copied per query.
+# Queries beyond the running ones wait in the queue, and submissions are refused once
+# RAG_MAX_QUEUE queries are already waiting.
+RAG_WORKERS = int(os.getenv("RAG_WORKERS", "4"))
+RAG_MAX_QUEUE = int(os.getenv("RAG_MAX_QUEUE", "32"))
+# Seconds of finished queries the throughput is averaged over
+THROUGHPUT_WINDOW = int(os.getenv("RAG_THROUGHPUT_WINDOW", "60"))
+# Latest latencies per mode kept for the percentiles in stats()
+LATENCY_SAMPLES = 1000
+
+
+class QueueFullError(Exception):
+    """Raised when queries are submitted while the queue is at its depth limit."""
+
+
+def _percentile(values: list, fraction: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(fraction * len(values)))], 3)
+
+
+class QueryMetrics:
+    """Per mode: query count, errors, latency histogram and queue wait; plus recent throughput."""
+
+    def __init__(self, window: int = THROUGHPUT_WINDOW):
+        self.window = window
+        self._series = {}
+        # Finish times of the queries of the last window seconds
+        self._finished = deque()
+        self._lock = threading.Lock()
+
+    def observe(self, mode: str, latency: float, queue_wait: float, error: bool = False):
+        now = time.time()
+        with self._lock:
+            series = self._series.setdefault(mode, {
+                "count": 0, "errors": 0, "latency_sum": 0.0, "queue_wait_sum": 0.0,
+                "buckets": [0] * len(DURATION_BUCKETS), "latencies": deque(maxlen=LATENCY_SAMPLES),
+            })
+            series["count"] += 1
+            series["errors"] += error
+            series["latency_sum"] += latency
+            series["queue_wait_sum"] += queue_wait
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if latency <= bound:
+                    series["buckets"][i] += 1
+            if not error:
+                series["latencies"].append(latency)
+            self._finished.append(now)
+            self._expire(now)
+
+    def _expire(self, now: float):
+        while self._finished and now - self._finished[0] > self.window:
+            self._finished.popleft()
+
+    def throughput(self) -> float:
+        """Queries finished per second over the last window."""
+        with self._lock:
+            self._expire(time.time())
+            return round(len(self._finished) / self.window, 3)
+
+    def stats(self) -> dict:
+        throughput = self.throughput()
+        with self._lock:
+            modes = {
+                mode: {
+                    "count": data["count"],
+                    "errors": data["errors"],
+                    "latency_avg": round(data["latency_sum"] / data["count"], 3),
+                    "latency_p50": _percentile(list(data["latencies"]), 0.5),
+                    "latency_p95": _percentile(list(data["latencies"]), 0.95),
+                    "queue_wait_avg": round(data["queue_wait_sum"] / data["count"], 3),
+                }
+                for mode, data in self._series.items()
+            }
+        return {"throughput_per_second": throughput, "window_seconds": self.window, "modes": modes}
+
+    def render_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        throughput = self.throughput()
+        with self._lock:
+            series = {mode: dict(data, buckets=list(data["buckets"])) for mode, data in self._series.items()}
+        lines = ["# HELP rag_query_duration_seconds Latency of RAG queries, queue wait included.",
+                 "# TYPE rag_query_duration_seconds histogram"]
+        for mode, data in sorted(series.items()):
+            for bound, count in zip(DURATION_BUCKETS, data["buckets"]):
+                lines.append(f'rag_query_duration_seconds_bucket{{mode="{mode}",le="{bound}"}} {count}')
+            lines.append(f'rag_query_duration_seconds_bucket{{mode="{mode}",le="+Inf"}} {data["count"]}')
+            lines.append(f'rag_query_duration_seconds_sum{{mode="{mode}"}} {data["latency_sum"]:.6f}')
+            lines.append(f'rag_query_duration_seconds_count{{mode="{mode}"}} {data["count"]}')
+        lines += ["# HELP rag_query_queue_wait_seconds_total Time RAG queries waited for a worker.",
+                  "# TYPE rag_query_queue_wait_seconds_total counter"]
+        for mode, data in sorted(series.items()):
+            lines.append(f'rag_query_queue_wait_seconds_total{{mode="{mode}"}} {data["queue_wait_sum"]:.6f}')
+        lines += ["# HELP rag_query_errors_total RAG queries that failed.", "# TYPE rag_query_errors_total counter"]
+        for mode, data in sorted(series.items()):
+            lines.append(f'rag_query_errors_total{{mode="{mode}"}} {data["errors"]}')
+        lines += [f"# HELP rag_queries_per_second Queries finished per second over the last {self.window} s.",
+                  "# TYPE rag_queries_per_second gauge",
+                  f"rag_queries_per_second {throughput}"]
+        return "\n".join(lines) + "\n"
+
+
+class QueryPool:
+    def __init__(self, max_workers: int = RAG_WORKERS, max_queue: int = RAG_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.metrics = QueryMetrics()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-query")
+        self._queued = 0
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def submit(self, calls: list, mode: str) -> list:
+        """Queue every fn(*args) of calls, or none of them if they do not fit in the queue.
+
+        Returns one future per call, resolving to (result, timings): seconds the query
+        waited for a worker, ran, and both.
+        """
+        with self._lock:
+            if self._queued + len(calls) > self.max_queue:
+                raise QueueFullError(f"Too many queries waiting ({self.max_queue}), try again later")
+            self._queued += len(calls)
+            futures = [self._executor.submit(self._run, mode, time.perf_counter(), fn, *args) for fn, *args in calls]
+        for future in futures:
+            future.add_done_callback(self._forget_cancelled)
+        return futures
+
+    def _forget_cancelled(self, future):
+        # A future cancelled while queued (e.g. its client disconnected) never reaches _run
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def _run(self, mode: str, submitted: float, fn, *args):
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        error = True
+        try:
+            result = fn(*args)
+            error = False
+            return result, {"queue_wait": round(started - submitted, 3),
+                            "run": round(time.perf_counter() - started, 3),
+                            "latency": round(time.perf_counter() - submitted, 3)}
+        finally:
+            with self._lock:
+                self._running -= 1
+            self.metrics.observe(mode, time.perf_counter() - submitted, started - submitted, error)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pool = {"workers": self.max_workers, "max_queue": self.max_queue,
+                    "queued": self._queued, "running": self._running}
+        return dict(pool, **self.metrics.stats())
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            gauges = {"workers": self.max_workers, "queued": self._queued, "running": self._running}
+        lines = [f"# TYPE rag_pool_{key} gauge\nrag_pool_{key} {value}\n" for key, value in gauges.items()]
+        return "".join(lines) + self.metrics.render_prometheus()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_query_pool() -> QueryPool:
+    """Return the process-wide query pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = QueryPool()
+        return _pool
@@ -0,0 +1,197 @@
+import asyncio
+import contextvars
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from textwrap import dedent
+from crewai import Crew, Process, Task
+from src.tools.retrieval import tokenize
+from src.tools.token_budget import TokenBudget, current_budget, set_budget, reset_budget, run_within_budget
+from src.tools.tracing import span
+
+# Retrieval without the retriever agent: the PDF search runs first, with the web search
+# overlapping it once it is slow, the PDF result is used as soon as it is good enough,
+# otherwise the web result (or both) once it arrives, and the response synthesizer answers
+# from that context in one step.
+# Seconds to wait for the retrieval results before answering with whatever arrived
+RETRIEVAL_DEADLINE = float(os.getenv("RETRIEVAL_DEADLINE", "8"))
+# Every web search is a paid Serper request, so it starts only once the PDF result is
+# insufficient, or when the PDF search is still running after this many seconds
+RETRIEVAL_WEB_DELAY = float(os.getenv("RETRIEVAL_WEB_DELAY", "0.5"))
+# The PDF result is enough on its own when its best chunk is at least this similar to the
+# question (cosine) and its top chunks contain this fraction of the question's words
+RETRIEVAL_MIN_SCORE = float(os.getenv("RETRIEVAL_MIN_SCORE", "0.8"))
+RETRIEVAL_MIN_COVERAGE = float(os.getenv("RETRIEVAL_MIN_COVERAGE", "0.6"))
+# Chunks of the PDF result checked for the question's words
+COVERAGE_CHUNKS = 3
+
+
+def pdf_sufficient(query: str, chunks: list, min_score: float = RETRIEVAL_MIN_SCORE,
+                   min_coverage: float = RETRIEVAL_MIN_COVERAGE) -> bool:
+    """Whether the PDF chunks can answer the question without a web search."""
+    if not chunks:
+        return False
+    scores = [chunk["score"] for chunk in chunks if chunk.get("score") is not None]
+    if not scores or max(scores) < min_score:
+        return False
+    terms = set(tokenize(query))
+    if not terms:
+        return True
+    found = set(tokenize(" ".join(chunk["document"] for chunk in chunks[:COVERAGE_CHUNKS])))
+    return len(terms & found) / len(terms) >= min_coverage
+
+
+class RetrievalService:
+    """Answers questions from a PDF search tool and a web search tool.
+
+    pdf_tool is a DocumentSearchTool (or None for web only), web_tool a WebSearchTool,
+    synthesizer the response synthesizer agent; every question runs on a copy of it.
+    """
+
+    def __init__(self, pdf_tool, web_tool, synthesizer, expected_output: str,
+                 deadline: float = RETRIEVAL_DEADLINE, min_score: float = RETRIEVAL_MIN_SCORE,
+                 min_coverage: float = RETRIEVAL_MIN_COVERAGE, web_delay: float = RETRIEVAL_WEB_DELAY):
+        self.pdf_tool = pdf_tool
+        self.web_tool = web_tool
+        self.synthesizer = synthesizer
+        self.expected_output = expected_output
+        self.deadline = deadline
+        self.min_score = min_score
+        self.min_coverage = min_coverage
+        self.web_delay = web_delay
+
+    def _search_pdf(self, query: str) -> list:
+        with span("retrieval.pdf") as current:
+            chunks = self.pdf_tool.search(query)
+            current.set(chunks=len(chunks))
+            return chunks
+
+    def _search_web(self, query: str) -> str:
+        with span("retrieval.web"):
+            # Through _run, so the results are fitted to the question's token budget
+            result = self.web_tool._run(search_query=query)
+            return result if isinstance(result, str) else json.dumps(result, default=str)
+
+    async def retrieve(self, query: str) -> dict:
+        """Run the searches; return the context sections and how they were chosen.
+
+        The PDF is preferred: its result ends the wait as soon as it is sufficient, and the
+        web search is not started at all when that happens within web_delay. Otherwise the
+        web result is awaited too, up to the deadline, and everything that arrived is used.
+        """
+        start = time.perf_counter()
+        deadline = start + self.deadline
+        web_start = start + self.web_delay if self.pdf_tool is not None else start
+        pending, results, errors, timings = {}, {}, {}, {}
+        sufficient = web_started = False
+        loop = asyncio.get_running_loop()
+        # Not the loop's default executor: asyncio.run() waits for it on exit, so a search
+        # running past the deadline would still hold up the answer
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="retrieval")
+
+        def search(fn):
+            # With a copy of the context, so the searches see the question's budget and span
+            return loop.run_in_executor(executor, contextvars.copy_context().run, fn, query)
+
+        if self.pdf_tool is not None:
+            pending["pdf"] = search(self._search_pdf)
+        try:
+            while not sufficient:
+                now = time.perf_counter()
+                if not web_started and ("pdf" not in pending or now >= web_start):
+                    pending["web"] = search(self._search_web)
+                    web_started = True
+                if not pending or now >= deadline:
+                    break
+                timeout = (deadline if web_started else min(deadline, web_start)) - now
+                done, _ = await asyncio.wait(pending.values(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for name in [name for name, future in pending.items() if future in done]:
+                    future = pending.pop(name)
+                    timings[f"{name}_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                    if future.exception() is not None:
+                        errors[name] = f"{type(future.exception()).__name__}: {future.exception()}"
+                        continue
+                    results[name] = future.result()
+                    if name == "pdf":
+                        sufficient = pdf_sufficient(query, results["pdf"], self.min_score, self.min_coverage)
+        finally:
+            # Searches still running are given up; their threads finish in the background
+            for future in pending.values():
+                future.cancel()
+            executor.shutdown(wait=False)
+
+        sections = []
+        if results.get("pdf"):
+            text = self.pdf_tool.format_chunks(results["pdf"])
+            budget = current_budget()
+            if budget is not None:
+                # search() skips the tool's budget decorator, so fit the chunks here
+                text = budget.fit(self.pdf_tool.name, text, "\n___\n")
+            sections.append(("PDF", text))
+        if "web" in results and not sufficient:
+            sections.append(("WEB SEARCH", results["web"]))
+        return {
+            "sections": sections,
+            "sufficient_pdf": sufficient,
+            "web_searched": web_started,
+            # Still running at the deadline, or no longer needed once the PDF result was enough
+            "timed_out": [] if sufficient else sorted(pending),
+            "abandoned": sorted(pending) if sufficient else [],
+            "errors": errors,
+            "timings": dict(timings, total_ms=round((time.perf_counter() - start) * 1000, 1)),
+        }
+
+    def _crew(self, query: str, retrieval: dict) -> Crew:
+        context = "\n\n".join(f"{title}\n----------\n{text}" for title, text in retrieval["sections"])
+        # Braces would be read as crewai input placeholders
+        context = context.replace("{", "(").replace("}", ")") or "No information could be retrieved."
+        agent = self.synthesizer.copy()
+        task = Task(
+            description=dedent("""\
+                Synthesize the final response for the user query: {query}
+                Use only the retrieved context below. If the retrieved content is from the PDF,
+                include the source filename and page number; if it is from the web search,
+                include the source url.
+
+                RETRIEVED CONTEXT
+                """) + context,
+            expected_output=self.expected_output,
+            agent=agent
+        )
+        return Crew(agents=[agent], tasks=[task], process=Process.sequential, verbose=True)
+
+    def answer(self, query: str, budget: TokenBudget = None, on_retrieval=None):
+        """Answer query; returns (result, budget, retrieval info). Call from synchronous code.
+
+        on_retrieval, if given, is called with the retrieval info before the answer is synthesized.
+        """
+        budget = budget or TokenBudget()
+        token = set_budget(budget)
+        try:
+            with span("retrieval", pdf=self.pdf_tool is not None) as current:
+                retrieval = asyncio.run(self.retrieve(query))
+                current.set(sufficient_pdf=retrieval["sufficient_pdf"], web_searched=retrieval["web_searched"],
+                            timed_out=len(retrieval["timed_out"]), abandoned=len(retrieval["abandoned"]))
+        finally:
+            reset_budget(token)
+        info = {key: value for key, value in retrieval.items() if key != "sections"}
+        if on_retrieval is not None:
+            on_retrieval(info)
+        result, budget = run_within_budget(self._crew(query, retrieval), inputs={"query": query}, budget=budget)
+        return result, budget, info
+
+    async def aanswer(self, query: str, budget: TokenBudget = None):
+        """answer() for code running in an event loop."""
+        budget = budget or TokenBudget()
+        token = set_budget(budget)
+        try:
+            with span("retrieval", pdf=self.pdf_tool is not None) as current:
+                retrieval = await self.retrieve(query)
+                current.set(sufficient_pdf=retrieval["sufficient_pdf"], web_searched=retrieval["web_searched"],
+                            timed_out=len(retrieval["timed_out"]), abandoned=len(retrieval["abandoned"]))
+        finally:
+            reset_budget(token)
+        result, budget = await asyncio.to_thread(run_within_budget, self._crew(query, retrieval),
+                                                 {"query": query}, budget)
+        return result, budget, {key: value for key, value in retrieval.items() if key != "sections"}
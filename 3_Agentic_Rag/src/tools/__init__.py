@@ -0,0 +1,8 @@
+import os
+import sys
+
+# tracing and token_budget are shared with the other projects of this repository, in
+# crew_common/ at its root
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
@@ -1,83 +1,184 @@
 import os
+import threading
+import time
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field, ConfigDict
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, models
 from dotenv import load_dotenv
+from src.tools.ingestion import IngestionPipeline, COLLECTION_NAME, DEFAULT_OWNER
+from src.tools.embeddings import get_embedding_service
+from src.tools.retrieval import get_bm25_index, get_reranker, reciprocal_rank_fusion
+from src.tools.token_budget import fits_budget
+from src.tools.tracing import span, traced_tool
 
 load_dotenv()
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 db_path = os.path.join(parent_dir, "db", "qdrant.db")
 print(f"Using Qdrant database path: {db_path}")
 
+# Search defaults, see DocumentSearchTool.__init__
+SEARCH_TOP_K = int(os.getenv("SEARCH_TOP_K", "10"))
+SEARCH_MODE = os.getenv("SEARCH_MODE", "hybrid")
+SEARCH_RERANK = os.getenv("SEARCH_RERANK", "false").lower() in ("1", "true", "yes")
+
+# Embedded Qdrant locks its storage folder, so every tool in the process shares one client per path
+_clients = {}
+_clients_lock = threading.Lock()
+# Serializes manifest reads/writes and indexing for each path
+_index_locks = {}
+
+
+def get_client(path: str) -> QdrantClient:
+    """Return the process-wide on-disk Qdrant client for path."""
+    with _clients_lock:
+        if path not in _clients:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _clients[path] = QdrantClient(path=path)
+            _index_locks[path] = threading.Lock()
+        return _clients[path]
+
+
+def remove_documents(doc_ids, db_path: str = db_path, owner: str = DEFAULT_OWNER, in_use=None) -> int:
+    """Drop owner's claim on indexed documents at db_path; returns the chunks removed.
+
+    Documents other indexers claim keep their points. in_use, if given, is called while
+    the index is locked and returns document ids that must be kept anyway: a tool being
+    built meanwhile either registered its documents already, or indexes them again after.
+    """
+    client = get_client(db_path)
+    folder = os.path.dirname(db_path)
+    with _index_locks[db_path]:
+        if in_use is not None:
+            keep = in_use()
+            doc_ids = [doc_id for doc_id in doc_ids if doc_id not in keep]
+        pipeline = IngestionPipeline(client, os.path.join(folder, "manifest.json"), get_embedding_service(),
+                                     get_bm25_index(os.path.join(folder, "bm25.db")), owner=owner)
+        return pipeline.remove(doc_ids)
+
+
 class DocumentSearchToolInput(BaseModel):
     """Input schema for DocumentSearchTool."""
-    query: dict = Field(..., description="Query to search the document. Must contain a 'query' key with the query string.")
+    query: dict = Field(..., description="Query to search the documents. Must contain a 'query' key with the query string. "
+                                         "May contain a 'source' key with a file name (or list of file names) to search only those documents.")
 
 class DocumentSearchTool(BaseTool):
     name: str = "DocumentSearchTool"
     description: str = "Search the document for the given query string."
     args_schema: Type[BaseModel] = DocumentSearchToolInput
-    
+
     model_config = ConfigDict(extra="allow")
-    def __init__(self, file_path: str, db_path:str = db_path):
-        """Initialize the searcher with a PDF file path and set up the Qdrant collection."""
+    def __init__(self, file_path, db_path:str = db_path, progress=None, top_k: int = SEARCH_TOP_K,
+                 mode: str = SEARCH_MODE, rerank: bool = SEARCH_RERANK, owner: str = DEFAULT_OWNER,
+                 replace_versions: bool = False):
+        """Initialize the searcher and index the PDFs into the on-disk Qdrant collection.
+
+        file_path may be a PDF, a folder of PDFs, or a list of either. The index persists
+        at db_path; a manifest next to it records the content hash of every indexed document
+        and the hash of each of its pages, so an unchanged document is never embedded again.
+        A changed one is indexed as a new document; its unchanged chunks come from the
+        embedding cache. With replace_versions, it replaces the version previously indexed
+        from the same path instead, for files no other tool searches by an older version.
+        The documents are claimed by owner (see remove_documents).
+        progress, if given, is called with the ingestion progress after every document.
+
+        Searches return top_k chunks. mode "hybrid" fuses dense (Qdrant) and sparse (BM25)
+        results with reciprocal rank fusion, "dense" only uses Qdrant. rerank reorders the
+        fused candidates with a local cross-encoder.
+        """
         super().__init__()
         self.file_path = file_path
         self.db_path = db_path
-        self.client = QdrantClient(":memory:") 
-        self._process_document()
-
-    def _extract_text(self) -> str:
-        """Extract raw text from provided file path using Firecrawl."""
-
-        loader = PyPDFLoader(self.file_path)
-        docs = loader.load()
-        return docs
-    
-    # Assuming docs is a list of Document objects
-    def _create_chunks(self, docs: list) -> list:
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-        )
-        chunks = text_splitter.split_documents(docs)
-
-        return chunks
-
-    def _process_document(self):
-        """Process the document and add chunks to Qdrant collection."""
-        # clear existing collection if it exists
-        if self.client.collection_exists("demo_collection"):
-            self.client.delete_collection("demo_collection")
-
-        # create a new collection
-        docs = self._extract_text()
-        chunks = self._create_chunks(docs)
-        # os.path.basename() extracts the final component (filename) from any path string, regardless of the operating system or path format.
-        metadata = [{"source": os.path.basename(chunks[i].metadata['source']), 
-                     "page_number": chunks[i].metadata['page_label']} for i in range(len(chunks))]
-        print(metadata)
-        data = [str(chunks[i].page_content) for i in range(len(chunks))]
-        ids = list(range(len(chunks)))
-
-        self.client.add(
-            collection_name="demo_collection",
-            documents=data,
-            metadata=metadata,
-            ids=ids
-        )
-
-    def _run(self, query: dict) -> list:
-        """Search the document with a query string."""
-        query = query['query']
-        relevant_chunks = self.client.query(
-            collection_name="demo_collection",
-            query_text=query,
-        )
-        print(relevant_chunks)  # Debugging line to see the output
-        docs = [(chunk.document, chunk.metadata) for chunk in relevant_chunks]
+        self.manifest_path = os.path.join(os.path.dirname(db_path), "manifest.json")
+        self.top_k = top_k
+        self.mode = mode
+        self.rerank = rerank
+        self.client = get_client(db_path)
+        # Loaded once per process and shared by every tool instance and Streamlit session
+        self.embeddings = get_embedding_service()
+        self.bm25 = get_bm25_index(os.path.join(os.path.dirname(db_path), "bm25.db"))
+        with _index_locks[db_path]:
+            pipeline = IngestionPipeline(self.client, self.manifest_path, self.embeddings, self.bm25,
+                                         progress=progress, owner=owner, replace_versions=replace_versions)
+            self.doc_ids = pipeline.ingest(file_path)
+            documents = pipeline.manifest.documents
+            self.sources = [documents[doc_id]["source"] for doc_id in self.doc_ids]
+            self.chunk_count = sum(len(page["ids"]) for doc_id in set(self.doc_ids)
+                                   for page in documents[doc_id]["pages"].values())
+
+    # Chunks are joined best first, so trimming to the token budget drops the weakest ones
+    @traced_tool
+    @fits_budget(separator="\n___\n")
+    def _run(self, query: dict) -> str:
+        """Search the documents with a query string, optionally limited to the files named in query['source']."""
+        sources = None
+        if query.get('source'):
+            sources = [query['source']] if isinstance(query['source'], str) else list(query['source'])
+        return self.format_chunks(self.search(query['query'], sources))
+
+    def search(self, query: str, sources: list = None) -> list:
+        """Return the top_k chunk payloads for query, best first.
+
+        Each payload carries "score", its cosine similarity to the query, or None for
+        chunks only found by BM25. The latency of every stage is recorded on the
+        "document.search" span.
+        """
+        with span("document.search", mode=self.mode, rerank=self.rerank) as current:
+            conditions = [
+                # The collection is shared by every indexed document; only search this tool's corpus
+                models.FieldCondition(key="doc_id", match=models.MatchAny(any=self.doc_ids))
+            ]
+            if sources:
+                conditions.append(models.FieldCondition(key="source", match=models.MatchAny(any=sources)))
+            timings = {}
+            # Fetch more candidates than returned, so fusion and reranking have something to choose from
+            candidates = self.top_k * 3 if self.mode == "hybrid" or self.rerank else self.top_k
+
+            start = time.perf_counter()
+            query_vector = self.embeddings.embed_query(query)
+            timings["embed_ms"] = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            dense = self.client.query_points(
+                collection_name=COLLECTION_NAME,
+                query=query_vector,
+                query_filter=models.Filter(must=conditions),
+                limit=candidates,
+            ).points
+            timings["dense_ms"] = (time.perf_counter() - start) * 1000
+            payloads = {str(point.id): dict(point.payload, score=point.score) for point in dense}
+            ranked = list(payloads)
+
+            if self.mode == "hybrid":
+                start = time.perf_counter()
+                sparse = [point_id for point_id, _ in self.bm25.search(query, candidates, self.doc_ids, sources)]
+                timings["sparse_ms"] = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                ranked = reciprocal_rank_fusion([ranked, sparse])[:candidates]
+                # Chunks only found by BM25 still need their text
+                missing = [point_id for point_id in ranked if point_id not in payloads]
+                if missing:
+                    payloads.update((str(point.id), dict(point.payload, score=None))
+                                    for point in self.client.retrieve(COLLECTION_NAME, ids=missing))
+                ranked = [point_id for point_id in ranked if point_id in payloads]
+                timings["fusion_ms"] = (time.perf_counter() - start) * 1000
+
+            reranker = get_reranker() if self.rerank else None
+            if reranker is not None and ranked:
+                start = time.perf_counter()
+                order = reranker.rerank(query, [payloads[point_id]["document"] for point_id in ranked])
+                ranked = [ranked[i] for i in order]
+                timings["rerank_ms"] = (time.perf_counter() - start) * 1000
+
+            # Stage latencies go to the span: the tool is shared by concurrent sessions
+            chunks = [payloads[point_id] for point_id in ranked[:self.top_k]]
+            current.set(chunks=len(chunks), **{stage: round(ms, 1) for stage, ms in timings.items()})
+            return chunks
+
+    @staticmethod
+    def format_chunks(chunks: list) -> str:
+        docs = [(chunk["document"], {"source": chunk.get("source"), "page_number": chunk.get("page_number")})
+                for chunk in chunks]
         separator = "\n___\n"
         return separator.join([f"Document: {doc}, Metadata: {meta}" for doc, meta in docs])
@@ -0,0 +1,54 @@
+import glob
+import hashlib
+import os
+import time
+
+# Document helpers without the heavy ingestion dependencies (qdrant, the PDF loader), so
+# the index registry and the HTTP API can hash uploads without loading them at start-up
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+
+def file_hash(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def collect_pdfs(paths) -> list:
+    """Expand a path, a folder or a list of them into a sorted list of PDF files."""
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "**", "*.pdf"), recursive=True))
+        else:
+            files.append(path)
+    return sorted(set(files))
+
+
+def remove_old_uploads(upload_dir: str, max_age: int, keep=()):
+    """Remove the <sha256>/ upload folders older than max_age seconds, except those in keep.
+
+    keep holds the content hashes still referenced, e.g. IndexRegistry.documents_in_use().
+    """
+    now = time.time()
+    for folder in os.listdir(upload_dir):
+        path = os.path.join(upload_dir, folder)
+        if folder in keep:
+            continue
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                for name in os.listdir(path):
+                    os.remove(os.path.join(path, name))
+                os.rmdir(path)
+        except OSError:
+            # Another session is cleaning up (or writing) the same folder
+            pass
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+from fastembed import TextEmbedding
+from src.tools.tracing import span
+
+# Same model Qdrant's fastembed integration used by default
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# ONNX Runtime threads per model; None lets it use every core
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS")) if os.getenv("EMBEDDING_THREADS") else None
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "embeddings.db")
+)
+
+
+class EmbeddingService:
+    """Embeds chunks and queries for DocumentSearchTool.
+
+    - Chunk embeddings are cached on disk, keyed by the model and sha256 of the text,
+      so re-indexing a document (or indexing a copy) does not run the model again.
+    - Query embeddings are kept in an in-memory LRU, so repeated questions skip the model.
+    Use get_embedding_service() to share one loaded model per process.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 threads: int = EMBEDDING_THREADS, cache_path: str = EMBEDDING_CACHE_PATH,
+                 query_cache_size: int = QUERY_CACHE_SIZE):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = TextEmbedding(model_name=model_name, threads=threads)
+        self.dim = len(next(iter(self.model.embed(["dimension probe"]))))
+        self.cache_path = cache_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._queries = OrderedDict()
+        self._query_cache_size = query_cache_size
+        self._lock = threading.Lock()
+        self.stats = {"query_hits": 0, "query_misses": 0, "chunk_hits": 0, "chunk_misses": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        # One SQLite connection per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.cache_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: list) -> list:
+        """Embed chunks in batches, reusing cached embeddings."""
+        keys = [self._key(text) for text in texts]
+        vectors = {}
+        conn = self._connect()
+        # SQLite limits the number of query parameters, so look keys up in slices
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            rows = conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+            ).fetchall()
+            vectors.update((key, np.frombuffer(blob, dtype=np.float32).tolist()) for key, blob in rows)
+
+        missing = [(key, text) for key, text in zip(keys, texts) if key not in vectors]
+        if missing:
+            with span("embedding.documents", model=self.model_name, texts=len(missing),
+                      input_bytes=sum(len(text.encode("utf-8")) for _, text in missing)):
+                embedded = self.model.embed([text for _, text in missing], batch_size=self.batch_size)
+                rows = []
+                for (key, _), vector in zip(missing, embedded):
+                    vector = np.asarray(vector, dtype=np.float32)
+                    vectors[key] = vector.tolist()
+                    rows.append((key, vector.tobytes()))
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+        with self._lock:
+            self.stats["chunk_hits"] += len(texts) - len(missing)
+            self.stats["chunk_misses"] += len(missing)
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list:
+        """Embed a search query, served from the LRU for repeated questions."""
+        key = " ".join(text.split())
+        with self._lock:
+            vector = self._queries.get(key)
+            if vector is not None:
+                self._queries.move_to_end(key)
+                self.stats["query_hits"] += 1
+                return vector
+            self.stats["query_misses"] += 1
+        # query_embed applies the model's query prefix where it has one
+        with span("embedding.query", model=self.model_name, input_bytes=len(key.encode("utf-8"))):
+            vector = np.asarray(next(iter(self.model.query_embed(key))), dtype=np.float32).tolist()
+        with self._lock:
+            self._queries[key] = vector
+            while len(self._queries) > self._query_cache_size:
+                self._queries.popitem(last=False)
+        return vector
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: str = EMBEDDING_MODEL) -> EmbeddingService:
+    """Return the process-wide service for model_name, loading the model on first use.
+
+    Tool instances and Streamlit sessions of one process all share it.
+    """
+    with _services_lock:
+        if model_name not in _services:
+            _services[model_name] = EmbeddingService(model_name=model_name)
+        return _services[model_name]
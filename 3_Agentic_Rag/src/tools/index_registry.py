@@ -0,0 +1,215 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from src.tools.documents import CHUNK_SIZE, collect_pdfs, file_hash
+
+# Process-wide registry of document search tools, shared by every Streamlit session.
+# An entry is keyed by the content hashes of its PDFs, so sessions uploading the same
+# documents share one read-only DocumentSearchTool and one crew template instead of each
+# building their own. Entries count the sessions holding them; a session that has not
+# been seen for INDEX_SESSION_IDLE_TIMEOUT seconds no longer counts (Streamlit does not
+# report closed sessions). When the estimated size of the registered indexes exceeds
+# INDEX_MAX_MB, unheld entries are evicted least recently used first, and the registry
+# drops its claim on documents no other entry uses. Their points are removed unless
+# another indexer (the crew's knowledge PDF, src.ingest) claims them too; embeddings
+# stay cached on disk, so indexing them again is cheap.
+INDEX_MAX_BYTES = int(os.getenv("INDEX_MAX_MB", "512")) * 1024 * 1024
+SESSION_IDLE_TIMEOUT = int(os.getenv("INDEX_SESSION_IDLE_TIMEOUT", str(30 * 60)))
+# Estimated bytes held per indexed chunk besides its vector: payload text and bookkeeping
+CHUNK_OVERHEAD_BYTES = CHUNK_SIZE + 512
+# Owner of the documents the registry indexes, in the index manifest
+INDEX_OWNER = "registry"
+
+
+def index_key(doc_ids) -> str:
+    return hashlib.sha256("\n".join(sorted(set(doc_ids))).encode("utf-8")).hexdigest()[:16]
+
+
+class _Entry:
+    def __init__(self, doc_ids: list):
+        self.doc_ids = doc_ids
+        # Resolves to the DocumentSearchTool; sessions asking while it is built wait for it
+        self.future = Future()
+        self.crew = None
+        self.size = 0
+        # Session id -> last time it used the entry
+        self.holders = {}
+        self.lock = threading.Lock()
+
+
+class IndexRegistry:
+    def __init__(self, max_bytes: int = INDEX_MAX_BYTES, idle_timeout: int = SESSION_IDLE_TIMEOUT, db_path: str = None):
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self.db_path = db_path
+        # key -> _Entry, least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # (holder, key) -> [doc ids, last seen]: kept when the entry is evicted, so the files
+        # a session may index again are not deleted while it is active
+        self._held = {}
+        # Crew template of sessions without documents
+        self._web_only_crew = None
+        self.builds = 0
+        self.shared = 0
+        self.evictions = 0
+
+    def _holders(self, entry: _Entry, now: float) -> int:
+        for holder, seen in list(entry.holders.items()):
+            if now - seen > self.idle_timeout:
+                del entry.holders[holder]
+        return len(entry.holders)
+
+    def acquire(self, paths, holder: str, progress=None) -> str:
+        """Return the key of the index over the PDFs at paths, building it if no session did yet."""
+        from src.tools.custom_tool import DocumentSearchTool, db_path
+
+        doc_ids = sorted({file_hash(path) for path in collect_pdfs(paths)})
+        key = index_key(doc_ids)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.future.done() and entry.future.exception() is not None:
+                # A failed build is retried
+                del self._entries[key]
+                entry = None
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = _Entry(doc_ids)
+                self.builds += 1
+            else:
+                self.shared += 1
+            self._entries.move_to_end(key)
+            entry.holders[holder] = time.time()
+            self._held[(holder, key)] = [doc_ids, entry.holders[holder]]
+        if not owner:
+            entry.future.result()
+            return key
+
+        try:
+            tool = DocumentSearchTool(file_path=paths, db_path=self.db_path or db_path, progress=progress,
+                                      owner=INDEX_OWNER)
+        except BaseException as e:
+            entry.future.set_exception(e)
+            raise
+        entry.size = tool.chunk_count * (tool.embeddings.dim * 4 + CHUNK_OVERHEAD_BYTES)
+        entry.future.set_result(tool)
+        self._evict()
+        return key
+
+    def touch(self, key: str, holder: str) -> bool:
+        """Mark the entry as used by holder; False when it no longer exists (evicted or failed)."""
+        with self._lock:
+            if (holder, key) in self._held:
+                self._held[(holder, key)][1] = time.time()
+            entry = self._entries.get(key)
+            if entry is None or (entry.future.done() and entry.future.exception() is not None):
+                return False
+            entry.holders[holder] = time.time()
+            self._entries.move_to_end(key)
+            return True
+
+    def release(self, key: str, holder: str):
+        with self._lock:
+            self._held.pop((holder, key), None)
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.holders.pop(holder, None)
+        self._evict()
+
+    def _entry(self, key: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            raise KeyError(f"Index {key} is not registered; it was evicted or never acquired")
+        return entry
+
+    def tool(self, key: str):
+        """The shared DocumentSearchTool of key; only ever read by the sessions."""
+        return self._entry(key).future.result()
+
+    def crew(self, key: str, factory):
+        """The crew template of key, built once with factory(tool); run copies of it, never the template.
+
+        key None is the crew of sessions without documents: factory(None).
+        """
+        if key is None:
+            with self._lock:
+                if self._web_only_crew is None:
+                    self._web_only_crew = factory(None)
+                return self._web_only_crew
+        entry = self._entry(key)
+        tool = entry.future.result()
+        with entry.lock:
+            if entry.crew is None:
+                entry.crew = factory(tool)
+            return entry.crew
+
+    def _evict(self):
+        from src.tools.custom_tool import remove_documents, db_path
+
+        now = time.time()
+        removed = []
+        with self._lock:
+            total = sum(entry.size for entry in self._entries.values())
+            for key in list(self._entries):
+                if total <= self.max_bytes:
+                    break
+                entry = self._entries[key]
+                if not entry.future.done() or self._holders(entry, now):
+                    continue
+                del self._entries[key]
+                total -= entry.size
+                self.evictions += 1
+                removed.extend(entry.doc_ids)
+        if removed:
+            # Outside the registry lock; the documents still in use are checked again under
+            # the index lock, which a session acquiring them meanwhile needs to index them
+            remove_documents(set(removed), self.db_path or db_path, owner=INDEX_OWNER, in_use=self._in_use)
+
+    def _in_use(self) -> set:
+        with self._lock:
+            return {doc_id for entry in self._entries.values() for doc_id in entry.doc_ids}
+
+    def documents_in_use(self) -> set:
+        """Ids (content hashes) of the documents of every entry and of every active holder.
+
+        Holders count until they release or stay idle for idle_timeout, even when their entry
+        was evicted: they index the same files again on their next question.
+        """
+        now = time.time()
+        with self._lock:
+            for held, (_, seen) in list(self._held.items()):
+                if now - seen > self.idle_timeout:
+                    del self._held[held]
+            in_use = {doc_id for doc_ids, _ in self._held.values() for doc_id in doc_ids}
+            return in_use | {doc_id for entry in self._entries.values() for doc_id in entry.doc_ids}
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            ready = [entry for entry in self._entries.values() if entry.future.done()]
+            return {
+                "entries": len(self._entries),
+                "sessions": sum(self._holders(entry, now) for entry in self._entries.values()),
+                "estimated_bytes": sum(entry.size for entry in ready),
+                "max_bytes": self.max_bytes,
+                "builds": self.builds,
+                "shared": self.shared,
+                "evictions": self.evictions,
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_index_registry() -> IndexRegistry:
+    """Return the process-wide index registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = IndexRegistry()
+        return _registry
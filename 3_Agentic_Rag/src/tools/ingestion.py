@@ -0,0 +1,280 @@
+import json
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from qdrant_client import models
+from src.tools.documents import CHUNK_OVERLAP, CHUNK_SIZE, collect_pdfs, file_hash, text_hash
+
+COLLECTION_NAME = "demo_collection"
+# Bump when the way points are stored changes, so existing indexes are rebuilt
+INDEX_VERSION = 4
+
+# Ingestion pipeline tuning
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+
+# Namespace for deterministic point ids, so re-running an interrupted ingestion
+# overwrites the points it already wrote instead of duplicating them
+POINT_NAMESPACE = uuid.UUID("6f1c2a3e-4b5d-4e6f-8a9b-0c1d2e3f4a5b")
+# Indexer claiming the documents it ingests unless told otherwise (the crew, the CLI);
+# documents of manifests written before owners were recorded belong to it too
+DEFAULT_OWNER = "default"
+
+
+def extract_and_chunk(file_path: str) -> dict:
+    """Extract and chunk one PDF. Runs in a worker process.
+
+    Each page is chunked on its own, so pages can later be re-embedded independently.
+    """
+    # os.path.basename() extracts the final component (filename) from any path string, regardless of the operating system or path format.
+    source = os.path.basename(file_path)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+    )
+    pages = []
+    for page_index, page in enumerate(PyPDFLoader(file_path).load()):
+        chunks = splitter.split_documents([page])
+        pages.append({
+            "index": str(page_index),
+            "hash": text_hash(page.page_content),
+            "chunks": [{"text": str(chunk.page_content),
+                        "page_number": chunk.metadata.get("page_label", chunk.metadata.get("page"))}
+                       for chunk in chunks],
+        })
+    return {"path": file_path, "source": source, "pages": pages}
+
+
+class IndexManifest:
+    """What is stored in the collection: one entry per indexed document, keyed by content hash.
+
+    Each entry records the source file name, the resolved path it was read from, the
+    indexers (owners) using it and, for every page, its text hash and point ids.
+    """
+
+    def __init__(self, client, path: str, embeddings, bm25):
+        self.client = client
+        self.path = path
+        self.settings = {
+            "version": INDEX_VERSION,
+            "collection": COLLECTION_NAME,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "embedding_model": embeddings.model_name,
+            "embedding_dim": embeddings.dim,
+        }
+        data = None
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                data = json.load(f)
+        if data is None or data.get("settings") != self.settings:
+            # New or stale index: start again from an empty collection
+            if client.collection_exists(COLLECTION_NAME):
+                client.delete_collection(COLLECTION_NAME)
+            bm25.clear()
+            data = {"settings": self.settings, "documents": {}}
+        if not client.collection_exists(COLLECTION_NAME):
+            client.create_collection(
+                COLLECTION_NAME,
+                vectors_config=models.VectorParams(size=embeddings.dim, distance=models.Distance.COSINE),
+            )
+        self.documents = data["documents"]
+
+    def find_path(self, path: str, exclude=()):
+        """Return the id of the indexed document last read from path, if any."""
+        path = os.path.realpath(path)
+        return next((doc_id for doc_id, doc in self.documents.items()
+                     if doc.get("path") == path and doc_id not in exclude), None)
+
+    def save(self):
+        # Write then rename, so a crash never leaves a half-written manifest
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"settings": self.settings, "documents": self.documents}, f)
+        os.replace(tmp_path, self.path)
+
+
+class IngestionPipeline:
+    """Index many PDFs into one collection.
+
+    Stages: PDF extraction and chunking in a process pool -> batched embedding ->
+    bulk upsert. At most `max_pending` documents are extracted ahead of the embedder,
+    which bounds memory, and the manifest is saved after every document, so an
+    interrupted ingestion resumes where it stopped.
+
+    With replace_versions, a PDF whose content changed replaces the document previously
+    indexed from the same path, reusing its unchanged pages. Otherwise every version is
+    a document of its own: other tools may still search the old one.
+
+    Every document ingested is claimed by owner; remove() only deletes the points of
+    documents no other owner claims.
+    """
+
+    def __init__(self, client, manifest_path: str, embeddings, bm25, workers: int = INGEST_WORKERS,
+                 batch_size: int = INGEST_BATCH_SIZE, max_pending: int = None, progress=None,
+                 replace_versions: bool = False, owner: str = DEFAULT_OWNER):
+        self.client = client
+        # EmbeddingService: batches the model calls and caches chunk embeddings on disk
+        self.embeddings = embeddings
+        # BM25Index: the sparse index kept in step with the collection
+        self.bm25 = bm25
+        self.manifest = IndexManifest(client, manifest_path, embeddings, bm25)
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.max_pending = max_pending or 2 * self.workers
+        # Called with a dict after every document: files_done, files_total, chunks_embedded, chunks_reused, elapsed
+        self.progress = progress
+        self.replace_versions = replace_versions
+        self.owner = owner
+        self.stats = {"files_done": 0, "files_total": 0, "chunks_embedded": 0, "chunks_reused": 0}
+        self._ingesting = set()
+
+    def ingest(self, paths) -> list:
+        """Index the PDFs under paths and return their document ids."""
+        start = time.time()
+        files = collect_pdfs(paths)
+        doc_ids = {path: file_hash(path) for path in files}
+        todo = []
+        for path in files:
+            # Skip indexed documents, and copies of the same file in several folders
+            if doc_ids[path] not in self.manifest.documents and doc_ids[path] not in self._ingesting:
+                todo.append(path)
+                self._ingesting.add(doc_ids[path])
+        self.stats["files_total"] = len(files)
+        self.stats["files_done"] = len(files) - len(todo)
+        self._report(start)
+
+        for extracted in self._extract(todo):
+            self._index(extracted, doc_ids[extracted["path"]])
+            self.stats["files_done"] += 1
+            self._report(start)
+        self._claim(set(doc_ids.values()))
+        return [doc_ids[path] for path in files]
+
+    def _claim(self, doc_ids: set):
+        """Record owner as a user of the documents, so other indexers do not remove them."""
+        documents = self.manifest.documents
+        claimed = False
+        for doc_id in doc_ids:
+            owners = documents[doc_id].setdefault("owners", [DEFAULT_OWNER])
+            if self.owner not in owners:
+                owners.append(self.owner)
+                claimed = True
+        if claimed:
+            self.manifest.save()
+
+    def _extract(self, files: list):
+        """Yield extracted documents, keeping at most max_pending in flight."""
+        if self.workers == 1 or len(files) <= 1:
+            # Not worth starting processes for a single upload
+            for path in files:
+                yield extract_and_chunk(path)
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            remaining = iter(files)
+            for path in remaining:
+                pending.append(executor.submit(extract_and_chunk, path))
+                if len(pending) >= self.max_pending:
+                    break
+            while pending:
+                extracted = pending.popleft().result()
+                next_path = next(remaining, None)
+                if next_path is not None:
+                    pending.append(executor.submit(extract_and_chunk, next_path))
+                yield extracted
+
+    def _index(self, extracted: dict, doc_id: str):
+        """Upsert one document's changed pages and record it in the manifest."""
+        documents = self.manifest.documents
+        source = extracted["source"]
+        # A previous version of the same file: its unchanged pages are reused
+        previous_id = None
+        if self.replace_versions:
+            previous_id = self.manifest.find_path(extracted["path"], exclude=self._ingesting)
+        previous_pages = documents[previous_id]["pages"] if previous_id else {}
+
+        pages = {}
+        reused_ids, stale_ids = [], []
+        data, metadata, ids = [], [], []
+        for page in extracted["pages"]:
+            previous = previous_pages.get(page["index"])
+            if previous is not None and previous["hash"] == page["hash"]:
+                pages[page["index"]] = previous
+                reused_ids.extend(previous["ids"])
+                continue
+            if previous is not None:
+                stale_ids.extend(previous["ids"])
+            page_ids = [str(uuid.uuid5(POINT_NAMESPACE, f"{doc_id}:{page['index']}:{i}"))
+                        for i in range(len(page["chunks"]))]
+            pages[page["index"]] = {"hash": page["hash"], "ids": page_ids}
+            for chunk in page["chunks"]:
+                data.append(chunk["text"])
+                metadata.append({"source": source, "page_number": chunk["page_number"], "doc_id": doc_id})
+            ids.extend(page_ids)
+        # Pages that no longer exist in the new version
+        for page_index, previous in previous_pages.items():
+            if page_index not in pages:
+                stale_ids.extend(previous["ids"])
+
+        if stale_ids:
+            self.client.delete(COLLECTION_NAME, points_selector=models.PointIdsList(points=stale_ids))
+            self.bm25.remove(stale_ids)
+        if reused_ids:
+            self.client.set_payload(COLLECTION_NAME, payload={"doc_id": doc_id}, points=reused_ids)
+            self.bm25.reassign(reused_ids, doc_id)
+        for i in range(0, len(data), self.batch_size):
+            texts = data[i:i + self.batch_size]
+            vectors = self.embeddings.embed_documents(texts)
+            self.client.upsert(
+                COLLECTION_NAME,
+                points=[models.PointStruct(id=point_id, vector=vector, payload=dict(meta, document=text))
+                        for point_id, vector, meta, text in zip(ids[i:i + self.batch_size], vectors,
+                                                                metadata[i:i + self.batch_size], texts)],
+            )
+            self.bm25.add(ids[i:i + self.batch_size], texts, metadata[i:i + self.batch_size])
+
+        owners = [self.owner]
+        if previous_id:
+            # The new version replaces the old one for everyone using it
+            owners = sorted(set(documents[previous_id].get("owners", [DEFAULT_OWNER])) | {self.owner})
+            del documents[previous_id]
+        documents[doc_id] = {"source": source, "path": os.path.realpath(extracted["path"]),
+                             "owners": owners, "pages": pages}
+        self.manifest.save()
+        self.stats["chunks_embedded"] += len(data)
+        self.stats["chunks_reused"] += len(reused_ids)
+
+    def remove(self, doc_ids) -> int:
+        """Drop owner's claim on documents; returns the chunks removed.
+
+        Documents no other owner claims are dropped from the collection, the BM25 index
+        and the manifest.
+        """
+        documents = self.manifest.documents
+        removed = []
+        for doc_id in doc_ids:
+            if doc_id not in documents:
+                continue
+            owners = [owner for owner in documents[doc_id].get("owners", [DEFAULT_OWNER]) if owner != self.owner]
+            if owners:
+                documents[doc_id]["owners"] = owners
+            else:
+                removed.append(doc_id)
+        point_ids = [point_id for doc_id in removed
+                     for page in documents[doc_id]["pages"].values() for point_id in page["ids"]]
+        if point_ids:
+            self.client.delete(COLLECTION_NAME, points_selector=models.PointIdsList(points=point_ids))
+            self.bm25.remove(point_ids)
+        for doc_id in removed:
+            del documents[doc_id]
+        self.manifest.save()
+        return len(point_ids)
+
+    def _report(self, start: float):
+        if self.progress is not None:
+            self.progress(dict(self.stats, elapsed=round(time.time() - start, 2)))
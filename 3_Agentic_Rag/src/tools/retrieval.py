@@ -0,0 +1,160 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+# Sparse side of the hybrid retrieval: a BM25 inverted index kept next to the Qdrant
+# collection, updated by the ingestion pipeline whenever points are written or deleted.
+BM25_PATH = os.getenv(
+    "BM25_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "bm25.db")
+)
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Constant of reciprocal rank fusion: score = sum(1 / (RRF_K + rank)) over the rankings
+RRF_K = 60
+# Optional local cross-encoder used to rerank the fused candidates
+RERANK_MODEL = os.getenv("RERANK_MODEL", "Xenova/ms-marco-MiniLM-L-6-v2")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "he", "in", "is", "it",
+    "its", "of", "on", "or", "that", "the", "to", "was", "were", "will", "with", "what", "which",
+    "who", "how", "why", "when", "where", "does", "do", "this", "these", "those",
+}
+
+
+def tokenize(text: str) -> list:
+    return [token for token in re.findall(r"\w+", text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """BM25 inverted index stored in SQLite, one row per (term, chunk)."""
+
+    def __init__(self, path: str = BM25_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS chunks (
+                point_id TEXT PRIMARY KEY, doc_id TEXT NOT NULL, source TEXT NOT NULL, length INTEGER NOT NULL)""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL, point_id TEXT NOT NULL, tf INTEGER NOT NULL, PRIMARY KEY (term, point_id))""")
+            conn.execute("CREATE INDEX IF NOT EXISTS postings_point ON postings (point_id)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One SQLite connection per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, point_ids: list, texts: list, metadata: list):
+        """Index chunks; re-adding a point replaces its postings."""
+        chunks, postings = [], []
+        for point_id, text, meta in zip(point_ids, texts, metadata):
+            terms = Counter(tokenize(text))
+            chunks.append((point_id, meta["doc_id"], meta["source"], sum(terms.values())))
+            postings.extend((term, point_id, tf) for term, tf in terms.items())
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM postings WHERE point_id = ?", [(point_id,) for point_id in point_ids])
+            conn.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?)", chunks)
+            conn.executemany("INSERT INTO postings VALUES (?, ?, ?)", postings)
+
+    def remove(self, point_ids: list):
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM postings WHERE point_id = ?", [(point_id,) for point_id in point_ids])
+            conn.executemany("DELETE FROM chunks WHERE point_id = ?", [(point_id,) for point_id in point_ids])
+
+    def reassign(self, point_ids: list, doc_id: str):
+        """Move chunks to another document id, like set_payload does for the Qdrant points."""
+        with self._connect() as conn:
+            conn.executemany("UPDATE chunks SET doc_id = ? WHERE point_id = ?", [(doc_id, point_id) for point_id in point_ids])
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM postings")
+            conn.execute("DELETE FROM chunks")
+
+    def search(self, query: str, limit: int, doc_ids: list = None, sources: list = None) -> list:
+        """Return [(point_id, score)] of the best BM25 matches, best first."""
+        terms = list(set(tokenize(query)))
+        if not terms:
+            return []
+        conn = self._connect()
+        total, avg_length = conn.execute("SELECT COUNT(*), AVG(length) FROM chunks").fetchone()
+        if not total:
+            return []
+        placeholders = ",".join("?" * len(terms))
+        doc_freq = dict(conn.execute(
+            f"SELECT term, COUNT(*) FROM postings WHERE term IN ({placeholders}) GROUP BY term", terms
+        ).fetchall())
+        idf = {term: math.log(1 + (total - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+        sql = (f"SELECT p.point_id, p.term, p.tf, c.length FROM postings p JOIN chunks c ON c.point_id = p.point_id "
+               f"WHERE p.term IN ({placeholders})")
+        params = list(terms)
+        if doc_ids is not None:
+            sql += f" AND c.doc_id IN ({','.join('?' * len(doc_ids))})"
+            params.extend(doc_ids)
+        if sources:
+            sql += f" AND c.source IN ({','.join('?' * len(sources))})"
+            params.extend(sources)
+
+        scores = Counter()
+        for point_id, term, tf, length in conn.execute(sql, params):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            scores[point_id] += idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores.most_common(limit)
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = RRF_K) -> list:
+    """Fuse several rankings (lists of ids, best first) into one list of ids, best first."""
+    scores = Counter()
+    for ranking in rankings:
+        for rank, point_id in enumerate(ranking, start=1):
+            scores[point_id] += 1.0 / (k + rank)
+    return [point_id for point_id, _ in scores.most_common()]
+
+
+class Reranker:
+    """Local cross-encoder that scores (query, chunk) pairs jointly."""
+
+    def __init__(self, model_name: str = RERANK_MODEL):
+        from fastembed.rerank.cross_encoder import TextCrossEncoder
+        self.model_name = model_name
+        self.model = TextCrossEncoder(model_name=model_name)
+
+    def rerank(self, query: str, texts: list) -> list:
+        """Return the indexes of texts, most relevant first."""
+        scores = list(self.model.rerank(query, texts))
+        return sorted(range(len(texts)), key=lambda i: scores[i], reverse=True)
+
+
+_bm25_indexes = {}
+_reranker = None
+_lock = threading.Lock()
+
+
+def get_bm25_index(path: str = BM25_PATH) -> BM25Index:
+    """Return the process-wide BM25 index stored at path."""
+    with _lock:
+        if path not in _bm25_indexes:
+            _bm25_indexes[path] = BM25Index(path)
+        return _bm25_indexes[path]
+
+
+def get_reranker():
+    """Return the process-wide reranker, or None when the installed fastembed has no cross-encoders."""
+    global _reranker
+    with _lock:
+        if _reranker is None:
+            try:
+                _reranker = Reranker()
+            except ImportError:
+                print("Reranking disabled: this fastembed version has no TextCrossEncoder")
+                _reranker = False
+        return _reranker or None
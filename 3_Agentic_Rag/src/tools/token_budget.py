@@ -0,0 +1,14 @@
+import os
+from crew_common import token_budget as _token_budget
+from crew_common.token_budget import (TokenBudget, compress, count_tokens, current_budget, fits_budget,
+                                      reset_budget, run_within_budget, set_budget, truncate)
+
+# This project's token budget settings; the implementation is crew_common/token_budget.py.
+# Token budget of one question: retrieved chunks and web results are trimmed before they
+# reach the agents, dropping the lowest ranked chunks first.
+TOKEN_BUDGET = int(os.getenv("TOKEN_BUDGET", "20000"))
+# Bounds of what a single tool call may return
+TOOL_OUTPUT_MAX_TOKENS = int(os.getenv("TOOL_OUTPUT_MAX_TOKENS", "3000"))
+TOOL_OUTPUT_MIN_TOKENS = int(os.getenv("TOOL_OUTPUT_MIN_TOKENS", "300"))
+
+_token_budget.configure(TOKEN_BUDGET, TOOL_OUTPUT_MAX_TOKENS, TOOL_OUTPUT_MIN_TOKENS)
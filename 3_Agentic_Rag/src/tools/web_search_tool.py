@@ -0,0 +1,13 @@
+from crewai_tools import SerperDevTool
+from src.tools.token_budget import fits_budget
+from src.tools.tracing import traced_tool
+
+
+class WebSearchTool(SerperDevTool):
+    """SerperDevTool whose results are fitted to the current question's token budget."""
+
+    # Results are ordered best first, so cutting whole JSON lines drops the weakest ones
+    @traced_tool
+    @fits_budget(separator="\n")
+    def _run(self, **kwargs):
+        return super()._run(**kwargs)
@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("crewai")
+pytest.importorskip("fastapi")
+
+from crewai.tools import BaseTool
+
+
+class FakeSearchTool(BaseTool):
+    name: str = "DocumentSearchTool"
+    description: str = "Search the uploaded documents."
+
+    def _run(self, query: dict) -> str:
+        return ""
+
+
+@pytest.fixture
+def api_app(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("SERPER_API_KEY", "test")
+    import api_app
+    return api_app
+
+
+def test_index_crew_retriever_searches_the_index_tool(api_app, monkeypatch):
+    import src.crew
+
+    def default_tool():
+        raise AssertionError("the knowledge PDF must not be indexed for an uploaded index")
+
+    monkeypatch.setattr(src.crew, "get_pdf_tool", default_tool)
+    tool = FakeSearchTool()
+    crew = api_app.build_crew(tool)
+    retriever = crew.agents[0]
+    assert retriever.tools[0] is tool
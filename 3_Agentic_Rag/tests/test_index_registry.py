@@ -0,0 +1,65 @@
+import hashlib
+import os
+import subprocess
+import sys
+import time
+import types
+
+import pytest
+
+from src.tools.documents import remove_old_uploads
+from src.tools.index_registry import IndexRegistry
+
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_registry_import_does_not_load_the_ingestion_dependencies():
+    # The HTTP API imports the registry at start-up; qdrant and the PDF loader must load lazily
+    code = ("import sys, src.tools.index_registry; "
+            "print(sorted(m for m in ('qdrant_client', 'langchain_community') if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], cwd=PROJECT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
+
+
+class FakeSearchTool:
+    def __init__(self, file_path, db_path, progress=None, owner=None):
+        self.chunk_count = 1
+        self.embeddings = types.SimpleNamespace(dim=1)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    fake = types.ModuleType("src.tools.custom_tool")
+    fake.DocumentSearchTool = FakeSearchTool
+    fake.db_path = ""
+    fake.remove_documents = lambda doc_ids, db_path, owner=None, in_use=None: 0
+    monkeypatch.setitem(sys.modules, "src.tools.custom_tool", fake)
+    return IndexRegistry(max_bytes=0, idle_timeout=60)
+
+
+def write_upload(upload_dir, data: bytes, age: float) -> str:
+    folder = upload_dir / hashlib.sha256(data).hexdigest()
+    folder.mkdir()
+    path = folder / "doc.pdf"
+    path.write_bytes(data)
+    old = time.time() - age
+    os.utime(folder, (old, old))
+    return str(path)
+
+
+def test_old_uploads_of_an_evicted_index_are_kept_while_its_session_is_active(registry, tmp_path):
+    used = write_upload(tmp_path, b"used", age=3600)
+    unused = write_upload(tmp_path, b"unused", age=3600)
+    key = registry.acquire([used], "session")
+    # The session went idle and the index was evicted; the session may come back to it
+    registry._entries[key].holders.clear()
+    registry._evict()
+    assert not registry.touch(key, "session")
+
+    remove_old_uploads(str(tmp_path), 60, keep=registry.documents_in_use())
+    assert os.path.exists(used)
+    assert not os.path.exists(os.path.dirname(unused))
+
+    registry.release(key, "session")
+    remove_old_uploads(str(tmp_path), 60, keep=registry.documents_in_use())
+    assert not os.path.exists(os.path.dirname(used))
@@ -0,0 +1,25 @@
+import threading
+
+from src.query_pool import QueryPool
+
+
+def test_cancelled_queries_leave_the_queue():
+    pool = QueryPool(max_workers=1, max_queue=2)
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait()
+
+    running, = pool.submit([(block,)], "crew")
+    started.wait()
+    try:
+        for _ in range(3):
+            # Queued behind the running query, then dropped, e.g. by a client going away
+            queued = pool.submit([(str, "a"), (str, "b")], "crew")
+            assert all(future.cancel() for future in queued)
+        assert pool.stats()["queued"] == 0
+    finally:
+        release.set()
+        running.result()
+        pool.shutdown()
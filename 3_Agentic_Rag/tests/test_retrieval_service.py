@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("crewai")
+
+from src.retrieval_service import RetrievalService
+
+
+class SlowPdfTool:
+    name = "DocumentSearchTool"
+
+    def __init__(self, delay: float, score: float):
+        self.delay = delay
+        self.score = score
+
+    def search(self, query: str) -> list:
+        time.sleep(self.delay)
+        return [{"document": query, "score": self.score, "source": "a.pdf", "page_number": 1}]
+
+    @staticmethod
+    def format_chunks(chunks: list) -> str:
+        return "\n___\n".join(chunk["document"] for chunk in chunks)
+
+
+class FakeWebTool:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def _run(self, search_query: str) -> str:
+        self.calls += 1
+        time.sleep(self.delay)
+        return f"web results for {search_query}"
+
+
+def test_searches_past_the_deadline_do_not_hold_up_retrieval():
+    service = RetrievalService(SlowPdfTool(delay=3, score=0.1), FakeWebTool(delay=3), None, "",
+                               deadline=0.3, web_delay=0.1)
+    start = time.perf_counter()
+    # asyncio.run, like answer(): it must not wait for the abandoned search threads
+    retrieval = asyncio.run(service.retrieve("dspy modules"))
+    assert time.perf_counter() - start < 1.5
+    assert retrieval["timed_out"] == ["pdf", "web"]
+    assert retrieval["sections"] == []
+
+
+def test_sufficient_pdf_result_skips_the_web_search():
+    web = FakeWebTool()
+    service = RetrievalService(SlowPdfTool(delay=0, score=0.9), web, None, "", web_delay=1)
+    retrieval = asyncio.run(service.retrieve("dspy modules"))
+    assert retrieval["sufficient_pdf"] and not retrieval["web_searched"]
+    assert web.calls == 0
+    assert [title for title, _ in retrieval["sections"]] == ["PDF"]
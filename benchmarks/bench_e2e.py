@@ -0,0 +1,160 @@
+"""End-to-end benchmark of the three apps with recorded LLM and HTTP responses.
+
+Record the fixture once (needs the live API keys):
+    python benchmarks/bench_e2e.py trip --mode record
+Then replay it as often as needed, offline and deterministically:
+    python benchmarks/bench_e2e.py trip --requests 20 --concurrency 4 --llm-latency 0.5
+Apps: trip (TripCrew), rag (AgenticRag crew), rag-service (AgenticRag retrieval service),
+intro (generate_content). The rag apps ask BENCH_RAG_QUERY; ask something the PDF does not
+answer to measure the web fallback.
+
+Reports latency percentiles, throughput at the given concurrency and peak memory,
+and compares them with benchmarks/baselines/<app>.json (write it with --save-baseline).
+Run every app in its own process: the projects have clashing module names.
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+sys.path.insert(0, BENCH_DIR)
+
+from harness import RecordReplay, measure, compare
+
+MODEL = "gemini/gemini-2.0-flash"
+RAG_QUERY = os.getenv("BENCH_RAG_QUERY", "What is DSPy and what are its main modules?")
+
+
+def setup_project(name: str):
+    """Run from the project folder, like the apps themselves."""
+    project = os.path.join(ROOT, name)
+    os.chdir(project)
+    sys.path.insert(0, project)
+
+
+def trip_app():
+    setup_project("2_Trip_Planner")
+    from cli_app import TripCrew
+
+    def run(i):
+        result = TripCrew("Bangalore, India", "Krabi, Thailand", "2025-06-01 to 2025-06-10",
+                          "2 adults who love swimming, hiking, local food and rock climbing").run()
+        # cli_app's TripCrew prints errors and returns None
+        if result is None:
+            raise RuntimeError("TripCrew failed")
+        return result
+    return run
+
+
+def rag_app():
+    setup_project("3_Agentic_Rag")
+    from src.crew import AgenticRag, get_pdf_tool
+    # Index knowledge/dspy.pdf before anything is timed
+    get_pdf_tool()
+    from src.tools.token_budget import run_within_budget
+
+    def run(i):
+        result, _ = run_within_budget(AgenticRag().crew(), inputs={"query": RAG_QUERY})
+        return result
+    return run
+
+
+def rag_service_app():
+    setup_project("3_Agentic_Rag")
+    from src.crew import AgenticRag, get_pdf_tool
+    get_pdf_tool()
+    service = AgenticRag().retrieval_service()
+
+    def run(i):
+        result, _, _ = service.answer(RAG_QUERY)
+        return result
+    return run
+
+
+def intro_app():
+    setup_project("1_CrewAI_Intro")
+    from streamlit_app import generate_content
+
+    def run(i):
+        return generate_content("AI in advertising")
+    return run
+
+
+APPS = {"trip": trip_app, "rag": rag_app, "rag-service": rag_service_app, "intro": intro_app}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark with recorded LLM and HTTP responses")
+    parser.add_argument("app", choices=sorted(APPS))
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed requests before measuring")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Simulated seconds per LLM call (replay)")
+    parser.add_argument("--http-latency", type=float, default=0.2, help="Simulated seconds per HTTP call (replay)")
+    parser.add_argument("--trace-memory", action="store_true", help="Also report the tracemalloc peak (slower)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression vs. the baseline")
+    args = parser.parse_args()
+
+    if args.mode == "replay":
+        # Offline: placeholder keys, no telemetry, and no caches that would skip the replayed work
+        for key in ("GEMINI_API_KEY", "SERPER_API_KEY", "BROWSERLESS_API_KEY", "GROQ_API_KEY", "OPENAI_API_KEY"):
+            os.environ.setdefault(key, "replay")
+        os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+        os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    os.environ.setdefault("PAGE_CACHE_ENABLED", "false")
+    os.environ.setdefault("ITINERARY_CACHE_ENABLED", "false")
+    os.environ.setdefault("SEARCH_CACHE_ENABLED", "false")
+
+    run = APPS[args.app]()
+    # Native provider classes are imported when the first LLM is built; build one so they get patched too
+    from crewai import LLM
+    LLM(model=MODEL)
+
+    fixture = os.path.join(BENCH_DIR, "fixtures", f"{args.app}.json")
+    harness = RecordReplay(fixture, args.mode, args.llm_latency, args.http_latency).install()
+    try:
+        if args.mode == "record":
+            run(0)
+            harness.save()
+            print(f"Recorded {len(harness.fixtures['llm'])} LLM and {len(harness.fixtures['http'])} HTTP responses "
+                  f"to {fixture}")
+            return 0
+        for i in range(args.warmup):
+            run(i)
+        stats = measure(run, args.requests, args.concurrency, trace_memory=args.trace_memory)
+    finally:
+        harness.uninstall()
+    stats["llm_latency"] = args.llm_latency
+    stats["http_latency"] = args.http_latency
+    stats["replay"] = dict(harness.stats)
+    print(json.dumps(stats, indent=2))
+
+    baseline_path = os.path.join(BENCH_DIR, "baselines", f"{args.app}.json")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+        return 0
+    if not os.path.exists(baseline_path):
+        print("No baseline yet; save one with --save-baseline")
+        return 0
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if (baseline.get("concurrency"), baseline.get("llm_latency"), baseline.get("http_latency")) != \
+            (args.concurrency, args.llm_latency, args.http_latency):
+        print("Warning: the baseline was measured with a different concurrency or simulated latency")
+
+    rows = compare(stats, baseline, args.tolerance)
+    print(f"\n{'metric':>15} {'baseline':>10} {'current':>10} {'change':>8}")
+    for metric, old, new, change, regressed in rows:
+        print(f"{metric:>15} {old:>10} {new:>10} {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+    return 1 if stats["errors"] or any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Per-request setup cost of a trip crew: building everything vs. copying from TripEngine.
+
+Only the setup is measured (LLM client, tools, agents, tasks and the Crew object);
+nothing is sent to a provider, so no API keys are needed.
+
+Usage: python benchmarks/bench_engine.py --requests 50
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2_Trip_Planner"))
+
+from crewai import LLM
+from trip_agents import TripAgents
+from trip_tasks import TripTasks
+from trip_graph import build_trip_crew
+from trip_engine import TripEngine, TRIP_MODEL
+
+REQUEST = ("Bangalore, India", "Krabi, Thailand", "hiking, local food", "2025-06-01 to 2025-06-10")
+
+
+def fresh_setup():
+    """The previous behaviour: a new LLM client, tools and agents for every request."""
+    origin, destination, interests, date_range = REQUEST
+    agents = TripAgents(llm=LLM(model=TRIP_MODEL))
+    return build_trip_crew(agents, TripTasks(), origin, destination, interests, date_range)
+
+
+def measure(setup, requests: int):
+    """Return (mean ms per request, KiB allocated per request, peak KiB)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(requests):
+        setup()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000 / requests, current / 1024 / requests, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request crew setup")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = TripEngine()
+    engine.templates()
+    origin, destination, interests, date_range = REQUEST
+    # One untimed round of each, so imports and lazy module state are not counted
+    fresh_setup()
+    engine.build(origin, destination, interests, date_range)
+
+    print(f"{'setup':>8} {'ms/request':>11} {'KiB retained/request':>21} {'peak KiB':>9}")
+    for name, setup in (("fresh", fresh_setup),
+                        ("pooled", lambda: engine.build(origin, destination, interests, date_range))):
+        ms, retained, peak = measure(setup, args.requests)
+        print(f"{name:>8} {ms:>11.2f} {retained:>21.1f} {peak:>9.0f}")
+    print(f"engine stats: {engine.stats()}")
+
+
+if __name__ == "__main__":
+    main()
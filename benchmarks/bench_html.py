@@ -0,0 +1,85 @@
+"""Time to first chunk, total time and peak memory of the page-to-chunks step of BrowserTools.
+
+Compares the streaming extraction (tools.html_text) with the previous path, which
+ran unstructured's partition_html on the whole page, joined every element and sliced
+the text into 8000-character pieces. The previous path is skipped when unstructured
+is not installed. Pages are synthetic: article sections wrapped in the usual
+navigation, scripts and footer.
+
+Usage: python benchmarks/bench_html.py --sections 400
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2_Trip_Planner"))
+
+from tools.html_text import iter_chunks, split_text
+
+
+def make_page(sections: int) -> bytes:
+    nav = "<nav><ul>" + "".join(f"<li><a href='/p{i}'>Link {i}</a></li>" for i in range(50)) + "</ul></nav>"
+    script = "<script>" + "var x = {a: 1, b: [1, 2, 3]};\n" * 200 + "</script>"
+    body = "".join(
+        f"<section><h2>Section {i}</h2><p>" + f"Krabi travel detail number {i}, with beaches and food. " * 30
+        + "</p><ul><li>Tip one</li><li>Tip two</li></ul></section>"
+        for i in range(sections)
+    )
+    footer = "<footer>" + "Copyright, terms and privacy. " * 50 + "</footer>"
+    return f"<html><head>{script}</head><body>{nav}<main>{body}</main>{footer}</body></html>".encode("utf-8")
+
+
+def streaming(page: bytes):
+    pieces = (page[i:i + 64 * 1024] for i in range(0, len(page), 64 * 1024))
+    return iter_chunks(pieces)
+
+
+def partitioned(page: bytes):
+    from unstructured.partition.html import partition_html
+    elements = partition_html(text=page.decode("utf-8"))
+    content = "\n\n".join([str(el) for el in elements])
+    return iter([content[i:i + 8000] for i in range(0, len(content), 8000)])
+
+
+def run(variant, page: bytes) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = variant(page)
+    first = next(chunks)
+    first_at = time.perf_counter() - start
+    count, chars = 1, len(first)
+    for chunk in chunks:
+        count += 1
+        chars += len(chunk)
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"first_ms": first_at * 1000, "total_ms": total * 1000, "peak_mb": peak / 2**20,
+            "chunks": count, "chars": chars}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML-to-chunks extraction")
+    parser.add_argument("--sections", type=int, default=400)
+    args = parser.parse_args()
+
+    page = make_page(args.sections)
+    print(f"page: {len(page) / 2**20:.1f} MiB")
+    variants = {"streaming": streaming, "streaming (cached str)": lambda p: iter_chunks(split_text(p.decode()))}
+    try:
+        import unstructured  # noqa: F401
+        variants["partition_html"] = partitioned
+    except ImportError:
+        print("unstructured not installed: skipping partition_html")
+
+    print(f"{'variant':>24} {'first ms':>9} {'total ms':>9} {'peak MiB':>9} {'chunks':>7} {'chars':>9}")
+    for name, variant in variants.items():
+        r = run(variant, page)
+        print(f"{name:>24} {r['first_ms']:>9.1f} {r['total_ms']:>9.1f} {r['peak_mb']:>9.1f} "
+              f"{r['chunks']:>7} {r['chars']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Cold-start import time of the entry points, measured with python -X importtime.
+
+Every target is imported in a fresh interpreter, from its project folder:
+    cli  - 2_Trip_Planner/cli_app.py
+    api  - 2_Trip_Planner/api_app.py (what a uvicorn worker imports)
+    rag  - 3_Agentic_Rag/src/crew.py
+    rag-api - 3_Agentic_Rag/api_app.py
+The report shows the wall time, the import time of the target, its heaviest
+top-level imports, and which of the dependencies that should load lazily were
+imported anyway. Results are compared with benchmarks/baselines/startup.json
+(write it with --save-baseline).
+
+Usage: python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "startup.json")
+
+# target -> (project folder, module imported, modules that must not be imported at start-up)
+TARGETS = {
+    "cli": ("2_Trip_Planner", "cli_app", ("streamlit", "langchain_groq", "langchain_openai", "unstructured")),
+    "api": ("2_Trip_Planner", "api_app", ("streamlit", "langchain_groq", "langchain_openai", "unstructured")),
+    "rag": ("3_Agentic_Rag", "src.crew", ("streamlit", "qdrant_client", "unstructured")),
+    "rag-api": ("3_Agentic_Rag", "api_app", ("streamlit", "qdrant_client", "unstructured")),
+}
+
+# import time: self [us] | cumulative | imported package
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def import_once(project: str, module: str) -> dict:
+    """Import module in a fresh interpreter; return wall time and the importtime tree."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0", CREWAI_DISABLE_TELEMETRY="true", OTEL_SDK_DISABLED="true")
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             cwd=os.path.join(ROOT, project), env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if process.returncode != 0:
+        error = [line for line in process.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(error[-1] if error else f"exit status {process.returncode}")
+    imports = {}
+    top_level = []
+    for line in process.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        imports[name] = cumulative
+        # Modules imported directly by the interpreter or the target, not by a dependency
+        if indent <= 3 and name != module:
+            top_level.append((name, cumulative))
+    return {"wall_ms": wall * 1000, "import_ms": imports.get(module, 0) / 1000,
+            "imports": imports, "top_level": top_level}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold-start import time of the entry points")
+    parser.add_argument("targets", nargs="*", help=f"Any of {', '.join(sorted(TARGETS))} (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per target; the median is reported")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest top-level imports to list")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression vs. the baseline")
+    args = parser.parse_args()
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    baseline = {}
+    if os.path.exists(BASELINE) and not args.save_baseline:
+        with open(BASELINE, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results, failed, regressed = {}, False, False
+    for target in args.targets or sorted(TARGETS):
+        project, module, lazy = TARGETS[target]
+        # The first run warms the bytecode cache and the OS file cache; it is not counted
+        try:
+            runs = [import_once(project, module) for _ in range(args.repeat + 1)][1:]
+        except RuntimeError as e:
+            print(f"\n{target}: import {module} failed: {e}")
+            failed = True
+            continue
+        wall = statistics.median(run["wall_ms"] for run in runs)
+        imported = statistics.median(run["import_ms"] for run in runs)
+        results[target] = {"wall_ms": round(wall, 1), "import_ms": round(imported, 1)}
+
+        print(f"\n{target}: import {module}  wall {wall:.0f} ms, import {imported:.0f} ms")
+        heaviest = sorted(runs[-1]["top_level"], key=lambda item: item[1], reverse=True)[:args.top]
+        for name, cumulative in heaviest:
+            print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+        eager = [name for name in lazy if name in runs[-1]["imports"]]
+        if eager:
+            print(f"  imported at start-up, should load lazily: {', '.join(eager)}")
+            regressed = True
+
+        old = baseline.get(target, {}).get("wall_ms")
+        if old:
+            change = (wall - old) / old
+            flag = "  REGRESSION" if change > args.tolerance else ""
+            regressed = regressed or bool(flag)
+            print(f"  baseline {old:.0f} ms, change {change:+.1%}{flag}")
+
+    if args.save_baseline and results:
+        os.makedirs(os.path.dirname(BASELINE), exist_ok=True)
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {BASELINE}")
+    return 1 if failed or regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Wall-clock scaling of the BrowserTools chunk summarizer against chunk count.
+
+The LLM is replaced by a stub that sleeps for a fixed latency, so the numbers
+show the effect of the map-reduce pool and not the provider.
+
+Usage: python benchmarks/bench_summarizer.py --chunks 1 2 4 8 16 --latency 0.5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2_Trip_Planner"))
+
+from crewai import BaseLLM
+from tools.summarizer import ChunkSummarizer
+
+
+class StubLLM(BaseLLM):
+    """LLM stand-in that answers every call after a fixed delay."""
+
+    def __init__(self, latency: float):
+        super().__init__(model="stub/summarizer")
+        self.latency = latency
+
+    def call(self, messages, *args, **kwargs) -> str:
+        time.sleep(self.latency)
+        return "Thought: I now know the final answer\nFinal Answer: stub summary"
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 8192
+
+
+def serial_baseline(summarizer, chunks):
+    """The previous behaviour: one chunk after the other."""
+    return "\n\n".join(summarizer.summarize_chunk(chunk) for chunk in chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunk summarization")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated LLM latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=4, help="Per-tool concurrency limit")
+    parser.add_argument("--reduce", action="store_true", help="Include the reduce step")
+    args = parser.parse_args()
+
+    summarizer = ChunkSummarizer(llm=StubLLM(args.latency), max_concurrency=args.concurrency, reduce=args.reduce)
+    # Build the worker agents before timing
+    summarizer.summarize(["warm up"] * args.concurrency)
+
+    print(f"{'chunks':>6} {'serial (s)':>11} {'parallel (s)':>13} {'speedup':>8}")
+    for count in args.chunks:
+        chunks = [f"chunk {i} " * 100 for i in range(count)]
+
+        start = time.perf_counter()
+        serial_baseline(summarizer, chunks)
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        summarizer.summarize(chunks)
+        parallel = time.perf_counter() - start
+
+        print(f"{count:>6} {serial:>11.2f} {parallel:>13.2f} {serial / parallel:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
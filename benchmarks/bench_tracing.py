@@ -0,0 +1,56 @@
+"""Per-call overhead of the tracing instrumentation, disabled and enabled.
+
+A trivial tool method is timed undecorated, with traced_tool while tracing is
+disabled (the default), and with tracing enabled (spans kept in memory only).
+
+Usage: python benchmarks/bench_tracing.py --calls 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2_Trip_Planner"))
+
+from tools import tracing
+
+
+class Tool:
+    name = "bench"
+
+    def plain(self, query: str) -> str:
+        return query
+
+    traced = tracing.traced_tool(plain)
+
+
+def per_call_ns(fn, calls: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        fn("query")
+    return (time.perf_counter_ns() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tracing overhead")
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    tool = Tool()
+    tracing.configure(enabled=False)
+    plain = per_call_ns(tool.plain, args.calls)
+    disabled = per_call_ns(tool.traced, args.calls)
+    with_span = per_call_ns(lambda q: tracing.span("noop").__enter__(), args.calls)
+    # No file or collector: measures span bookkeeping and metrics only
+    tracing.configure(enabled=True, trace_file="", otlp_endpoint=None)
+    enabled = per_call_ns(tool.traced, args.calls // 10)
+
+    print(f"{'variant':>20} {'ns/call':>9}")
+    print(f"{'undecorated':>20} {plain:>9.0f}")
+    print(f"{'disabled':>20} {disabled:>9.0f}")
+    print(f"{'disabled span()':>20} {with_span:>9.0f}")
+    print(f"{'enabled':>20} {enabled:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
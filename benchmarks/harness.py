@@ -0,0 +1,244 @@
+"""Record/replay of LLM and HTTP traffic, and end-to-end measurement, for the benchmarks.
+
+Record mode runs the apps against the live providers once and stores every LLM
+response and every HTTP response from the recorded hosts in a JSON fixture.
+Replay mode serves them back from the fixture, after a fixed simulated latency, so
+runs are deterministic and need no API keys.
+"""
+import base64
+import hashlib
+import json
+import math
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import requests
+from requests.hooks import dispatch_hook
+from requests.structures import CaseInsensitiveDict
+
+# Hosts whose HTTP traffic is recorded and replayed; everything else goes out as usual
+RECORDED_HOSTS = ("google.serper.dev", "production-sfo.browserless.io")
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _llm_classes():
+    """crewai LLM classes that implement call(): LLM and any native provider classes."""
+    from crewai import BaseLLM
+    classes, pending = [], [BaseLLM]
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        # Traced subclasses (tools.tracing) delegate to their base class
+        if "call" in cls.__dict__ and not cls.__name__.startswith("Traced"):
+            classes.append(cls)
+    return classes
+
+
+class RecordReplay:
+    """Patches crewai LLM classes and requests.Session to record or replay responses."""
+
+    def __init__(self, path: str, mode: str = "replay", llm_latency: float = 0.0, http_latency: float = 0.0,
+                 hosts=RECORDED_HOSTS):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown mode '{mode}'")
+        self.path = path
+        self.mode = mode
+        self.llm_latency = llm_latency
+        self.http_latency = http_latency
+        self.hosts = set(hosts)
+        self.fixtures = {"llm": {}, "llm_by_position": {}, "http": {}}
+        if mode == "replay":
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No fixture at {path}; run once with --mode record first")
+            with open(path, "r", encoding="utf-8") as f:
+                self.fixtures = json.load(f)
+        self.stats = {"llm_calls": 0, "http_calls": 0, "llm_fallbacks": 0}
+        self._lock = threading.Lock()
+        self._patched = []
+
+    # --- LLM -------------------------------------------------------------------------
+
+    def _llm_keys(self, llm, messages):
+        model = getattr(llm, "model", "")
+        messages = [{"role": "user", "content": messages}] if isinstance(messages, str) else messages
+        exact = _digest({"model": model, "messages": messages})
+        # Fallback for prompts that differ slightly between runs: the same agent
+        # (system prompt) at the same point of its conversation
+        position = _digest({"model": model, "system": messages[:1], "turn": len(messages)})
+        return exact, position
+
+    def _patch_llm(self, cls):
+        original = cls.__dict__["call"]
+        harness = self
+
+        def call(self, messages, *args, **kwargs):
+            exact, position = harness._llm_keys(self, messages)
+            with harness._lock:
+                harness.stats["llm_calls"] += 1
+            if harness.mode == "record":
+                response = original(self, messages, *args, **kwargs)
+                with harness._lock:
+                    harness.fixtures["llm"][exact] = str(response)
+                    harness.fixtures["llm_by_position"].setdefault(position, str(response))
+                return response
+            response = harness.fixtures["llm"].get(exact)
+            if response is None:
+                response = harness.fixtures["llm_by_position"].get(position)
+                if response is None:
+                    raise KeyError("LLM prompt not in the fixture; record it again with --mode record")
+                with harness._lock:
+                    harness.stats["llm_fallbacks"] += 1
+            time.sleep(harness.llm_latency)
+            return response
+
+        cls.call = call
+        self._patched.append((cls, "call", original))
+
+    # --- HTTP ------------------------------------------------------------------------
+
+    def _http_key(self, request) -> str:
+        parts = urlsplit(request.url)
+        # The query string carries API tokens (browserless), so only the path is part of the key
+        body = request.body.decode("utf-8", "replace") if isinstance(request.body, bytes) else request.body
+        return _digest({"method": request.method, "url": f"{parts.scheme}://{parts.hostname}{parts.path}",
+                        "body": body})
+
+    def _patch_http(self):
+        original = requests.Session.send
+        harness = self
+
+        def send(self, request, **kwargs):
+            if urlsplit(request.url).hostname not in harness.hosts:
+                return original(self, request, **kwargs)
+            key = harness._http_key(request)
+            with harness._lock:
+                harness.stats["http_calls"] += 1
+            if harness.mode == "record":
+                response = original(self, request, **kwargs)
+                with harness._lock:
+                    harness.fixtures["http"][key] = {
+                        "status": response.status_code,
+                        "headers": dict(response.headers),
+                        "body": base64.b64encode(response.content).decode("ascii"),
+                    }
+                return response
+            recorded = harness.fixtures["http"].get(key)
+            if recorded is None:
+                raise KeyError(f"{request.method} {urlsplit(request.url).hostname} not in the fixture")
+            time.sleep(harness.http_latency)
+            response = requests.Response()
+            response.status_code = recorded["status"]
+            response.headers = CaseInsensitiveDict(recorded["headers"])
+            # The body is stored decoded; drop headers describing the wire encoding
+            response.headers.pop("Content-Encoding", None)
+            response._content = base64.b64decode(recorded["body"])
+            # Already read, so iter_content() of streamed requests serves _content
+            response._content_consumed = True
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+            response.url = request.url
+            response.request = request
+            response.elapsed = timedelta(seconds=harness.http_latency)
+            # Session hooks (e.g. tracing) still see the response
+            return dispatch_hook("response", request.hooks, response, **kwargs)
+
+        requests.Session.send = send
+        self._patched.append((requests.Session, "send", original))
+
+    # ---------------------------------------------------------------------------------
+
+    def install(self):
+        for cls in _llm_classes():
+            self._patch_llm(cls)
+        self._patch_http()
+        return self
+
+    def uninstall(self):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.fixtures, f, indent=1)
+
+
+def percentile(values: list, p: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def measure(run, requests: int, concurrency: int, trace_memory: bool = False) -> dict:
+    """Call run(i) for i in range(requests), concurrency at a time; return latency and memory stats."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            run(i)
+        except Exception as e:
+            with lock:
+                errors.append(f"{type(e).__name__}: {e}")
+            return
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+    peak_traced = None
+    if trace_memory:
+        peak_traced = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    stats = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else None,
+        # ru_maxrss is in KiB on Linux
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_traced_mb": round(peak_traced, 1) if peak_traced is not None else None,
+    }
+    if latencies:
+        stats.update({
+            "mean_s": round(sum(latencies) / len(latencies), 3),
+            "p50_s": round(percentile(latencies, 50), 3),
+            "p95_s": round(percentile(latencies, 95), 3),
+            "p99_s": round(percentile(latencies, 99), 3),
+        })
+    if errors:
+        stats["first_error"] = errors[0]
+    return stats
+
+
+# Metrics compared against the baseline, and whether higher is better
+COMPARED = {"p50_s": False, "p95_s": False, "p99_s": False, "throughput_rps": True, "max_rss_mb": False}
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Return [(metric, baseline, current, change, regressed)] for the compared metrics."""
+    rows = []
+    for metric, higher_is_better in COMPARED.items():
+        old, new = baseline.get(metric), current.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        regressed = change < -tolerance if higher_is_better else change > tolerance
+        rows.append((metric, old, new, change, regressed))
+    return rows
@@ -0,0 +1,241 @@
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import re
+import threading
+from crew_common.tracing import span, step_tracer
+
+# Token budget of one crew run: the tokens tool outputs and agent outputs may add to
+# the agents' context. Tool outputs are trimmed to fit, so long pages or documents cannot
+# inflate prompt size, latency and cost. Counts are local estimates (tiktoken when
+# installed), not the provider's billing numbers. Shared by the projects of this
+# repository; each project's tools/token_budget.py sets its defaults with configure().
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "cl100k_base")
+# Budget of a run, and bounds of what a single tool call may return
+_defaults = {"max_tokens": 20000, "tool_max_tokens": 3000, "tool_min_tokens": 300}
+
+# The budget of the current run lives in a context variable, so tools shared by several
+# requests or sessions account to the right one
+_current_budget = contextvars.ContextVar("token_budget", default=None)
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    """Return the tiktoken encoder, or False when tiktoken is not installed."""
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            try:
+                import tiktoken
+                _encoder = tiktoken.get_encoding(TOKEN_ENCODING)
+            except Exception:
+                # Not installed, or the encoding cannot be loaded offline
+                _encoder = False
+        return _encoder
+
+
+def count_tokens(text: str) -> int:
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    # About 4 characters per token for English text
+    return (len(text) + 3) // 4
+
+
+def _cut(text: str, max_tokens: int) -> str:
+    """Cut text after max_tokens tokens."""
+    encoder = _get_encoder()
+    if encoder:
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:max_tokens])
+    return text[:max_tokens * 4]
+
+
+def compress(text: str, separator: str = "\n\n") -> str:
+    """Cheap cleanup before truncating: collapse whitespace runs and drop repeated lines.
+
+    Lines equal to the section separator are always kept.
+    """
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r"[ \t]+", " ", line).strip()
+        # Keep single blank lines (section breaks), drop repeated navigation/boilerplate lines
+        if line and line in seen and line != separator.strip():
+            continue
+        if line or (lines and lines[-1]):
+            lines.append(line)
+        seen.add(line)
+    return "\n".join(lines).strip()
+
+
+def truncate(text: str, max_tokens: int, separator: str = "\n\n") -> str:
+    """Fit text into max_tokens, keeping whole sections from the start.
+
+    Sections are split on separator and are expected best first (search results,
+    ranked chunks, chunk summaries), so the least relevant ones are dropped.
+    """
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+    kept, used = [], 0
+    for section in text.split(separator):
+        tokens = count_tokens(section + separator)
+        if used + tokens > max_tokens:
+            # Keep the start of the section when there is room for something useful
+            if max_tokens - used > 50 or not kept:
+                kept.append(_cut(section, max_tokens - used))
+            break
+        kept.append(section)
+        used += tokens
+    trimmed = separator.join(kept)
+    return f"{trimmed}\n[... about {total - count_tokens(trimmed)} tokens omitted to fit the token budget]"
+
+
+class TokenBudget:
+    """Token budget and accounting of one crew run, per agent and per tool.
+
+    Every tool call may use half of what is left, within the tool output bounds, so
+    early calls cannot starve later ones and the run stays close to the budget. Unset
+    limits take the project's defaults.
+    """
+
+    def __init__(self, max_tokens: int = None, tool_max_tokens: int = None, tool_min_tokens: int = None):
+        self.max_tokens = max_tokens or _defaults["max_tokens"]
+        self.tool_max_tokens = tool_max_tokens or _defaults["tool_max_tokens"]
+        self.tool_min_tokens = tool_min_tokens or _defaults["tool_min_tokens"]
+        self.used = 0
+        self.tools = {}
+        self.agents = {}
+        self._lock = threading.Lock()
+
+    def remaining(self) -> int:
+        return max(0, self.max_tokens - self.used)
+
+    def allowance(self) -> int:
+        """Max tokens the next tool output may use."""
+        return max(self.tool_min_tokens, min(self.tool_max_tokens, self.remaining() // 2))
+
+    def fit(self, tool: str, output, separator: str = "\n\n") -> str:
+        """Compress and truncate a tool output to the current allowance, and account for it."""
+        if isinstance(output, (dict, list)):
+            # One JSON value per line, so truncating on "\n" keeps whole fields
+            output = json.dumps(output, default=str, indent=1)
+        elif not isinstance(output, str):
+            output = str(output)
+        tokens_in = count_tokens(output)
+        with self._lock:
+            allowance = self.allowance()
+        if tokens_in > allowance:
+            output = truncate(compress(output, separator), allowance, separator)
+        tokens_out = count_tokens(output)
+        with self._lock:
+            self.used += tokens_out
+            stats = self.tools.setdefault(tool, {"calls": 0, "tokens_in": 0, "tokens_out": 0, "trimmed_calls": 0})
+            stats["calls"] += 1
+            stats["tokens_in"] += tokens_in
+            stats["tokens_out"] += tokens_out
+            stats["trimmed_calls"] += tokens_in > tokens_out
+        return output
+
+    def record_step(self, agent: str, step):
+        """Account for one agent step (AgentAction or AgentFinish)."""
+        # The LLM output of the step: thought, tool call or final answer
+        output_tokens = count_tokens(str(getattr(step, "text", "") or ""))
+        # Tool results were already counted by fit(); only attribute them to the agent here
+        observation = getattr(step, "result", None)
+        observation_tokens = count_tokens(str(observation)) if observation else 0
+        with self._lock:
+            self.used += output_tokens
+            stats = self.agents.setdefault(agent, {"steps": 0, "output_tokens": 0, "observation_tokens": 0})
+            stats["steps"] += 1
+            stats["output_tokens"] += output_tokens
+            stats["observation_tokens"] += observation_tokens
+
+    def step_callback(self, agent: str):
+        """Agent step_callback that accounts the agent's steps to this budget."""
+        return lambda step: self.record_step(agent, step)
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "budget": self.max_tokens,
+                "used": self.used,
+                "remaining": self.remaining(),
+                "counter": "tiktoken" if _get_encoder() else "estimate",
+                "agents": {name: dict(stats) for name, stats in self.agents.items()},
+                "tools": {name: dict(stats) for name, stats in self.tools.items()},
+            }
+
+
+def configure(max_tokens: int, tool_max_tokens: int, tool_min_tokens: int):
+    """Set the limits of budgets created without explicit ones."""
+    _defaults.update(max_tokens=max_tokens, tool_max_tokens=tool_max_tokens, tool_min_tokens=tool_min_tokens)
+
+
+def set_budget(budget: TokenBudget):
+    """Install the budget for the current context; returns a token for reset_budget."""
+    return _current_budget.set(budget)
+
+
+def reset_budget(token):
+    _current_budget.reset(token)
+
+
+def current_budget():
+    return _current_budget.get()
+
+
+def run_within_budget(crew, inputs: dict = None, budget: TokenBudget = None):
+    """Kick off crew under a token budget; returns (result, budget).
+
+    The crew's agents must belong to this run only, since their step_callback is replaced.
+    """
+    budget = budget or TokenBudget()
+    for agent in crew.agents:
+        agent.step_callback = _chain(budget.step_callback(agent.role), step_tracer(agent.role))
+    token = set_budget(budget)
+    try:
+        with span("crew.kickoff", agents=len(crew.agents), tasks=len(crew.tasks)) as current:
+            result = crew.kickoff(inputs=inputs) if inputs is not None else crew.kickoff()
+            current.set(used_tokens=budget.used)
+    finally:
+        reset_budget(token)
+    return result, budget
+
+
+def _chain(callback, tracer):
+    """Step callback calling both, or just callback when tracing is disabled."""
+    if tracer is None:
+        return callback
+
+    def both(step):
+        callback(step)
+        tracer(step)
+    return both
+
+
+def fits_budget(method=None, *, separator: str = "\n\n"):
+    """Decorate a tool's _run/_arun so its output is fitted to the current budget.
+
+    Outputs pass through unchanged when no budget is installed.
+    """
+    if method is None:
+        return functools.partial(fits_budget, separator=separator)
+
+    def fit(tool, output):
+        budget = _current_budget.get()
+        return budget.fit(tool.name, output, separator) if budget is not None else output
+
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            return fit(self, await method(self, *args, **kwargs))
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return fit(self, method(self, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,321 @@
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+
+# Spans for crew runs, agent steps, LLM calls, tool calls, HTTP requests and embedding
+# calls, shared by the projects of this repository. Each project's tools/tracing.py sets
+# its trace file and service name with configure() when it is imported.
+# Disabled by default: then span() hands out a shared no-op object and the decorators
+# call straight through, so instrumented code only pays one flag check.
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+# Standard OpenTelemetry setting; spans are also exported there when the OTel SDK is installed
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+# Upper bounds (seconds) of the duration histogram buckets in /metrics
+DURATION_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation. Attributes carry payload sizes, token counts and the like."""
+
+    def __init__(self, name: str, parent=None, **attributes):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+        self._otel = None
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self._otel = _tracer.start_otel(self)
+        self._token = _current_span.set(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._started
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        _tracer.finish(self)
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned by span() when tracing is disabled."""
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Metrics:
+    """Per span name: count, errors, duration histogram and summed numeric attributes."""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, span: Span):
+        with self._lock:
+            series = self._series.setdefault(span.name, {
+                "count": 0, "errors": 0, "duration_sum": 0.0,
+                "buckets": [0] * len(DURATION_BUCKETS), "totals": {},
+            })
+            series["count"] += 1
+            series["errors"] += span.error is not None
+            series["duration_sum"] += span.duration
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if span.duration <= bound:
+                    series["buckets"][i] += 1
+            # Payload sizes and token counts become counters
+            for key, value in span.attributes.items():
+                if (key.endswith("_bytes") or key.endswith("_tokens")) and isinstance(value, (int, float)):
+                    series["totals"][key] = series["totals"].get(key, 0) + value
+
+    def render_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP span_duration_seconds Duration of instrumented operations.",
+            "# TYPE span_duration_seconds histogram",
+        ]
+        with self._lock:
+            series = {name: dict(data, buckets=list(data["buckets"]), totals=dict(data["totals"]))
+                      for name, data in self._series.items()}
+        for name, data in sorted(series.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for bound, count in zip(DURATION_BUCKETS, data["buckets"]):
+                lines.append(f'span_duration_seconds_bucket{{span="{label}",le="{bound}"}} {count}')
+            lines.append(f'span_duration_seconds_bucket{{span="{label}",le="+Inf"}} {data["count"]}')
+            lines.append(f'span_duration_seconds_sum{{span="{label}"}} {data["duration_sum"]:.6f}')
+            lines.append(f'span_duration_seconds_count{{span="{label}"}} {data["count"]}')
+        lines += ["# HELP span_errors_total Instrumented operations that raised.", "# TYPE span_errors_total counter"]
+        for name, data in sorted(series.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'span_errors_total{{span="{label}"}} {data["errors"]}')
+        lines += ["# HELP span_attribute_total Summed payload sizes and token counts.",
+                  "# TYPE span_attribute_total counter"]
+        for name, data in sorted(series.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for key, value in sorted(data["totals"].items()):
+                lines.append(f'span_attribute_total{{span="{label}",attribute="{key}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+class Tracer:
+    """Sends finished spans to the JSON-lines file, the OTLP collector and the metrics."""
+
+    def __init__(self, enabled: bool = TRACING_ENABLED, trace_file: str = "",
+                 otlp_endpoint: str = OTLP_ENDPOINT, service_name: str = "crewai"):
+        self.enabled = enabled
+        # JSON-lines file every finished span is appended to; empty to disable
+        self.trace_file = trace_file
+        self.otlp_endpoint = otlp_endpoint
+        self.service_name = service_name
+        self.metrics = Metrics()
+        self._file = None
+        self._otel_tracer = None
+        self._lock = threading.Lock()
+        if enabled:
+            self._setup()
+
+    def _setup(self):
+        if self.trace_file:
+            os.makedirs(os.path.dirname(self.trace_file) or ".", exist_ok=True)
+            self._file = open(self.trace_file, "a", encoding="utf-8")
+        if self.otlp_endpoint:
+            try:
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import BatchSpanProcessor
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            except ImportError:
+                print("OTLP export disabled: install opentelemetry-sdk and opentelemetry-exporter-otlp-proto-http")
+                return
+            # The exporter reads OTEL_EXPORTER_OTLP_ENDPOINT and the other standard settings
+            provider = TracerProvider(resource=Resource.create({"service.name": self.service_name}))
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+            self._otel_tracer = provider.get_tracer(__name__)
+
+    def start_otel(self, span: Span):
+        """Open the matching OpenTelemetry span, under the OTel span of span's parent."""
+        if self._otel_tracer is None:
+            return None
+        from opentelemetry import trace
+        parent = span.parent
+        context = trace.set_span_in_context(parent._otel) if parent is not None and parent._otel else None
+        return self._otel_tracer.start_span(span.name, context=context, start_time=int(span.start * 1e9))
+
+    def finish(self, span: Span):
+        self.metrics.observe(span)
+        if span._otel is not None:
+            from opentelemetry.trace import Status, StatusCode
+            for key, value in span.attributes.items():
+                if isinstance(value, (str, bool, int, float)):
+                    span._otel.set_attribute(key, value)
+            if span.error:
+                span._otel.set_status(Status(StatusCode.ERROR, span.error))
+            span._otel.end(end_time=int((span.start + span.duration) * 1e9))
+        if self._file is not None:
+            line = json.dumps(span.to_dict(), default=str)
+            with self._lock:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+
+# Replaced by the project's configure() on import
+_tracer = Tracer(enabled=False)
+
+
+def is_enabled() -> bool:
+    return _tracer.enabled
+
+
+def configure(enabled: bool = True, trace_file: str = "", otlp_endpoint: str = OTLP_ENDPOINT,
+              service_name: str = "crewai"):
+    """Replace the process-wide tracer."""
+    global _tracer
+    _tracer = Tracer(enabled=enabled, trace_file=trace_file, otlp_endpoint=otlp_endpoint, service_name=service_name)
+    return _tracer
+
+
+def span(name: str, **attributes):
+    """Context manager timing the block as a child of the current span."""
+    if not _tracer.enabled:
+        return _NOOP_SPAN
+    return Span(name, _current_span.get(), **attributes)
+
+
+def record_span(name: str, duration: float, **attributes):
+    """Record an operation that was timed elsewhere (e.g. by an HTTP client) and just finished."""
+    if not _tracer.enabled:
+        return
+    finished = Span(name, _current_span.get(), **attributes)
+    finished.duration = duration
+    finished.start = time.time() - duration
+    finished._otel = _tracer.start_otel(finished)
+    _tracer.finish(finished)
+
+
+def render_metrics() -> str:
+    return _tracer.metrics.render_prometheus()
+
+
+def _size(value) -> int:
+    return len(value.encode("utf-8")) if isinstance(value, str) else len(str(value).encode("utf-8"))
+
+
+def traced_tool(method):
+    """Decorate a tool's _run/_arun with a "tool.<name>" span carrying payload sizes and tokens."""
+    def attributes(args, kwargs, output):
+        from crew_common.token_budget import count_tokens
+        text = output if isinstance(output, str) else str(output)
+        return {"input_bytes": _size(kwargs or list(args)), "output_bytes": _size(text),
+                "output_tokens": count_tokens(text)}
+
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            if not _tracer.enabled:
+                return await method(self, *args, **kwargs)
+            with span(f"tool.{self.name}") as current:
+                output = await method(self, *args, **kwargs)
+                current.set(**attributes(args, kwargs, output))
+                return output
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not _tracer.enabled:
+            return method(self, *args, **kwargs)
+        with span(f"tool.{self.name}") as current:
+            output = method(self, *args, **kwargs)
+            current.set(**attributes(args, kwargs, output))
+            return output
+    return wrapper
+
+
+def step_tracer(agent: str):
+    """Agent step_callback recording one "agent.step" span per step, or None when disabled.
+
+    CrewAI only reports finished steps, so a step lasts from the previous step (or the
+    first call) to this one: the LLM call plus the tool call it asked for.
+    """
+    if not _tracer.enabled:
+        return None
+    from crew_common.token_budget import count_tokens
+    last = [time.perf_counter()]
+
+    def record(step):
+        now = time.perf_counter()
+        text = str(getattr(step, "text", "") or "")
+        result = getattr(step, "result", None)
+        record_span("agent.step", now - last[0], agent=agent, tool=getattr(step, "tool", None),
+                    output_tokens=count_tokens(text), observation_bytes=_size(result) if result else 0,
+                    final=not hasattr(step, "tool"))
+        last[0] = now
+    return record
+
+
+_traced_llm_classes = {}
+
+
+def instrument_llm(llm):
+    """Record an "llm.call" span for every call of llm, with prompt and completion tokens.
+
+    The instance's class is swapped for a subclass overriding call(), so copies made
+    by Agent.copy() stay instrumented. Does nothing when tracing is disabled.
+    """
+    if not _tracer.enabled or type(llm) in _traced_llm_classes.values():
+        return llm
+    base = type(llm)
+    if base not in _traced_llm_classes:
+        def call(self, messages, *args, **kwargs):
+            from crew_common.token_budget import count_tokens
+            prompt = messages if isinstance(messages, str) else json.dumps(messages, default=str)
+            with span("llm.call", model=getattr(self, "model", None),
+                      prompt_bytes=_size(prompt), prompt_tokens=count_tokens(prompt)) as current:
+                result = base.call(self, messages, *args, **kwargs)
+                completion = result if isinstance(result, str) else str(result)
+                current.set(completion_bytes=_size(completion), completion_tokens=count_tokens(completion))
+                return result
+        _traced_llm_classes[base] = type(f"Traced{base.__name__}", (base,), {"call": call})
+    try:
+        object.__setattr__(llm, "__class__", _traced_llm_classes[base])
+    except TypeError:
+        print(f"LLM tracing disabled: cannot instrument {base.__name__}")
+    return llm